@@ -0,0 +1,165 @@
+"""
+Buffered activity log writer
+Requests enqueue activity records in memory and a background thread
+writes them in batched multi-row INSERTs, so write endpoints no longer
+pay for a second commit
+"""
+
+import atexit
+import os
+import queue
+import threading
+import time
+
+
+class ActivityWriter:
+    """
+    Background writer for activity rows
+
+    write(rows) is called on the worker thread with a list of dicts and
+    must insert them in one transaction. A batch is written once
+    batch_size records are queued or flush_interval seconds after the
+    first one arrived. At most max_queue records wait in memory; when
+    full, overflow='drop' discards new records and overflow='block'
+    makes the request wait up to block_timeout seconds for room (then
+    drops). Queued records are flushed on interpreter shutdown.
+    """
+
+    def __init__(self, write, batch_size=100, flush_interval=1.0, max_queue=10000,
+                 overflow='drop', block_timeout=1.0):
+        if overflow not in ('drop', 'block'):
+            raise ValueError(f"overflow must be 'drop' or 'block', not {overflow!r}")
+        self.write = write
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        self.dropped = 0
+        self.written = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._closed = False
+        atexit.register(self.close)
+
+    def enqueue(self, record):
+        """Queue one activity row; returns False if it was dropped"""
+        if self._closed:
+            return False
+        self._ensure_started()
+        try:
+            if self.overflow == 'block':
+                self._queue.put(record, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+        return True
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def flush(self):
+        """Write everything queued so far on the calling thread"""
+        while True:
+            batch = self._drain(self.batch_size)
+            if not batch:
+                return
+            self._write(batch)
+
+    def close(self, timeout=5.0):
+        """
+        Stop the worker and flush the remaining records, waiting at most
+        about timeout seconds for a busy worker
+        """
+        if self._closed:
+            return
+        self._closed = True
+        thread = self._thread
+        if thread is not None and thread.is_alive() and self._pid == os.getpid():
+            deadline = time.monotonic() + timeout
+            try:
+                self._queue.put(None, timeout=timeout)  # Wake the worker; it flushes and exits
+            except queue.Full:
+                pass
+            thread.join(max(deadline - time.monotonic(), 0))
+            if thread.is_alive():
+                # Still writing: flushing here would race it over the queue
+                lost = self._queue.qsize()
+                with self._lock:
+                    self.dropped += lost
+                print(f"Activity writer did not stop within {timeout}s ({lost} queued records dropped)")
+                return
+        self.flush()
+
+    def _ensure_started(self):
+        # Started lazily so each forked server worker gets its own thread
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._thread = threading.Thread(target=self._run, name='activity-writer', daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+
+    def _drain(self, limit):
+        batch = []
+        while len(batch) < limit:
+            try:
+                record = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if record is not None:
+                batch.append(record)
+        return batch
+
+    def _run(self):
+        while True:
+            record = self._queue.get()
+            if record is None:
+                return
+            batch = [record]
+            deadline = time.monotonic() + self.flush_interval
+            stop = False
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    record = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if record is None:
+                    stop = True
+                    break
+                batch.append(record)
+            self._write(batch)
+            if stop:
+                return
+
+    def _write(self, batch):
+        try:
+            self.write(batch)
+        except Exception as e:
+            print(f"Error logging activity ({len(batch)} records dropped): {e}")
+            with self._lock:
+                self.dropped += len(batch)
+            return
+        with self._lock:
+            self.written += len(batch)
+
+
+def insert_rows(engine, table, rows):
+    """
+    Insert rows in one transaction with a single executemany
+    SQLAlchemy sends it as multi-row INSERT ... VALUES batches on
+    PostgreSQL and as one prepared statement on SQLite
+    """
+    if not rows:
+        return
+    with engine.begin() as conn:
+        conn.execute(table.insert(), rows)
@@ -0,0 +1,115 @@
+"""
+Retention and compaction for the user activity log
+Raw user_activity rows older than the retention window are folded into
+the daily rollup (per action, device, browser, OS and user), appended to
+gzipped NDJSON archives (one file per day) and deleted in bounded
+batches. The admin analytics read the rollup plus the recent raw rows,
+so their totals are unchanged by a compaction
+
+Run it periodically (e.g. a daily cron job):
+Usage: python activity_retention.py [--days N] [--archive-dir DIR] [--batch-size N]
+"""
+
+import argparse
+import gzip
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select
+
+from admin_stats import ROLLUP_WATERMARK
+from export_stream import ndjson_lines
+
+RETENTION_DAYS = int(os.environ.get('ACTIVITY_RETENTION_DAYS', 90))
+ARCHIVE_DIR = os.environ.get('ACTIVITY_ARCHIVE_DIR', os.path.join('archive', 'user_activity'))
+
+# Rows archived and deleted per transaction (stays under SQLite's
+# bound parameter limit for the DELETE ... IN)
+BATCH_SIZE = 500
+
+
+def retention_cutoff(days, now=None):
+    """First day ('YYYY-MM-DD') kept as raw rows"""
+    return ((now or datetime.now()) - timedelta(days=days)).date().isoformat()
+
+
+def archive_rows(archive_dir, rows, fields):
+    """
+    Append rows to <archive_dir>/<day>.ndjson.gz by activity day
+    Each call adds a gzip member; gzip readers (zcat, gzip.open) read
+    the members of a file back to back
+    """
+    by_day = {}
+    timestamp = fields.index('timestamp')
+    for row in rows:
+        by_day.setdefault(row[timestamp][:10], []).append(row)
+    os.makedirs(archive_dir, exist_ok=True)
+    for day, day_rows in by_day.items():
+        with gzip.open(os.path.join(archive_dir, f'{day}.ndjson.gz'), 'at', encoding='utf-8') as f:
+            f.writelines(ndjson_lines(day_rows, fields))
+    return sorted(by_day)
+
+
+def compact_activities(db, stats, UserActivity, days=RETENTION_DAYS, archive_dir=ARCHIVE_DIR,
+                       batch_size=BATCH_SIZE, now=None):
+    """
+    Archive and delete the activity rows before the retention cutoff
+    Only rows the rollup already counted (id <= watermark) are removed,
+    and the compacted day is recorded before deleting, so a rebuild of
+    the statistics at any point keeps the counts of deleted rows.
+    An interrupted run may archive its last batch twice
+    Returns: (rows archived, first day still kept raw)
+    """
+    # Bring the rollup up to date first
+    while stats.rollup_activities(now):
+        pass
+
+    session = db.session
+    watermark = stats.counters().get(ROLLUP_WATERMARK, 0)
+    cutoff = retention_cutoff(days, now)
+    # Old rows the rollup has not reached (late batches from another
+    # worker) hold back compaction of their day
+    straggler = session.execute(
+        select(func.min(UserActivity.timestamp))
+        .where(UserActivity.id > watermark, UserActivity.timestamp < cutoff)
+    ).scalar()
+    if straggler:
+        cutoff = straggler[:10]
+    cutoff = stats.mark_compacted(cutoff)
+
+    table = UserActivity.__table__
+    fields = [column.name for column in table.columns]
+    archived = 0
+    while True:
+        rows = session.execute(
+            select(table)
+            .where(table.c.timestamp < cutoff, table.c.id <= watermark)
+            .order_by(table.c.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        archive_rows(archive_dir, rows, fields)
+        session.execute(table.delete().where(table.c.id.in_([row.id for row in rows])))
+        session.commit()
+        archived += len(rows)
+    return archived, cutoff
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Archive and compact old user activity rows')
+    parser.add_argument('--days', type=int, default=RETENTION_DAYS,
+                        help=f'days of raw activity to keep (default {RETENTION_DAYS})')
+    parser.add_argument('--archive-dir', default=ARCHIVE_DIR,
+                        help=f'directory for the gzipped NDJSON archives (default {ARCHIVE_DIR})')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                        help=f'rows deleted per transaction (default {BATCH_SIZE})')
+    args = parser.parse_args()
+
+    from server import app, db, dashboard_stats, UserActivity, activity_writer
+
+    with app.app_context():
+        activity_writer.flush()
+        archived, cutoff = compact_activities(db, dashboard_stats, UserActivity, args.days,
+                                              args.archive_dir, args.batch_size)
+    print(f"✅ Archived {archived} activity rows before {cutoff} to {args.archive_dir}")
@@ -0,0 +1,420 @@
+"""
+ASGI serving mode
+The read-heavy API endpoints - GET /tasks, /suggest, /admin/stats,
+/admin/all-tasks and /admin/activities - run natively on the event loop
+with an async database driver (aiosqlite or asyncpg) and async sessions
+over the same models, queries and serializers as server.py. Scoring and
+daily plans (priority_algorithm) run in a small thread pool so they
+never block the loop. Every other request - and any native request that
+is not the plain authenticated case, e.g. a bad filter, a missing login
+or a CORS preflight - is handed to the Flask app on a WSGI thread pool,
+so both paths answer exactly alike
+
+Run: uvicorn asgi:app --host 0.0.0.0 --port 8000 --workers 2
+     ASGI_THREADS (Flask threads, default 16), ASGI_CPU_THREADS (scoring threads, default 2),
+     ASGI_DB_POOL_SIZE (async connections per worker, default 10)
+"""
+
+import asyncio
+import hashlib
+import io
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from urllib.parse import parse_qsl
+
+from sqlalchemy import func, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from werkzeug.datastructures import MultiDict
+from werkzeug.http import parse_accept_header, parse_cookie, parse_etags, quote_etag
+
+import slow_queries
+import server
+from json_response import GZIP_MIN_SIZE, REVALIDATE, cache_value, compress_json, from_cache_value, version_etag
+from server import (ADMIN_STATS_CACHE_TTL, VERSIONED_CACHE_TTL, StatCounter, Task, User,
+                    UserDataVersion, admin_stats_body, admin_tasks_query, pending_tasks_query,
+                    recent_activity_query, response_cache, serialize_activity, serialize_admin_task,
+                    split_page, suggestion_body, task_list_body, task_list_key, task_list_query,
+                    task_rankings, task_state_columns)
+
+# Async drivers for the app's database URL schemes
+ASYNC_DRIVERS = {'sqlite': 'sqlite+aiosqlite', 'postgresql': 'postgresql+asyncpg'}
+
+# 'METHOD /rule' of the native request being served, for the slow query log
+current_endpoint = ContextVar('current_endpoint', default=None)
+
+
+def async_database_url(url):
+    """The app's SQLAlchemy URL with its async driver"""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver for {backend}")
+    url = url.set(drivername=ASYNC_DRIVERS[backend])
+    if backend == 'postgresql' and 'sslmode' in url.query:
+        # asyncpg spells libpq's sslmode as ssl
+        url = url.update_query_dict({'ssl': url.query['sslmode']}).difference_update_query(['sslmode'])
+    return url
+
+
+engine = create_async_engine(
+    async_database_url(server.app.config['SQLALCHEMY_DATABASE_URI']),
+    pool_pre_ping=True,
+    pool_recycle=300,
+    pool_size=int(os.environ.get('ASGI_DB_POOL_SIZE', 10)),
+    max_overflow=20
+)
+Session = async_sessionmaker(engine, expire_on_commit=False)
+
+# Native statements go to the same slow query log, labelled with their route
+server.slow_query_log.install(engine.sync_engine)
+server.slow_query_log.context = lambda: current_endpoint.get() or slow_queries.flask_endpoint()
+
+# Scoring is pure Python: off the loop, though still bound by the GIL
+cpu_executor = ThreadPoolExecutor(int(os.environ.get('ASGI_CPU_THREADS', 2)), thread_name_prefix='scoring')
+
+
+class Request:
+    """The parts of an ASGI HTTP scope the native handlers read"""
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.method = scope['method']
+        self.path = scope['path']
+        self.query_string = scope['query_string'].decode('latin-1')
+        self.args = MultiDict(parse_qsl(self.query_string, keep_blank_values=True))
+        headers = {}
+        for name, value in scope['headers']:
+            name = name.decode('latin-1')
+            value = value.decode('latin-1')
+            headers[name] = f'{headers[name]}, {value}' if name in headers else value
+        self.headers = headers
+
+    def user_id(self):
+        """Logged-in user id from the Flask session cookie, or None"""
+        app = server.app
+        cookie = parse_cookie(self.headers.get('cookie', '')).get(app.config['SESSION_COOKIE_NAME'])
+        if not cookie:
+            return None
+        serializer = app.session_interface.get_signing_serializer(app)
+        try:
+            session = serializer.loads(cookie, max_age=int(app.permanent_session_lifetime.total_seconds()))
+        except Exception:
+            return None
+        user_id = session.get('_user_id')
+        return int(user_id) if user_id is not None and str(user_id).isdigit() else None
+
+    def has_etag(self, etag):
+        return parse_etags(self.headers.get('if-none-match')).contains_weak(etag)
+
+    def accepts_gzip(self):
+        return parse_accept_header(self.headers.get('accept-encoding'))['gzip'] > 0
+
+
+class Fallback(Exception):
+    """The request is not the native case: serve it with Flask"""
+
+
+class JSONResponse:
+    """
+    A JSON body with the headers server.py's after_request hooks would add:
+    a version ETag (or one hashed from the body, with 304), gzip and Vary
+    """
+
+    def __init__(self, body, etag=None, status=200, gzipped=None):
+        self.body = body
+        self.etag = etag
+        self.status = status
+        self.gzipped = gzipped  # Stored gzip bytes of body, if any
+
+    def headers_for(self, request):
+        body = self.body
+        etag = self.etag or hashlib.sha1(body).hexdigest()[:20]
+        headers = [('etag', quote_etag(etag, weak=True)), ('cache-control', REVALIDATE)]
+        # flask-cors varies on Origin and flask-login reads the session (Cookie)
+        vary = ['Origin', 'Cookie']
+        if self.status == 304 or (self.etag is None and request.has_etag(etag)):
+            return 304, headers + [('vary', ', '.join(vary))], b''
+        headers.append(('content-type', 'application/json'))
+        if len(body) >= GZIP_MIN_SIZE:
+            vary.insert(0, 'Accept-Encoding')
+            if request.accepts_gzip():
+                body = self.gzipped or compress_json(body)
+                headers.append(('content-encoding', 'gzip'))
+        headers.append(('vary', ', '.join(vary)))
+        return 200, headers, body
+
+    async def send(self, request, send):
+        status, headers, body = self.headers_for(request)
+        headers.append(('content-length', str(len(body))))
+        await send({'type': 'http.response.start', 'status': status,
+                    'headers': [(k.encode('latin-1'), v.encode('latin-1')) for k, v in headers]})
+        await send({'type': 'http.response.body', 'body': body})
+
+
+def json_body(obj):
+    """The exact body jsonify(obj) sends"""
+    return server.app.json.response(obj).get_data()
+
+
+async def in_thread(executor, fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+
+
+async def cache_get(key):
+    # Shared backends do blocking I/O
+    if response_cache.shared:
+        return await in_thread(None, response_cache.get, key)
+    return response_cache.get(key)
+
+
+async def cache_set(key, body, ttl):
+    if response_cache.shared:
+        await in_thread(None, response_cache.set, key, body, ttl)
+    else:
+        response_cache.set(key, body, ttl)
+
+
+async def cached_body(key, ttl, build):
+    """
+    (body, gzipped body or None) cached under key, or build()'s body
+    stored under it (see server.cached_json); concurrent misses may each build it
+    """
+    value = await cache_get(key)
+    if value is None:
+        value = cache_value(await build())
+        await cache_set(key, value, ttl)
+    return from_cache_value(value)
+
+
+async def load_user(session, user_id):
+    """(id, is_admin, data version) of a user in one query, or None"""
+    return (await session.execute(
+        select(User.id, User.is_admin, func.coalesce(UserDataVersion.version, 0).label('version'))
+        .outerjoin(UserDataVersion, UserDataVersion.user_id == User.id)
+        .where(User.id == user_id)
+    )).first()
+
+
+async def versioned_body(request, session, kind, user_id, version, bucket, build):
+    """Async server.versioned_response"""
+    etag = version_etag(kind, user_id, version, bucket)
+    if request.has_etag(etag):
+        return JSONResponse(b'', etag, status=304)
+    body, gzipped = await cached_body(f'{kind}:{user_id}:{version}:{bucket}', VERSIONED_CACHE_TTL, build)
+    return JSONResponse(body, etag, gzipped=gzipped)
+
+
+async def get_tasks(request, session, user):
+    version = user.version
+    try:
+        key = task_list_key(request.args)
+    except (TypeError, ValueError):
+        raise Fallback()  # Flask answers the 400
+
+    async def build():
+        try:
+            query, limit = task_list_query(user.id, request.args)
+        except (TypeError, ValueError):
+            raise Fallback()  # Flask answers the 400
+        tasks, next_cursor = split_page((await session.execute(query)).scalars().all(), limit)
+        counts = None
+        if not request.args.get('cursor'):
+            counts = (await session.execute(select(*task_state_columns()).where(
+                Task.user_id == user.id, Task.is_deleted.is_(False)
+            ))).one()
+        return json_body(task_list_body(tasks, next_cursor, counts))
+
+    return await versioned_body(request, session, 'tasks', user.id, version, key, build)
+
+
+async def get_suggestion(request, session, user):
+    from priority_algorithm import local_now
+
+    now = local_now()
+    version = user.version
+    ranking = task_rankings.cached(user.id, version)
+    if ranking is None:
+        tasks = (await session.execute(pending_tasks_query(user.id))).scalars().all()
+        ranking = await in_thread(cpu_executor, task_rankings.put, user.id, tasks, now, version)
+    bucket = await in_thread(cpu_executor, lambda: ranking.valid_until(now).isoformat())
+
+    async def build():
+        return await in_thread(cpu_executor, lambda: json_body(suggestion_body(ranking, now)))
+
+    return await versioned_body(request, session, 'suggest', user.id, version, bucket, build)
+
+
+async def admin_stats(request, session, user):
+    async def build():
+        counters = dict((await session.execute(select(StatCounter.name, StatCounter.value))).all())
+        return json_body(admin_stats_body(counters))
+
+    body, gzipped = await cached_body('admin:stats', ADMIN_STATS_CACHE_TTL, build)
+    return JSONResponse(body, gzipped=gzipped)
+
+
+async def admin_all_tasks(request, session, user):
+    try:
+        query, limit = admin_tasks_query(request.args)
+    except (TypeError, ValueError):
+        raise Fallback()
+    tasks, next_cursor = split_page((await session.execute(query)).all(), limit, task_of=lambda row: row[0])
+    return JSONResponse(json_body({
+        'tasks': [serialize_admin_task(t, email) for t, email in tasks],
+        'next_cursor': next_cursor
+    }))
+
+
+async def admin_activities(request, session, user):
+    try:
+        limit = int(request.args.get('limit', 100))
+    except ValueError:
+        limit = 100  # As request.args.get(..., type=int)
+    activities = (await session.execute(recent_activity_query(limit))).all()
+    activity_list = [serialize_activity(a, email) for a, email in activities]
+    return JSONResponse(json_body({
+        'total': len(activity_list),
+        'activities': activity_list
+    }))
+
+
+# Native routes: path -> (handler, admin only)
+ROUTES = {
+    '/tasks': (get_tasks, False),
+    '/suggest': (get_suggestion, False),
+    '/admin/stats': (admin_stats, True),
+    '/admin/all-tasks': (admin_all_tasks, True),
+    '/admin/activities': (admin_activities, True),
+}
+
+
+async def serve_native(scope, send, route):
+    """Serve a native route; returns False when Flask has to serve it"""
+    handler, admin_only = route
+    request = Request(scope)
+    # CORS headers come from flask-cors
+    if 'origin' in request.headers:
+        return False
+    user_id = request.user_id()
+    if user_id is None:
+        return False
+    token = current_endpoint.set(f'GET {request.path}')
+    try:
+        async with Session() as session:
+            user = await load_user(session, user_id)
+            if user is None or (admin_only and not user.is_admin):
+                return False
+            try:
+                response = await handler(request, session, user)
+            except Fallback:
+                return False
+    finally:
+        current_endpoint.reset(token)
+    await response.send(request, send)
+    return True
+
+
+def wsgi_environ(scope, body):
+    """WSGI environ of an ASGI HTTP request"""
+    server_name, server_port = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope['query_string'].decode('latin-1'),
+        'SERVER_NAME': server_name,
+        'SERVER_PORT': str(server_port),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': scope['client'][0] if scope.get('client') else '',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope['headers']:
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            name = f'HTTP_{name}'
+        environ[name] = f'{environ[name]},{value}' if name in environ else value
+    return environ
+
+
+class WSGIBridge:
+    """
+    Runs a WSGI app on a thread pool: one request per thread, like a
+    threaded WSGI server, with the response streamed back to the loop
+    chunk by chunk (so streaming exports stay streamed)
+    """
+
+    def __init__(self, wsgi_app, threads):
+        self.wsgi_app = wsgi_app
+        self.executor = ThreadPoolExecutor(threads, thread_name_prefix='wsgi')
+
+    async def __call__(self, scope, receive, send):
+        body = bytearray()
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return
+            body += message.get('body', b'')
+            if not message.get('more_body'):
+                break
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.executor, self.run, scope, bytes(body), send, loop)
+
+    def run(self, scope, body, send, loop):
+        response = {}
+
+        def emit(message):
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        def start_response(status, headers, exc_info=None):
+            if exc_info and response.get('started'):
+                raise exc_info[1].with_traceback(exc_info[2])
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in headers]
+
+        def start():
+            if not response.get('started'):
+                response['started'] = True
+                emit({'type': 'http.response.start', 'status': response['status'], 'headers': response['headers']})
+
+        result = self.wsgi_app(wsgi_environ(scope, body), start_response)
+        try:
+            for chunk in result:
+                if chunk:
+                    start()
+                    emit({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            start()
+            emit({'type': 'http.response.body', 'body': b''})
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+
+
+flask_app = WSGIBridge(server.app, int(os.environ.get('ASGI_THREADS', 16)))
+
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await engine.dispose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+    if scope['type'] != 'http':
+        return
+    route = ROUTES.get(scope['path']) if scope['method'] == 'GET' else None
+    if route is not None and await serve_native(scope, send, route):
+        return
+    await flask_app(scope, receive, send)
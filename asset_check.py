@@ -0,0 +1,48 @@
+"""
+Access check for the static routes
+Requests every built file under /assets/ without logging in: only the
+content-hashed assets may be served there, pages (admin.html among them)
+and unhashed names must be 404, and /admin.html must still redirect to
+the login page
+
+Usage: python asset_check.py
+"""
+
+import os
+import sys
+import tempfile
+
+from static_assets import ASSETS, PAGES
+
+
+def check_assets():
+    """Returns True if /assets/ serves the hashed assets and nothing else"""
+    import server
+
+    client = server.app.test_client()
+    hashed = [name for name, static_file in server.static_assets.files.items() if static_file.immutable]
+    expected = {f'/assets/{name}': 200 for name in hashed}
+    expected.update({f'/assets/{name}': 404 for name in ASSETS + PAGES})
+    expected['/assets/../admin.html'] = 404
+    expected['/admin.html'] = 302
+
+    print("\nChecking anonymous static routes...")
+    ok = True
+    for url, status in expected.items():
+        response = client.get(url)
+        line = f"GET {url}: {response.status_code} (expected {status})"
+        response.close()
+        if response.status_code != status:
+            ok = False
+            print(f"❌ {line}")
+        else:
+            print(f"✓ {line}")
+
+    if ok:
+        print("✅ /assets/ only serves content-hashed assets")
+    return ok
+
+
+if __name__ == '__main__':
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'asset_check.db')
+    sys.exit(0 if check_assets() else 1)
@@ -0,0 +1,60 @@
+"""
+Stored benchmark baselines
+Results are {benchmark: {metric: value}}. A run is compared metric by
+metric with a baseline file and a metric more than `tolerance` worse
+than its baseline is a regression. Baselines depend on the machine:
+record them where they are compared (--save-baseline)
+"""
+
+import json
+import os
+
+# Metrics where a larger value is better; every other metric is a cost
+HIGHER_IS_BETTER = ('rps', 'ops_per_s')
+
+DEFAULT_TOLERANCE = 0.25
+
+
+def save(path, results, info=None):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump({'info': info or {}, 'results': results}, f, indent=2, sort_keys=True)
+        f.write('\n')
+    print(f"✅ Baseline saved to {path}")
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)['results']
+
+
+def change(metric, old, new):
+    """Relative change of a metric, positive when it got worse"""
+    if not old:
+        return 0.0
+    delta = (new - old) / old
+    return -delta if metric in HIGHER_IS_BETTER else delta
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE, metrics=None):
+    """
+    Print every metric next to its baseline
+    metrics: only compare these (default all)
+    Returns: list of (benchmark, metric, old, new) regressions
+    """
+    regressions = []
+    print(f"\nCompared with baseline (tolerance {tolerance:.0%}):")
+    for name in sorted(set(results) & set(baseline)):
+        for metric, new in sorted(results[name].items()):
+            old = baseline[name].get(metric)
+            if old is None or new is None or (metrics is not None and metric not in metrics):
+                continue
+            worse = change(metric, old, new)
+            if worse > tolerance:
+                regressions.append((name, metric, old, new))
+            direction = f"{worse:.0%} worse" if worse > 0 else f"{-worse:.0%} better"
+            print(f"{'❌' if worse > tolerance else '✓'} {name:<28} {metric:<8} "
+                  f"{old:>10.2f} -> {new:>10.2f} ({direction})")
+    for name in sorted(set(baseline) - set(results)):
+        print(f"⚠️ {name} is in the baseline but was not run")
+    return regressions
@@ -0,0 +1,53 @@
+"""
+Benchmark: write endpoint latency with synchronous vs buffered activity logging
+Times PUT /task/<id>/complete (one task commit plus one activity record)
+against a temporary SQLite file database
+
+Run: python benchmarks/bench_activity_log.py
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+
+import server
+
+
+class SyncWriter:
+    """The previous behaviour: one INSERT + commit per activity"""
+
+    def enqueue(self, record):
+        server.write_activities([record])
+        return True
+
+
+def toggle_latency(client, task_id, n=500):
+    start = time.perf_counter()
+    for _ in range(n):
+        client.put(f'/task/{task_id}/complete')
+    return (time.perf_counter() - start) / n
+
+
+if __name__ == '__main__':
+    client = server.app.test_client()
+    client.post('/register', json={'email': 'bench@example.com', 'password': 'bench'})
+    client.post('/login', json={'email': 'bench@example.com', 'password': 'bench'})
+    task_id = client.post('/add-task', json={'text': 'benchmark task'}).get_json()['task']['id']
+
+    buffered = server.activity_writer
+    server.activity_writer = SyncWriter()
+    sync = toggle_latency(client, task_id)
+    server.activity_writer = buffered
+    start = time.perf_counter()
+    async_ = toggle_latency(client, task_id)
+    buffered.close()
+    total = time.perf_counter() - start
+
+    print(f"{'synchronous commit':<22} {sync * 1000:>8.3f}ms per request")
+    print(f"{'buffered writer':<22} {async_ * 1000:>8.3f}ms per request ({sync / async_:.2f}x)")
+    print(f"{'buffered incl. flush':<22} {total / 500 * 1000:>8.3f}ms per request")
+    print(f"written={buffered.written} dropped={buffered.dropped}")
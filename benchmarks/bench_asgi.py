@@ -0,0 +1,214 @@
+"""
+Concurrent-connection capacity: sync (gunicorn) vs ASGI (uvicorn asgi:app)
+Fills a scratch database with generate_data.py, starts both deployments
+on it with the same number of worker processes and, at each concurrency
+level, runs that many keep-alive clients looping over GET /tasks and
+GET /suggest. Reports throughput, p50/p99 latency and failed requests
+per deployment and level, and can compare them with a stored baseline
+
+Run: python benchmarks/bench_asgi.py [--workers 2] [--levels 8,32,128] [--duration 10]
+                                     [--threads 1] [--baseline [FILE]] [--save-baseline [FILE]]
+
+The default database is a scratch SQLite file. For PostgreSQL pass
+--database-url postgresql://localhost/taskbuddy_bench: its tables are dropped
+and recreated first, so never point it at a database you want to keep
+"""
+
+import argparse
+import http.client
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import baseline
+from load_test import Recorder, Session, percentile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Requests of a client: (label, path, weight)
+CLIENT_MIX = (
+    ('GET /tasks', '/tasks?limit=100', 60),
+    ('GET /suggest', '/suggest', 40),
+)
+
+# Status recorded for a request the server never answered
+FAILED = 599
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def commands(port, workers, threads):
+    """{deployment: command} for the sync and the ASGI deployment"""
+    return {
+        'sync': [sys.executable, '-m', 'gunicorn', 'server:app', '--bind', f'127.0.0.1:{port}',
+                 '--workers', str(workers), '--threads', str(threads), '--log-level', 'warning'],
+        'asgi': [sys.executable, '-m', 'uvicorn', 'asgi:app', '--host', '127.0.0.1', '--port', str(port),
+                 '--workers', str(workers), '--log-level', 'warning', '--no-access-log'],
+    }
+
+
+def start(command, port, database_url, timeout=60, env=None):
+    """Start a server process (with env added to this one's) and wait until it answers"""
+    process = subprocess.Popen(command, cwd=ROOT, env=dict(os.environ, DATABASE_URL=database_url, **(env or {})),
+                               stdout=subprocess.DEVNULL)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{command[2]} exited with {process.returncode}")
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+            connection.request('GET', '/check-auth')
+            if connection.getresponse().status == 200:
+                return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"{command[2]} did not answer within {timeout}s")
+
+
+def stop(process):
+    process.terminate()
+    try:
+        process.wait(10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def log_in(base_url, emails):
+    """Session cookies of the users, logged in once each"""
+    cookies = {}
+    for email in emails:
+        session = Session(base_url, email)
+        session.login()
+        cookies[email] = session.cookies
+    return cookies
+
+
+def run_client(base_url, email, cookies, recorder, stop_event, seed):
+    rng = random.Random(seed)
+    labels, paths, weights = zip(*CLIENT_MIX)
+    session = Session(base_url, email)
+    session.cookies = cookies
+    while not stop_event.is_set():
+        i = rng.choices(range(len(labels)), weights)[0]
+        try:
+            recorder.timed(labels[i], session, 'GET', paths[i])
+        except (http.client.HTTPException, OSError):
+            # Refused or timed out: the server is past its capacity
+            session.connection.close()
+            recorder.record(labels[i], session.connection.timeout, FAILED)
+
+
+def run_level(base_url, emails, cookies, clients, duration, warmup):
+    """Run `clients` clients for warmup + duration seconds; returns the totals of the measured part"""
+    stop_event = threading.Event()
+    recorder = Recorder()
+    threads = [threading.Thread(target=run_client, daemon=True, args=(
+        base_url, emails[i % len(emails)], cookies[emails[i % len(emails)]], recorder, stop_event, i
+    )) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    time.sleep(warmup)
+    recorder.reset()
+    started = time.perf_counter()
+    time.sleep(duration)
+    stop_event.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    samples = [s for label_samples in recorder.samples.values() for s in label_samples]
+    latencies = sorted(s[0] * 1000 for s in samples)
+    return {
+        'requests': len(samples),
+        'errors': sum(1 for s in samples if s[1] >= 400),
+        'rps': round(len(samples) / elapsed, 2),
+        'p50_ms': round(percentile(latencies, 50), 2) if latencies else None,
+        'p99_ms': round(percentile(latencies, 99), 2) if latencies else None,
+    }
+
+
+def report(results, levels):
+    print(f"\n{'clients':>7} {'deployment':<10} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for clients in levels:
+        for deployment in ('sync', 'asgi'):
+            r = results.get(f'{deployment}@{clients}')
+            if r is None:
+                continue
+            p50 = f"{r['p50_ms']:.1f}" if r['p50_ms'] is not None else '-'
+            p99 = f"{r['p99_ms']:.1f}" if r['p99_ms'] is not None else '-'
+            print(f"{clients:>7} {deployment:<10} {r['rps']:>9.1f} {p50:>9} {p99:>9} {r['errors']:>7}")
+        sync, asgi = results.get(f'sync@{clients}'), results.get(f'asgi@{clients}')
+        if sync and asgi and sync['rps']:
+            print(f"{'':>7} {'asgi/sync':<10} {asgi['rps'] / sync['rps']:>8.2f}x")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Concurrent-connection capacity of the sync and ASGI deployments')
+    parser.add_argument('--database-url', help='database for both servers (default: scratch SQLite)')
+    parser.add_argument('--users', type=int, default=50, help='generated users')
+    parser.add_argument('--tasks', type=int, default=40, help='generated tasks per user')
+    parser.add_argument('--workers', type=int, default=2, help='worker processes of each deployment')
+    parser.add_argument('--threads', type=int, default=1, help='threads per gunicorn worker (1 = sync workers)')
+    parser.add_argument('--levels', default='8,32,128', help='comma-separated concurrent clients')
+    parser.add_argument('--deployments', default='sync,asgi', help='which deployments to run')
+    parser.add_argument('--duration', type=float, default=10, help='measured seconds per level')
+    parser.add_argument('--warmup', type=float, default=2, help='unmeasured seconds first')
+    parser.add_argument('--baseline', nargs='?', const='', help='compare with a stored baseline')
+    parser.add_argument('--save-baseline', nargs='?', const='', help='store this run as the baseline')
+    parser.add_argument('--tolerance', type=float, default=baseline.DEFAULT_TOLERANCE)
+    args = parser.parse_args()
+
+    levels = [int(level) for level in args.levels.split(',')]
+    database_url = args.database_url or 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench_asgi.db')
+    os.environ['DATABASE_URL'] = database_url
+    import server
+    from generate_data import generate, reset
+
+    with server.app.app_context():
+        database = server.db.engine.dialect.name
+    if args.database_url:
+        reset(server)
+    print(f"Generating {args.users} users x {args.tasks} tasks ({database})...")
+    emails = generate(server, args.users, args.tasks)
+
+    results = {}
+    for deployment in args.deployments.split(','):
+        port = free_port()
+        process = start(commands(port, args.workers, args.threads)[deployment], port, database_url)
+        try:
+            base_url = f'http://127.0.0.1:{port}'
+            cookies = log_in(base_url, emails)
+            for clients in levels:
+                print(f"{deployment}: {clients} clients for {args.warmup:.0f}s + {args.duration:.0f}s...")
+                results[f'{deployment}@{clients}'] = run_level(base_url, emails, cookies, clients,
+                                                               args.duration, args.warmup)
+        finally:
+            stop(process)
+    report(results, levels)
+
+    baseline_path = os.path.join(BENCH_DIR, 'baselines', f'asgi-{database}.json')
+    if args.save_baseline is not None:
+        baseline.save(args.save_baseline or baseline_path, results, {
+            'database': database, 'workers': args.workers, 'threads': args.threads,
+            'duration': args.duration, 'users': args.users, 'tasks': args.tasks,
+        })
+    if args.baseline is not None:
+        regressions = baseline.compare(results, baseline.load(args.baseline or baseline_path),
+                                       args.tolerance, metrics=('p99_ms', 'rps'))
+        if regressions:
+            print(f"❌ {len(regressions)} metric(s) worse than the baseline")
+            sys.exit(1)
+        print("✅ No regressions")
@@ -0,0 +1,47 @@
+"""
+Benchmark: cache backend operation latency
+Times set, hit and miss for 2 KB values on the memory, SQLite and
+Redis (fake_redis.py, or --redis-url) backends and prints their metrics
+
+Run: python benchmarks/bench_cache.py [operations] [--redis-url URL]   (default 5000)
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cache_backend import MemoryCache, SQLiteCache, cache_from_url
+from fake_redis import FakeRedisServer
+
+VALUE = os.urandom(2048)
+
+
+def timed(n, op):
+    start = time.perf_counter()
+    for i in range(n):
+        op(i)
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def bench(label, cache, n):
+    cache.clear()
+    set_us = timed(n, lambda i: cache.set(f'key{i}', VALUE))
+    hit_us = timed(n, lambda i: cache.get(f'key{i}'))
+    miss_us = timed(n, lambda i: cache.get(f'missing{i}'))
+    print(f"{label:<20} set {set_us:>7.1f} µs   hit {hit_us:>7.1f} µs   miss {miss_us:>7.1f} µs")
+    print(f"{'':<20} {cache.metrics.snapshot()}")
+
+
+if __name__ == '__main__':
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    n = int(args[0]) if args else 5000
+    bench('memory', MemoryCache(max_entries=n * 2), n)
+    bench('sqlite', SQLiteCache(os.path.join(tempfile.mkdtemp(), 'cache.db'), max_entries=n * 2), n)
+    if '--redis-url' in sys.argv:
+        bench('redis', cache_from_url(sys.argv[sys.argv.index('--redis-url') + 1]), n)
+    else:
+        with FakeRedisServer() as server:
+            bench('redis (fake server)', cache_from_url(server.url), n)
@@ -0,0 +1,82 @@
+"""
+Micro-benchmarks: calculate_master_priority, create_daily_plan and
+analyze_keywords on generated tasks (see generate_data.py)
+Reports the median and best time per call over several rounds and can
+compare them with a stored baseline
+
+Run: python benchmarks/bench_core.py [--rounds N] [--baseline FILE] [--save-baseline FILE]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from keyword_matcher import KeywordMatcher
+from priority_algorithm import (KEYWORD_CATEGORIES, analyze_keywords, calculate_master_priority,
+                                create_daily_plan, local_now)
+from generate_data import make_tasks
+import baseline
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines', 'core.json')
+
+
+def per_call(fn, inputs, rounds):
+    """(median, best) microseconds per call of fn over inputs"""
+    fn(inputs[0])  # Warm up caches and lazy imports
+    times = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for item in inputs:
+            fn(item)
+        times.append((time.perf_counter() - start) / len(inputs) * 1e6)
+    return statistics.median(times), min(times)
+
+
+def benchmarks(now):
+    """{name: (fn, inputs)}; inputs are sized so a round takes a few milliseconds"""
+    tasks = make_tasks(2000, now=now)
+    user_lists = [make_tasks(50, seed=s, now=now) for s in range(20)]
+    heavy_lists = [make_tasks(1000, seed=s, now=now) for s in range(2)]
+    texts = [t.text for t in tasks]
+    uncached = KeywordMatcher(KEYWORD_CATEGORIES['en'], cache_size=0)
+    return {
+        'calculate_master_priority': (lambda t: calculate_master_priority(t, now), tasks),
+        'create_daily_plan[50]': (lambda ts: create_daily_plan(ts, max_tasks=10), user_lists),
+        'create_daily_plan[1000]': (lambda ts: create_daily_plan(ts, max_tasks=10), heavy_lists),
+        # Task texts repeat across requests, so most calls hit the matcher's memo
+        'analyze_keywords': (analyze_keywords, texts),
+        # The same matching without the memo (texts never seen before)
+        'analyze_keywords[uncached]': (uncached.match, texts),
+    }
+
+
+def run(rounds):
+    results = {}
+    for name, (fn, inputs) in benchmarks(local_now()).items():
+        median, best = per_call(fn, inputs, rounds)
+        results[name] = {'us_per_op': round(median, 3), 'best_us': round(best, 3)}
+        print(f"{name:<28} {median:>10.2f} µs/call (best {best:.2f})")
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Micro-benchmarks of the prioritization code')
+    parser.add_argument('--rounds', type=int, default=15)
+    parser.add_argument('--baseline', nargs='?', const=DEFAULT_BASELINE, help='compare with a stored baseline')
+    parser.add_argument('--save-baseline', nargs='?', const=DEFAULT_BASELINE, help='store this run as the baseline')
+    parser.add_argument('--tolerance', type=float, default=baseline.DEFAULT_TOLERANCE)
+    args = parser.parse_args()
+
+    results = run(args.rounds)
+    if args.save_baseline:
+        baseline.save(args.save_baseline, results, {'rounds': args.rounds, 'python': sys.version.split()[0]})
+    if args.baseline:
+        regressions = baseline.compare(results, baseline.load(args.baseline), args.tolerance, metrics=('us_per_op',))
+        if regressions:
+            print(f"❌ {len(regressions)} benchmark(s) slower than the baseline")
+            sys.exit(1)
+        print("✅ No regressions")
@@ -0,0 +1,68 @@
+"""
+Benchmark: memory and throughput of the streaming admin task export
+Seeds a temporary SQLite database, streams /admin/export/tasks in each
+format and reports the growth of the process's peak RSS, then does the
+same for a fully materialized JSON list (the old /admin/all-tasks)
+
+Run: python benchmarks/bench_export.py [rows]   (default 200000)
+"""
+
+import os
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+
+import server
+from query_counts import seed
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def stream(client, url):
+    response = client.get(url, buffered=False)
+    size = sum(len(chunk) for chunk in response.response)
+    response.close()
+    return size
+
+
+if __name__ == '__main__':
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    users = max(1, rows // 1000)
+    seed(server, users=users, tasks_per_user=rows // users, activities_per_user=0)
+
+    client = server.app.test_client()
+    client.post('/login', json={'email': 'kalanadenuz@gmail.com', 'password': '12345678'})
+    stream(client, '/admin/export/tasks?limit=1')  # Warm up imports and caches
+
+    print(f"{rows} tasks, baseline peak RSS {peak_rss_mb():.0f} MB")
+    for label, url in [('ndjson', '/admin/export/tasks'),
+                       ('csv', '/admin/export/tasks?format=csv'),
+                       ('ndjson + gzip', '/admin/export/tasks?gzip=1')]:
+        before = peak_rss_mb()
+        start = time.perf_counter()
+        size = stream(client, url)
+        elapsed = time.perf_counter() - start
+        print(f"{label:<16} {size / 1e6:>8.1f} MB in {elapsed:>6.2f}s "
+              f"({rows / elapsed / 1000:>5.0f}k rows/s), peak RSS +{peak_rss_mb() - before:.0f} MB")
+
+    # The previous approach: load every task as an ORM object, then one JSON body
+    before = peak_rss_mb()
+    start = time.perf_counter()
+    with server.app.test_request_context():
+        tasks = server.db.session.query(server.Task, server.User.email).join(server.Task.owner).all()
+        body = server.jsonify({'tasks': [{
+            'id': t.id, 'text': t.text, 'user_email': email, 'user_id': t.user_id,
+            'completed': t.completed, 'is_deleted': t.is_deleted, 'priority': t.priority,
+            'category': t.category, 'created_at': server.isoformat(t.created_at),
+            'completed_at': server.isoformat(t.completed_at), 'deleted_at': server.isoformat(t.deleted_at),
+            'estimated_time': t.estimated_time, 'importance': t.importance
+        } for t, email in tasks]}).get_data()
+    elapsed = time.perf_counter() - start
+    print(f"{'materialized':<16} {len(body) / 1e6:>8.1f} MB in {elapsed:>6.2f}s "
+          f"({rows / elapsed / 1000:>5.0f}k rows/s), peak RSS +{peak_rss_mb() - before:.0f} MB")
@@ -0,0 +1,65 @@
+"""
+Benchmark: compiled KeywordMatcher vs the legacy per-keyword `in` loop
+
+Run: python benchmarks/bench_keywords.py [num_texts]
+"""
+
+import os
+import sys
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from keyword_check import legacy_analyze_keywords
+from keyword_matcher import KeywordMatcher
+from priority_algorithm import KEYWORD_CATEGORIES, analyze_keywords
+from bench_suggest import bench
+
+WORDS = [
+    'finish', 'report', 'mom', 'buy', 'groceries', 'review', 'code', 'fix', 'bug', 'know',
+    'keyboard', 'snow', 'notes', 'email', 'client', 'plan', 'trip', 'gym', 'tax', 'return',
+    'book', 'dentist', 'update', 'resume', 'clean', 'garage', 'read', 'chapter', 'the', 'for',
+    'calling', 'known', 'mustard', 'todays', 'recall', 'keynote', 'snowboard', 'nowhere',
+]
+KEYWORDS = [
+    'urgent', 'asap', 'now', 'important', 'key', 'must', 'deadline', 'today', 'meeting',
+    'call', 'appointment', 'maybe', 'someday', 'consider',
+]
+KEYWORD_RATE = 0.05  # share of words that are real keywords
+
+
+def make_corpus(n, seed=42):
+    rng = random.Random(seed)
+    def word():
+        return rng.choice(KEYWORDS) if rng.random() < KEYWORD_RATE else rng.choice(WORDS)
+    return [' '.join(word() for _ in range(rng.randint(2, 12))).capitalize() for _ in range(n)]
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    corpus = make_corpus(n)
+
+    # Substring mode (the default) must reproduce the legacy results exactly
+    substring = KeywordMatcher(KEYWORD_CATEGORIES['en'], cache_size=0)
+    assert [substring.match(t) for t in corpus] == [legacy_analyze_keywords(t) for t in corpus]
+    assert [analyze_keywords(t) for t in corpus] == [legacy_analyze_keywords(t) for t in corpus]
+
+    # Cold: every text is new (memoization disabled)
+    cold = KeywordMatcher(KEYWORD_CATEGORIES['en'], word_boundary=True, cache_size=0)
+    changed = sum(cold.match(t) != legacy_analyze_keywords(t) for t in corpus)
+    # Warm: /suggest rescoring the same task texts request after request
+    repeated = make_corpus(2000, seed=7) * (n // 2000)
+    warm = KeywordMatcher(KEYWORD_CATEGORIES['en'])
+
+    legacy = bench(lambda c: [legacy_analyze_keywords(t) for t in c], corpus)
+    compiled = bench(lambda c: [cold.match(t) for t in c], corpus)
+    compiled_sub = bench(lambda c: [substring.match(t) for t in c], corpus)
+    legacy_rep = bench(lambda c: [legacy_analyze_keywords(t) for t in c], repeated)
+    warm_rep = bench(lambda c: [warm.match(t) for t in c], repeated)
+    print(f"Texts: {n}")
+    print(f"Legacy loop:                      {legacy * 1000:.1f} ms")
+    print(f"Compiled, word boundary (cold):   {compiled * 1000:.1f} ms")
+    print(f"Compiled, substring mode (cold):  {compiled_sub * 1000:.1f} ms")
+    print(f"Legacy loop, repeated texts:      {legacy_rep * 1000:.1f} ms")
+    print(f"Compiled, repeated texts (warm):  {warm_rep * 1000:.1f} ms")
+    print(f"Texts whose result would change with word_boundary=True: {changed}")
@@ -0,0 +1,148 @@
+"""
+Login throughput vs task-endpoint latency under a mixed load
+Fills a scratch database with generate_data.py and starts gunicorn
+(threaded workers) on it once per hashing mode. Each run has clients
+looping over POST /login next to clients reading GET /tasks:
+- quiet: readers only, the reference /tasks latency
+- inline: PASSWORD_HASH_WORKERS=0, hashes computed in the request threads
+- pooled: the bounded, lower-priority hashing pool (PASSWORD_HASH_* settings)
+Reports requests/s, p50/p99 latency and errors (503s are shed logins) per
+request type, and can compare them with a stored baseline
+
+Run: python benchmarks/bench_login.py [--logins 16] [--readers 8] [--duration 10]
+                                      [--workers 2] [--threads 8] [--baseline [FILE]] [--save-baseline [FILE]]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import baseline
+from bench_asgi import free_port, log_in, start, stop
+from generate_data import PASSWORD
+from load_test import Recorder, Session
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Seconds a shed login waits before retrying (the server's Retry-After)
+RETRY_AFTER = 1.0
+
+# Extra server environment of each mode
+MODES = {
+    'quiet': {},
+    'inline': {'PASSWORD_HASH_WORKERS': '0', 'PASSWORD_HASH_QUEUE': '1000', 'PASSWORD_HASH_WAIT': '60'},
+    'pooled': {},
+}
+
+
+def run_login_client(base_url, email, recorder, stop_event):
+    session = Session(base_url, email)
+    while not stop_event.is_set():
+        start = time.perf_counter()
+        status, queries = session.request('POST', '/login', {'email': email, 'password': PASSWORD})
+        recorder.record('POST /login', time.perf_counter() - start, status, queries)
+        if status == 503:
+            stop_event.wait(RETRY_AFTER)  # Shed: back off like a browser honoring Retry-After
+
+
+def run_reader(base_url, email, cookies, recorder, stop_event):
+    session = Session(base_url, email)
+    session.cookies = cookies
+    while not stop_event.is_set():
+        recorder.timed('GET /tasks', session, 'GET', '/tasks?limit=100')
+
+
+def run_mixed(base_url, emails, cookies, logins, readers, duration, warmup):
+    """Run the clients for warmup + duration seconds; returns Recorder.results of the measured part"""
+    stop_event = threading.Event()
+    recorder = Recorder()
+    rng = random.Random(42)
+    targets = [(run_login_client, (base_url, rng.choice(emails), recorder, stop_event)) for _ in range(logins)]
+    targets += [(run_reader, (base_url, emails[i % len(emails)], cookies[emails[i % len(emails)]],
+                              recorder, stop_event)) for i in range(readers)]
+    threads = [threading.Thread(target=fn, args=args, daemon=True) for fn, args in targets]
+    for thread in threads:
+        thread.start()
+    time.sleep(warmup)
+    recorder.reset()
+    started = time.perf_counter()
+    time.sleep(duration)
+    stop_event.set()
+    for thread in threads:
+        thread.join()
+    return recorder.results(time.perf_counter() - started)
+
+
+def report(results):
+    print(f"\n{'mode':<8} {'request':<12} {'count':>7} {'errors':>6} {'req/s':>8} {'ok/s':>8} "
+          f"{'p50 ms':>9} {'p99 ms':>9}")
+    for key, r in results.items():
+        mode, label = key.split(' ', 1)
+        ok = r['rps'] * (r['requests'] - r['errors']) / r['requests'] if r['requests'] else 0
+        print(f"{mode:<8} {label:<12} {r['requests']:>7} {r['errors']:>6} {r['rps']:>8.1f} {ok:>8.1f} "
+              f"{r['p50_ms']:>9.1f} {r['p99_ms']:>9.1f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Login throughput vs /tasks latency per password hashing mode')
+    parser.add_argument('--users', type=int, default=20, help='generated users')
+    parser.add_argument('--tasks', type=int, default=40, help='generated tasks per user')
+    parser.add_argument('--logins', type=int, default=16, help='clients logging in back to back')
+    parser.add_argument('--readers', type=int, default=8, help='clients reading /tasks')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn worker processes')
+    parser.add_argument('--threads', type=int, default=8, help='threads per gunicorn worker')
+    parser.add_argument('--modes', default=','.join(MODES), help='which modes to run')
+    parser.add_argument('--duration', type=float, default=10, help='measured seconds per mode')
+    parser.add_argument('--warmup', type=float, default=2, help='unmeasured seconds first')
+    parser.add_argument('--baseline', nargs='?', const='', help='compare with a stored baseline')
+    parser.add_argument('--save-baseline', nargs='?', const='', help='store this run as the baseline')
+    parser.add_argument('--tolerance', type=float, default=baseline.DEFAULT_TOLERANCE)
+    args = parser.parse_args()
+
+    database_url = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench_login.db')
+    os.environ['DATABASE_URL'] = database_url
+    import server
+    from generate_data import generate
+
+    method = server.password_hasher.method
+    print(f"Generating {args.users} users x {args.tasks} tasks (hash {method})...")
+    emails = generate(server, args.users, args.tasks)
+
+    results = {}
+    for mode in args.modes.split(','):
+        port = free_port()
+        command = [sys.executable, '-m', 'gunicorn', 'server:app', '--bind', f'127.0.0.1:{port}',
+                   '--workers', str(args.workers), '--threads', str(args.threads), '--log-level', 'warning']
+        process = start(command, port, database_url, env=MODES[mode])
+        try:
+            base_url = f'http://127.0.0.1:{port}'
+            cookies = log_in(base_url, emails)
+            logins = 0 if mode == 'quiet' else args.logins
+            print(f"{mode}: {logins} login + {args.readers} /tasks clients for "
+                  f"{args.warmup:.0f}s + {args.duration:.0f}s...")
+            for label, r in run_mixed(base_url, emails, cookies, logins, args.readers,
+                                      args.duration, args.warmup).items():
+                results[f'{mode} {label}'] = r
+        finally:
+            stop(process)
+    report(results)
+
+    baseline_path = os.path.join(BENCH_DIR, 'baselines', 'login.json')
+    if args.save_baseline is not None:
+        baseline.save(args.save_baseline or baseline_path, results, {
+            'method': method, 'logins': args.logins, 'readers': args.readers,
+            'workers': args.workers, 'threads': args.threads, 'duration': args.duration,
+        })
+    if args.baseline is not None:
+        regressions = baseline.compare(results, baseline.load(args.baseline or baseline_path),
+                                       args.tolerance, metrics=('p99_ms', 'rps'))
+        if regressions:
+            print(f"❌ {len(regressions)} metric(s) worse than the baseline")
+            sys.exit(1)
+        print("✅ No regressions")
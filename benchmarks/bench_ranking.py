@@ -0,0 +1,56 @@
+"""
+Benchmark: /suggest ranking cost from 100 to 100k pending tasks per user
+Full rank (score + sort every task) vs the incremental TaskRanking,
+plus the cost of one task write against a loaded ranking
+
+Fails if reading the top of a large ranking stops being much cheaper
+than a full rank (i.e. ranked() went back to touching every task)
+
+Run: python benchmarks/bench_ranking.py
+"""
+
+import os
+import sys
+import time
+from itertools import chain, islice
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from priority_algorithm import rank_tasks, create_daily_plan, local_now
+from score_cache import ScoreCache
+from task_ranking import TaskRanking
+from bench_suggest import make_tasks, bench
+
+
+def full_suggest(tasks):
+    scored_tasks = rank_tasks(tasks)
+    create_daily_plan(tasks, max_tasks=10, scored_tasks=scored_tasks)
+    return scored_tasks[:15]
+
+
+def incremental_suggest(ranking):
+    ranked = ranking.ranked()
+    top = list(islice(ranked, 15))
+    create_daily_plan(None, max_tasks=10, scored_tasks=chain(top, ranked))
+    return top
+
+
+if __name__ == '__main__':
+    print(f"{'tasks':>8} {'full rank':>12} {'incremental':>12} {'speedup':>8} {'write':>10}")
+    for n in (100, 1000, 10000, 100000):
+        tasks = make_tasks(n)
+        ranking = TaskRanking(ScoreCache(max_entries=2 * n), tasks, local_now())
+        full = bench(full_suggest, tasks, repeat=3)
+        inc = bench(incremental_suggest, ranking, repeat=3)
+
+        # One add/toggle: re-score and re-position a single task
+        start = time.perf_counter()
+        for task in tasks[:100]:
+            task.importance = task.importance % 5 + 1
+            ranking.score_cache.invalidate(task.id)
+            ranking.upsert(task)
+        write = (time.perf_counter() - start) / 100
+
+        print(f"{n:>8} {full * 1000:>10.2f}ms {inc * 1000:>10.3f}ms {full / inc:>7.0f}x {write * 1e6:>8.1f}us")
+        if n >= 10000:
+            assert full / inc >= 100, f"incremental /suggest is only {full / inc:.0f}x faster at {n} tasks"
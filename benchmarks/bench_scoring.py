@@ -0,0 +1,33 @@
+"""
+Benchmark: scoring every task with calculate_master_priority vs a warm ScoreCache
+(repeated /suggest calls)
+
+Run: python benchmarks/bench_scoring.py [num_tasks]
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from priority_algorithm import calculate_master_priority, local_now
+from score_cache import ScoreCache
+from bench_suggest import make_tasks, bench
+
+
+def score_every_task(tasks, now):
+    return [calculate_master_priority(task, now) for task in tasks]
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    tasks = make_tasks(n)
+    now = local_now()
+    cache = ScoreCache()
+    assert cache.score_tasks(tasks, now) == score_every_task(tasks, now)
+    s = bench(lambda ts: score_every_task(ts, local_now()), tasks)
+    c = bench(lambda ts: cache.score_tasks(ts, local_now()), tasks)
+    print(f"Tasks: {n}")
+    print(f"Every task:  {s * 1000:.1f} ms")
+    print(f"Warm cache:  {c * 1000:.1f} ms")
+    print(f"Speedup (warm cache): {s / c:.2f}x")
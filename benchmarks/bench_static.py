@@ -0,0 +1,53 @@
+"""
+Benchmark: static file serving per request
+Compares the previous send_file route with the in-memory StaticAssets
+responses (full download with gzip, and a 304 revalidation)
+
+Run: python benchmarks/bench_static.py [requests]   (default 2000)
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+
+from flask import send_file
+
+import server
+
+
+@server.app.route('/bench/send-file/script.js')
+def send_file_script():
+    return send_file('script.js', mimetype='application/javascript')
+
+
+def run(client, url, n, headers=None):
+    start = time.perf_counter()
+    size = 0
+    for _ in range(n):
+        response = client.get(url, headers=headers or {})
+        size = len(response.data)
+        response.close()
+    elapsed = time.perf_counter() - start
+    return elapsed / n * 1e6, size, response.status_code
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    client = server.app.test_client()
+    hashed_url = next(url for url in server.static_assets.files if url.startswith('script.') and url != 'script.js')
+    url = '/assets/' + hashed_url
+    etag = client.get(url, headers={'Accept-Encoding': 'gzip'}).headers['ETag']
+
+    for label, target, headers in [
+        ('send_file', '/bench/send-file/script.js', None),
+        ('in memory', url, None),
+        ('in memory + gzip', url, {'Accept-Encoding': 'gzip'}),
+        ('in memory + br', url, {'Accept-Encoding': 'br'}),
+        ('304 revalidation', url, {'Accept-Encoding': 'gzip', 'If-None-Match': etag}),
+    ]:
+        per_request, size, status = run(client, target, n, headers)
+        print(f"{label:<18} {per_request:>8.1f} µs/request  {size:>7} bytes  ({status})")
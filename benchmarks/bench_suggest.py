@@ -0,0 +1,83 @@
+"""
+Benchmark: /suggest scoring cost per request
+Compares the old double-scoring path with the single-pass rank_tasks() path
+
+Run: python benchmarks/bench_suggest.py [num_tasks]
+"""
+
+import os
+import sys
+import time
+import random
+from datetime import timedelta
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from priority_algorithm import calculate_master_priority, create_daily_plan, rank_tasks, local_now
+
+CATEGORIES = ['work', 'personal', 'health', 'finance', 'learning', 'general']
+PRIORITIES = ['urgent', 'high', 'medium', 'low']
+TEXTS = [
+    'Finish quarterly report', 'Call the dentist', 'Pay rent asap',
+    'Maybe learn piano someday', 'Important meeting prep', 'Buy groceries',
+    'Review pull request', 'Go for a run tonight', 'Critical bug fix',
+]
+
+
+def make_tasks(n, seed=42):
+    """Build n task-like objects with a realistic spread of fields"""
+    rng = random.Random(seed)
+    now = local_now()
+    tasks = []
+    for i in range(n):
+        due = now + timedelta(days=rng.randint(-10, 60)) if rng.random() < 0.7 else None
+        tasks.append(SimpleNamespace(
+            id=i + 1,
+            text=rng.choice(TEXTS),
+            priority=rng.choice(PRIORITIES),
+            category=rng.choice(CATEGORIES),
+            due_date=due,
+            estimated_time=rng.choice([2, 15, 30, 45, 60, 120, 240]),
+            importance=rng.randint(1, 5),
+            created_at=now - timedelta(days=rng.randint(0, 90)),
+        ))
+    return tasks
+
+
+def old_suggest(tasks):
+    """The pre-refactor /suggest path: plan scores everything, then score again"""
+    daily_plan, _ = create_daily_plan(tasks, max_tasks=10)
+    scored_tasks = []
+    for task in tasks:
+        score, reasons, time_rec = calculate_master_priority(task)
+        scored_tasks.append({'task': task, 'score': score, 'reasons': reasons, 'time_recommendation': time_rec})
+    scored_tasks.sort(key=lambda x: x['score'], reverse=True)
+    return daily_plan, scored_tasks[:15]
+
+
+def new_suggest(tasks):
+    """Current /suggest path: score once, derive everything from the ranking"""
+    scored_tasks = rank_tasks(tasks)
+    daily_plan, _ = create_daily_plan(tasks, max_tasks=10, scored_tasks=scored_tasks)
+    return daily_plan, scored_tasks[:15]
+
+
+def bench(fn, tasks, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(tasks)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    tasks = make_tasks(n)
+    old = bench(old_suggest, tasks)
+    new = bench(new_suggest, tasks)
+    print(f"Tasks: {n}")
+    print(f"Old /suggest (double scoring): {old * 1000:.1f} ms")
+    print(f"New /suggest (single pass):    {new * 1000:.1f} ms")
+    print(f"Speedup: {old / new:.2f}x")
@@ -0,0 +1,92 @@
+"""
+Benchmark: User-Agent classification throughput
+Legacy substring chain vs parse_user_agent (uncached and cached) on a
+request stream drawn from the fixture corpus in user_agents.json.
+Also checks parse_user_agent against the corpus labels and reports
+how many of them the legacy chain got wrong
+
+Run: python benchmarks/bench_user_agent.py
+"""
+
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from user_agent import parse_user_agent
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'user_agents.json')
+
+
+def legacy_parse(user_agent):
+    """The classification chain log_activity used before"""
+    device_type = 'desktop'
+    if 'mobile' in user_agent.lower():
+        device_type = 'mobile'
+    elif 'tablet' in user_agent.lower():
+        device_type = 'tablet'
+
+    browser = 'Unknown'
+    if 'Chrome' in user_agent:
+        browser = 'Chrome'
+    elif 'Firefox' in user_agent:
+        browser = 'Firefox'
+    elif 'Safari' in user_agent:
+        browser = 'Safari'
+    elif 'Edge' in user_agent:
+        browser = 'Edge'
+
+    os_name = 'Unknown'
+    if 'Windows' in user_agent:
+        os_name = 'Windows'
+    elif 'Mac' in user_agent:
+        os_name = 'MacOS'
+    elif 'Linux' in user_agent:
+        os_name = 'Linux'
+    elif 'Android' in user_agent:
+        os_name = 'Android'
+    elif 'iOS' in user_agent or 'iPhone' in user_agent:
+        os_name = 'iOS'
+    return device_type, browser, os_name
+
+
+def throughput(fn, stream):
+    start = time.perf_counter()
+    for ua in stream:
+        fn(ua)
+    return len(stream) / (time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    with open(CORPUS) as f:
+        corpus = json.load(f)
+
+    wrong = 0
+    legacy_wrong = 0
+    for case in corpus:
+        expected = (case['device_type'], case['browser'], case['os'])
+        if tuple(parse_user_agent(case['ua'])) != expected:
+            wrong += 1
+            print(f"❌ {tuple(parse_user_agent(case['ua']))} != {expected}: {case['ua']}")
+        if legacy_parse(case['ua']) != expected:
+            legacy_wrong += 1
+    print(f"corpus: {len(corpus)} UAs, parse_user_agent wrong: {wrong}, legacy wrong: {legacy_wrong}")
+
+    # Real traffic: a few UAs make up most requests
+    rng = random.Random(42)
+    uas = [case['ua'] for case in corpus]
+    weights = [1 / (rank + 1) for rank in range(len(uas))]
+    stream = rng.choices(uas, weights, k=200000)
+
+    legacy = throughput(legacy_parse, stream)
+    uncached = throughput(parse_user_agent.__wrapped__, stream)
+    parse_user_agent.cache_clear()
+    cached = throughput(parse_user_agent, stream)
+    print(f"{'legacy chain':<16} {legacy / 1e6:>6.2f}M UA/s")
+    print(f"{'uncached':<16} {uncached / 1e6:>6.2f}M UA/s")
+    print(f"{'cached':<16} {cached / 1e6:>6.2f}M UA/s ({cached / legacy:.1f}x legacy)")
+    print(parse_user_agent.cache_info())
+    sys.exit(1 if wrong else 0)
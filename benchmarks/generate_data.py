@@ -0,0 +1,188 @@
+"""
+Synthetic data for benchmarks
+Creates N users with M tasks each, plus their activity history, with a
+realistic spread of task text, categories, priorities, due dates and
+completion. The same seed always produces the same data
+
+Run: python benchmarks/generate_data.py [--users N] [--tasks M] [--database-url URL] [--reset]
+(without --database-url, DATABASE_URL or the local SQLite database is used)
+"""
+
+import argparse
+import os
+import random
+import sys
+from datetime import timedelta
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Every generated user logs in with this password
+PASSWORD = 'benchmark'
+ADMIN_EMAIL = 'bench-admin@example.com'
+
+CATEGORIES = (('work', 35), ('personal', 25), ('health', 10), ('finance', 10), ('learning', 10), ('general', 10))
+PRIORITIES = (('urgent', 8), ('high', 22), ('medium', 50), ('low', 20))
+ESTIMATES = ((5, 10), (15, 20), (30, 30), (45, 10), (60, 15), (120, 10), (240, 5))
+
+VERBS = {
+    'work': ['Finish', 'Review', 'Prepare', 'Send', 'Update', 'Fix', 'Draft', 'Schedule'],
+    'personal': ['Call', 'Buy', 'Clean', 'Book', 'Plan', 'Pick up', 'Return'],
+    'health': ['Book', 'Go to', 'Schedule', 'Refill', 'Walk to'],
+    'finance': ['Pay', 'File', 'Check', 'Transfer', 'Review'],
+    'learning': ['Read', 'Watch', 'Practice', 'Finish', 'Start'],
+    'general': ['Sort', 'Look into', 'Organize', 'Write', 'Find'],
+}
+OBJECTS = {
+    'work': ['quarterly report', 'pull request', 'client email', 'slides for the meeting',
+             'sprint plan', 'login bug', 'project proposal', 'team sync notes'],
+    'personal': ['mom', 'groceries', 'the garage', 'flights', 'birthday party', 'library books'],
+    'health': ['dentist appointment', 'gym session', 'prescription', 'annual checkup', 'the park'],
+    'finance': ['rent', 'tax return', 'credit card bill', 'savings', 'insurance renewal'],
+    'learning': ['chapter 4', 'the Python course', 'piano scales', 'the conference talk'],
+    'general': ['old photos', 'desk drawer', 'blog post', 'new phone plan', 'recipes'],
+}
+# Words the keyword analysis reacts to, with the share of texts that get one
+MODIFIERS = (('asap', 3), ('urgent', 3), ('today', 5), ('before the deadline', 3),
+             ('important', 4), ('maybe', 3), ('someday', 2), ('', 77))
+
+ACTIONS = (('login', 30), ('add_task', 30), ('complete_task', 20), ('delete_task', 5),
+           ('uncomplete_task', 3), ('logout', 12))
+DEVICES = (('desktop', 'Chrome', 'Windows', 40), ('desktop', 'Safari', 'macOS', 15),
+           ('desktop', 'Firefox', 'Linux', 5), ('mobile', 'Safari', 'iOS', 20),
+           ('mobile', 'Chrome', 'Android', 15), ('tablet', 'Safari', 'iOS', 5))
+
+
+def weighted(rng, choices):
+    values, weights = zip(*((c[:-1] if len(c) > 2 else c[0], c[-1]) for c in choices))
+    return rng.choices(values, weights)[0]
+
+
+def task_text(rng, category):
+    text = f"{rng.choice(VERBS[category])} {rng.choice(OBJECTS[category])}"
+    modifier = weighted(rng, MODIFIERS)
+    return f"{text} {modifier}" if modifier else text
+
+
+def due_date(rng, now):
+    """None for a quarter of tasks; otherwise mostly soon, some overdue"""
+    roll = rng.random()
+    if roll < 0.25:
+        return None
+    if roll < 0.35:
+        return now - timedelta(days=rng.randint(1, 14), hours=rng.randint(0, 23))
+    if roll < 0.70:
+        return now + timedelta(days=rng.randint(0, 7), hours=rng.randint(0, 23))
+    return now + timedelta(days=rng.randint(8, 90))
+
+
+def task_fields(rng, now):
+    """Column values of one realistic task"""
+    category = weighted(rng, CATEGORIES)
+    due = due_date(rng, now)
+    created = now - timedelta(days=rng.randint(0, 60), minutes=rng.randint(0, 1439))
+    completed = rng.random() < (0.6 if due is not None and due < now else 0.3)
+    return {
+        'text': task_text(rng, category),
+        'priority': weighted(rng, PRIORITIES),
+        'category': category,
+        'due_date': due,
+        'estimated_time': weighted(rng, ESTIMATES),
+        'importance': min(5, max(1, round(rng.triangular(1, 5, 3)))),
+        'completed': completed,
+        'is_deleted': rng.random() < 0.05,
+        'created_at': min(created, due) if due is not None else created,
+    }
+
+
+def make_tasks(n, seed=42, now=None):
+    """n task-like objects (no database) for micro-benchmarks"""
+    from priority_algorithm import local_now
+
+    rng = random.Random(seed)
+    now = now or local_now()
+    return [SimpleNamespace(id=i + 1, **task_fields(rng, now)) for i in range(n)]
+
+
+def generate(server, users, tasks_per_user, activities_per_user=20, seed=42):
+    """
+    Insert users (password PASSWORD), their tasks and activities, plus the
+    admin ADMIN_EMAIL. The inserts bypass the ORM, so the admin statistics
+    are rebuilt after
+    Returns: the generated users' emails
+    """
+    from datetime import datetime, timezone
+    from activity_log import insert_rows
+
+    db = server.db
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    password_hash = server.password_hasher.hash(PASSWORD)  # Hashed once, shared by every user
+    with server.app.app_context():
+        existing = {email for (email,) in db.session.query(server.User.email)}
+        emails = [f'bench{i}@example.com' for i in range(users)]
+        new_users = [e for e in emails + [ADMIN_EMAIL] if e not in existing]
+        insert_rows(db.engine, server.User.__table__, [
+            {'email': email, 'password_hash': password_hash, 'is_admin': email == ADMIN_EMAIL,
+             'created_at': (now - timedelta(days=rng.randint(0, 120))).isoformat()}
+            for email in new_users
+        ])
+        ids = dict(db.session.query(server.User.email, server.User.id).filter(server.User.email.in_(new_users)))
+
+        tasks = []
+        activities = []
+        for email in new_users:
+            if email == ADMIN_EMAIL:
+                continue
+            user_id = ids[email]
+            for _ in range(tasks_per_user):
+                fields = task_fields(rng, now)
+                fields['user_id'] = user_id
+                if fields['is_deleted']:
+                    fields['deleted_at'] = now - timedelta(days=rng.randint(0, 30))
+                tasks.append(fields)
+            for _ in range(activities_per_user):
+                device_type, browser, os_name = weighted(rng, DEVICES)
+                activities.append({
+                    'user_id': user_id, 'action': weighted(rng, ACTIONS),
+                    'ip_address': f'10.0.{rng.randint(0, 255)}.{rng.randint(1, 254)}',
+                    'device_type': device_type, 'browser': browser, 'os': os_name,
+                    'timestamp': (datetime.now() - timedelta(days=rng.randint(0, 60),
+                                                             seconds=rng.randint(0, 86399))).isoformat(),
+                })
+        insert_rows(db.engine, server.Task.__table__, tasks)
+        insert_rows(db.engine, server.UserActivity.__table__, activities)
+        server.dashboard_stats.rebuild()
+    return emails
+
+
+def reset(server):
+    """Drop and recreate every table (for a clean benchmark database)"""
+    with server.app.app_context():
+        server.db.drop_all()
+        server.db.create_all()
+        server.dashboard_stats.ensure_counters()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate synthetic users, tasks and activities')
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--tasks', type=int, default=50, help='tasks per user')
+    parser.add_argument('--activities', type=int, default=20, help='activities per user')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--database-url', help='database to fill (default DATABASE_URL)')
+    parser.add_argument('--reset', action='store_true', help='drop and recreate all tables first')
+    args = parser.parse_args()
+    if args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+
+    import time
+    import server
+
+    if args.reset:
+        reset(server)
+    start = time.perf_counter()
+    emails = generate(server, args.users, args.tasks, args.activities, args.seed)
+    server.activity_writer.flush()
+    print(f"✅ Generated {len(emails)} users x {args.tasks} tasks in {time.perf_counter() - start:.1f}s "
+          f"(password '{PASSWORD}', admin {ADMIN_EMAIL})")
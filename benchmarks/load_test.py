@@ -0,0 +1,281 @@
+"""
+HTTP load driver for the API
+Fills a database with generate_data.py, serves the app on a local port
+and runs virtual users against it: each logs in and then loops over a
+weighted mix of /tasks, /suggest, /add-task and logins, while one admin
+user cycles through the admin endpoints. Reports p50/p95/p99 latency,
+throughput and SQL statements per request (counted in the server
+process), and can compare them with a stored baseline
+
+Run: python benchmarks/load_test.py [--database-url URL] [--concurrency 8] [--duration 20]
+                                    [--baseline [FILE]] [--save-baseline [FILE]]
+     python benchmarks/load_test.py --url http://127.0.0.1:8000   (a running server, e.g. gunicorn;
+                                    its database must be filled with generate_data.py first)
+
+The default database is a scratch SQLite file. For PostgreSQL pass
+--database-url postgresql://localhost/taskbuddy_bench: its tables are dropped
+and recreated first, so never point it at a database you want to keep
+"""
+
+import argparse
+import http.client
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from http.cookies import SimpleCookie
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import baseline
+from generate_data import ADMIN_EMAIL, PASSWORD, task_fields
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Requests of a virtual user: (label, weight)
+USER_MIX = (
+    ('GET /tasks', 40),
+    ('GET /suggest', 25),
+    ('POST /add-task', 20),
+    ('POST /login', 5),
+    ('GET /reviews', 10),
+)
+ADMIN_ENDPOINTS = ('GET /admin/stats', 'GET /admin/users', 'GET /admin/activities',
+                   'GET /admin/analytics', 'GET /admin/all-tasks')
+
+QUERY_COUNT_HEADER = 'X-Query-Count'
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    index = max(0, math.ceil(p / 100 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+class Session:
+    """One keep-alive connection with the session cookie of a logged-in user"""
+
+    def __init__(self, base_url, email):
+        url = urlsplit(base_url)
+        self.connection = http.client.HTTPConnection(url.hostname, url.port, timeout=60)
+        self.email = email
+        self.cookies = SimpleCookie()
+
+    def request(self, method, path, body=None):
+        """Returns (status, SQL statement count or None)"""
+        headers = {'Accept-Encoding': 'gzip'}
+        if self.cookies:
+            headers['Cookie'] = '; '.join(f'{k}={m.value}' for k, m in self.cookies.items())
+        if body is not None:
+            body = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+        try:
+            self.connection.request(method, path, body, headers)
+            response = self.connection.getresponse()
+        except (http.client.HTTPException, OSError):
+            # The server closed the kept-alive connection: retry once on a new one
+            self.connection.close()
+            self.connection.request(method, path, body, headers)
+            response = self.connection.getresponse()
+        response.read()
+        for cookie in response.headers.get_all('Set-Cookie') or ():
+            self.cookies.load(cookie)
+        queries = response.headers.get(QUERY_COUNT_HEADER)
+        return response.status, int(queries) if queries is not None else None
+
+    def login(self):
+        return self.request('POST', '/login', {'email': self.email, 'password': PASSWORD})
+
+
+class Recorder:
+    """Latency, status and statement count samples per request label"""
+
+    def __init__(self):
+        self.samples = {}
+        self._lock = threading.Lock()
+
+    def timed(self, label, session, method, path, body=None):
+        start = time.perf_counter()
+        status, queries = session.request(method, path, body)
+        self.record(label, time.perf_counter() - start, status, queries)
+
+    def record(self, label, elapsed, status, queries=None):
+        with self._lock:
+            self.samples.setdefault(label, []).append((elapsed, status, queries))
+
+    def reset(self):
+        with self._lock:
+            self.samples = {}
+
+    def results(self, duration):
+        results = {}
+        for label, samples in sorted(self.samples.items()):
+            latencies = sorted(s[0] * 1000 for s in samples)
+            queries = [s[2] for s in samples if s[2] is not None]
+            results[label] = {
+                'requests': len(samples),
+                'errors': sum(1 for s in samples if s[1] >= 400),
+                'rps': round(len(samples) / duration, 2),
+                'p50_ms': round(percentile(latencies, 50), 2),
+                'p95_ms': round(percentile(latencies, 95), 2),
+                'p99_ms': round(percentile(latencies, 99), 2),
+                'queries': round(sum(queries) / len(queries), 2) if queries else None,
+            }
+        return results
+
+
+def run_user(base_url, email, recorder, stop, seed):
+    rng = random.Random(seed)
+    labels, weights = zip(*USER_MIX)
+    session = Session(base_url, email)
+    recorder.timed('POST /login', session, 'POST', '/login', {'email': email, 'password': PASSWORD})
+    while not stop.is_set():
+        label = rng.choices(labels, weights)[0]
+        method, path = label.split(' ', 1)
+        body = None
+        if path == '/login':
+            body = {'email': email, 'password': PASSWORD}
+        elif path == '/add-task':
+            fields = task_fields(rng, datetime.now().astimezone())
+            body = {k: fields[k] for k in ('text', 'priority', 'category', 'estimated_time', 'importance')}
+            body['due_date'] = fields['due_date'].isoformat() if fields['due_date'] else None
+        elif path == '/tasks':
+            path = '/tasks?limit=100'
+        recorder.timed(label, session, method, path, body)
+
+
+def run_admin(base_url, recorder, stop):
+    session = Session(base_url, ADMIN_EMAIL)
+    session.login()
+    while not stop.is_set():
+        for label in ADMIN_ENDPOINTS:
+            method, path = label.split(' ', 1)
+            recorder.timed(label, session, method, path)
+
+
+def run_load(base_url, emails, concurrency, duration, warmup):
+    """Run the virtual users for warmup + duration seconds; only the last duration is recorded"""
+    stop = threading.Event()
+    recorder = Recorder()
+    targets = [(run_user, (base_url, emails[i % len(emails)], recorder, stop, i)) for i in range(concurrency)]
+    targets.append((run_admin, (base_url, recorder, stop)))
+    threads = [threading.Thread(target=fn, args=args, daemon=True) for fn, args in targets]
+    for thread in threads:
+        thread.start()
+    time.sleep(warmup)
+    recorder.reset()
+    start = time.perf_counter()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return recorder.results(time.perf_counter() - start)
+
+
+def count_queries_per_request(server):
+    """Add each request's SQL statement count (this thread only) as a response header"""
+    from flask import g
+    from sqlalchemy import event
+
+    local = threading.local()
+
+    def before_cursor_execute(*args):
+        local.count = getattr(local, 'count', 0) + 1
+
+    with server.app.app_context():
+        event.listen(server.db.engine, 'before_cursor_execute', before_cursor_execute)
+
+    @server.app.before_request
+    def reset_count():
+        local.count = 0
+        g.counting_queries = True
+
+    @server.app.after_request
+    def add_count(response):
+        if g.get('counting_queries'):
+            response.headers[QUERY_COUNT_HEADER] = str(local.count)
+        return response
+
+
+def serve(server):
+    """Serve the app from a background thread; returns its base URL"""
+    import logging
+    from werkzeug.serving import WSGIRequestHandler, make_server
+
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)  # No access log line per request
+    WSGIRequestHandler.protocol_version = 'HTTP/1.1'  # Keep-alive, like gunicorn behind a proxy
+    httpd = make_server('127.0.0.1', 0, server.app, threaded=True)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return f'http://127.0.0.1:{httpd.server_port}'
+
+
+def report(results, duration):
+    total = sum(r['requests'] for r in results.values())
+    print(f"\n{'request':<24} {'count':>7} {'errors':>6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'p99 ms':>8} {'queries':>8}")
+    for label, r in results.items():
+        queries = f"{r['queries']:.1f}" if r['queries'] is not None else '-'
+        print(f"{label:<24} {r['requests']:>7} {r['errors']:>6} {r['rps']:>8.1f} {r['p50_ms']:>8.1f} "
+              f"{r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f} {queries:>8}")
+    print(f"\nThroughput: {total / duration:.1f} requests/s over {duration:.0f}s")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Load-test the API over HTTP')
+    parser.add_argument('--url', help='test a running server instead of starting one')
+    parser.add_argument('--database-url', help='database for the started server (default: scratch SQLite)')
+    parser.add_argument('--users', type=int, default=50, help='generated users')
+    parser.add_argument('--tasks', type=int, default=40, help='generated tasks per user')
+    parser.add_argument('--concurrency', type=int, default=8, help='virtual users (plus one admin)')
+    parser.add_argument('--duration', type=float, default=20, help='measured seconds')
+    parser.add_argument('--warmup', type=float, default=3, help='unmeasured seconds first')
+    parser.add_argument('--baseline', nargs='?', const='', help='compare with a stored baseline')
+    parser.add_argument('--save-baseline', nargs='?', const='', help='store this run as the baseline')
+    parser.add_argument('--tolerance', type=float, default=baseline.DEFAULT_TOLERANCE)
+    args = parser.parse_args()
+
+    if args.url:
+        base_url = args.url.rstrip('/')
+        emails = [f'bench{i}@example.com' for i in range(args.users)]
+        database = 'external'
+    else:
+        database_url = args.database_url or 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'load_test.db')
+        os.environ['DATABASE_URL'] = database_url
+        import server
+        from generate_data import generate, reset
+
+        with server.app.app_context():
+            database = server.db.engine.dialect.name
+        if args.database_url:
+            reset(server)
+        print(f"Generating {args.users} users x {args.tasks} tasks ({database})...")
+        emails = generate(server, args.users, args.tasks)
+        count_queries_per_request(server)
+        base_url = serve(server)
+
+    print(f"Running {args.concurrency} virtual users + 1 admin against {base_url} "
+          f"for {args.warmup:.0f}s + {args.duration:.0f}s...")
+    results = run_load(base_url, emails, args.concurrency, args.duration, args.warmup)
+    report(results, args.duration)
+
+    baseline_path = os.path.join(BENCH_DIR, 'baselines', f'load-{database}.json')
+    if args.save_baseline is not None:
+        baseline.save(args.save_baseline or baseline_path, results, {
+            'database': database, 'concurrency': args.concurrency, 'duration': args.duration,
+            'users': args.users, 'tasks': args.tasks,
+        })
+    if args.baseline is not None:
+        regressions = baseline.compare(results, baseline.load(args.baseline or baseline_path),
+                                       args.tolerance, metrics=('p95_ms', 'rps', 'queries'))
+        if regressions:
+            print(f"❌ {len(regressions)} metric(s) worse than the baseline")
+            sys.exit(1)
+        print("✅ No regressions")
@@ -0,0 +1,462 @@
+"""
+Cache backends shared by the request handlers
+- memory://  in-process LRU with TTL, bounded by entries and bytes (per worker)
+- sqlite:///path/cache.db  one SQLite file shared by the workers on a host
+- redis://[:password@]host:port/db  any server speaking the Redis protocol
+
+Values are bytes. Every backend counts hits, misses, sets, evictions,
+expirations and errors for this process; a backend error is counted
+and treated as a miss so a cache outage never fails a request, and the
+backend is skipped for RETRY_AFTER seconds so an unreachable server
+does not add a connect timeout to every request
+"""
+
+import os
+import socket
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import parse_qs, urlparse
+
+METRIC_NAMES = ('hits', 'misses', 'sets', 'deletes', 'evictions', 'expirations', 'errors')
+
+# Seconds a failing backend is bypassed before it is tried again
+RETRY_AFTER = 5.0
+
+# Locks shared by the keys of a process (see Cache.lock)
+LOCK_STRIPES = 64
+
+# Seconds a generation token lives without an invalidation. Entries keyed
+# by a generation must expire sooner; an expired token is replaced by a
+# new one, so its entries are only missed, never served stale
+GENERATION_TTL = 7 * 24 * 3600
+
+
+class CacheMetrics:
+    """Thread-safe counters of cache operations"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = dict.fromkeys(METRIC_NAMES, 0)
+
+    def add(self, name, n=1):
+        with self._lock:
+            self._counts[name] += n
+
+    def snapshot(self):
+        with self._lock:
+            counts = dict(self._counts)
+        lookups = counts['hits'] + counts['misses']
+        counts['hit_ratio'] = round(counts['hits'] / lookups, 4) if lookups else None
+        return counts
+
+
+class Cache:
+    """
+    Base class: subclasses implement _get, _set, _delete and _clear
+    ttl is in seconds; None uses the backend's default_ttl, 0 never expires
+    """
+
+    name = 'cache'
+    shared = True  # Entries are visible to every worker
+
+    def __init__(self, default_ttl=None):
+        self.default_ttl = default_ttl
+        self.metrics = CacheMetrics()
+        self._warned = False
+        self._down_until = 0.0
+        self._locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+
+    def get(self, key):
+        value = None
+        if self.available():
+            try:
+                value = self._get(key)
+            except Exception as e:
+                self._error(e)
+        self.metrics.add('misses' if value is None else 'hits')
+        return value
+
+    def set(self, key, value, ttl=None):
+        if not self.available():
+            return
+        ttl = self.default_ttl if ttl is None else ttl
+        try:
+            self._set(key, value, ttl or None)
+        except Exception as e:
+            self._error(e)
+            return
+        self.metrics.add('sets')
+
+    def delete(self, *keys):
+        if not self.available():
+            return
+        try:
+            self._delete(keys)
+        except Exception as e:
+            self._error(e)
+            return
+        self.metrics.add('deletes', len(keys))
+
+    def clear(self):
+        try:
+            self._clear()
+        except Exception as e:
+            self._error(e)
+
+    def get_or_set(self, key, build, ttl=None):
+        """Cached value of key, or build() stored under it"""
+        value = self.get(key)
+        if value is None:
+            value = build()
+            self.set(key, value, ttl)
+        return value
+
+    def lock(self, key):
+        """
+        Lock for key, so concurrent misses in this process build a value once
+        Keys share a fixed set of locks: two keys may wait on each other, but
+        the locks do not grow with the number of keys ever cached
+        """
+        return self._locks[hash(key) % LOCK_STRIPES]
+
+    def generation(self, name):
+        """
+        Current generation token of a cached data set: keys that include
+        it are abandoned by invalidate(name). A value built from data read
+        before an invalidation is stored under the old generation, so it
+        can never be served after the invalidation
+        """
+        key = f'{name}:generation'
+        token = self.get(key)
+        if token is None:
+            token = os.urandom(8).hex().encode()
+            self.set(key, token, GENERATION_TTL)
+        return token.decode()
+
+    def invalidate(self, name):
+        self.set(f'{name}:generation', os.urandom(8).hex().encode(), GENERATION_TTL)
+
+    def available(self):
+        return time.monotonic() >= self._down_until
+
+    def _error(self, error):
+        self.metrics.add('errors')
+        self._down_until = time.monotonic() + RETRY_AFTER
+        if not self._warned:
+            self._warned = True
+            print(f"⚠️ {self.name} cache error (serving without cache): {error}")
+
+
+class MemoryCache(Cache):
+    """
+    In-process LRU: least recently used entries are evicted beyond
+    max_entries entries or max_bytes of values; expired entries are
+    dropped when read
+    """
+
+    name = 'memory'
+    shared = False
+
+    def __init__(self, max_entries=2000, max_bytes=64 * 1024 * 1024, default_ttl=None):
+        super().__init__(default_ttl)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()  # key -> (value, expires or None)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires is not None and expires <= time.monotonic():
+                self._pop(key)
+                self.metrics.add('expirations')
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def _set(self, key, value, ttl):
+        expires = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._pop(key)
+            self._entries[key] = (value, expires)
+            self.size += len(value)
+            evicted = 0
+            while self._entries and (len(self._entries) > self.max_entries or self.size > self.max_bytes):
+                self._pop(next(iter(self._entries)))
+                evicted += 1
+        if evicted:
+            self.metrics.add('evictions', evicted)
+
+    def _delete(self, keys):
+        with self._lock:
+            for key in keys:
+                self._pop(key)
+
+    def _clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def _pop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= len(entry[0])
+
+
+class SQLiteCache(Cache):
+    """
+    Cache in one SQLite file (WAL mode), shared by every process on the
+    host that opens the same path. Beyond max_entries the oldest written
+    entries are evicted; expired ones are dropped when read and purged
+    with the eviction pass every purge_interval writes
+    """
+
+    name = 'sqlite'
+
+    def __init__(self, path, max_entries=10000, default_ttl=None, timeout=5.0, purge_interval=100):
+        super().__init__(default_ttl)
+        self.path = path
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.purge_interval = purge_interval
+        self._local = threading.local()
+        self._writes = 0
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+    def _connection(self):
+        # One connection per thread, reopened in forked workers
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('CREATE TABLE IF NOT EXISTS cache ('
+                     'key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL, written REAL NOT NULL)')
+        conn.execute('CREATE INDEX IF NOT EXISTS ix_cache_written ON cache (written)')
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def _get(self, key):
+        conn = self._connection()
+        row = conn.execute('SELECT value, expires FROM cache WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        value, expires = row
+        if expires is not None and expires <= time.time():
+            conn.execute('DELETE FROM cache WHERE key = ? AND expires = ?', (key, expires))
+            self.metrics.add('expirations')
+            return None
+        return bytes(value)
+
+    def _set(self, key, value, ttl):
+        now = time.time()
+        conn = self._connection()
+        conn.execute('INSERT OR REPLACE INTO cache (key, value, expires, written) VALUES (?, ?, ?, ?)',
+                     (key, value, now + ttl if ttl else None, now))
+        self._writes += 1
+        if self._writes % self.purge_interval == 0:
+            self.purge()
+
+    def purge(self):
+        """Drop expired entries, then the oldest written ones beyond max_entries"""
+        conn = self._connection()
+        expired = conn.execute('DELETE FROM cache WHERE expires <= ?', (time.time(),)).rowcount
+        evicted = conn.execute(
+            'DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY written DESC LIMIT -1 OFFSET ?)',
+            (self.max_entries,)
+        ).rowcount
+        if expired:
+            self.metrics.add('expirations', expired)
+        if evicted:
+            self.metrics.add('evictions', evicted)
+
+    def _delete(self, keys):
+        conn = self._connection()
+        conn.executemany('DELETE FROM cache WHERE key = ?', [(key,) for key in keys])
+
+    def _clear(self):
+        self._connection().execute('DELETE FROM cache')
+
+
+class RedisError(Exception):
+    pass
+
+
+class RedisCache(Cache):
+    """
+    Minimal Redis protocol (RESP) client: GET, SET with PX, DEL, SCAN.
+    Keys are namespaced with prefix; eviction is left to the server's
+    maxmemory policy (only this process's hits and misses are counted)
+    """
+
+    name = 'redis'
+
+    def __init__(self, host='localhost', port=6379, db=0, password=None, prefix='taskbuddy:',
+                 default_ttl=None, timeout=1.0):
+        super().__init__(default_ttl)
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.prefix = prefix
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def command(self, *args):
+        """Send one command and return its reply (reconnects once on a broken connection)"""
+        try:
+            return self._command(args)
+        except (OSError, ConnectionError):
+            self._close()
+            return self._command(args)
+
+    def _command(self, args):
+        sock, reader = self._connection()
+        sock.sendall(encode_command(args))
+        return read_reply(reader)
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        conn = (sock, sock.makefile('rb'))
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        if self.password:
+            self._command(('AUTH', self.password))
+        if self.db:
+            self._command(('SELECT', self.db))
+        return conn
+
+    def _close(self):
+        conn = getattr(self._local, 'conn', None)
+        self._local.conn = None
+        if conn is not None:
+            try:
+                conn[1].close()
+                conn[0].close()
+            except OSError:
+                pass
+
+    def _get(self, key):
+        return self.command('GET', self.prefix + key)
+
+    def _set(self, key, value, ttl):
+        if ttl:
+            self.command('SET', self.prefix + key, value, 'PX', int(ttl * 1000))
+        else:
+            self.command('SET', self.prefix + key, value)
+
+    def _delete(self, keys):
+        self.command('DEL', *(self.prefix + key for key in keys))
+
+    def _clear(self):
+        cursor = b'0'
+        while True:
+            cursor, keys = self.command('SCAN', cursor, 'MATCH', self.prefix + '*', 'COUNT', 500)
+            if keys:
+                self.command('DEL', *keys)
+            if cursor == b'0':
+                return
+
+
+def encode_command(args):
+    """RESP array of bulk strings"""
+    parts = [b'*%d\r\n' % len(args)]
+    for arg in args:
+        if not isinstance(arg, bytes):
+            arg = str(arg).encode('utf-8')
+        parts.append(b'$%d\r\n%s\r\n' % (len(arg), arg))
+    return b''.join(parts)
+
+
+def read_reply(reader):
+    """Parse one RESP reply from a binary file object"""
+    line = reader.readline()
+    if not line.endswith(b'\r\n'):
+        raise ConnectionError('Connection closed by the cache server')
+    kind, rest = line[:1], line[1:-2]
+    if kind == b'+':
+        return rest
+    if kind == b'-':
+        raise RedisError(rest.decode('utf-8', 'replace'))
+    if kind == b':':
+        return int(rest)
+    if kind == b'$':
+        length = int(rest)
+        if length < 0:
+            return None
+        data = reader.read(length + 2)
+        if len(data) != length + 2:
+            raise ConnectionError('Connection closed by the cache server')
+        return data[:-2]
+    if kind == b'*':
+        length = int(rest)
+        if length < 0:
+            return None
+        return [read_reply(reader) for _ in range(length)]
+    raise RedisError(f'Unexpected reply: {line!r}')
+
+
+def invalidate_on_commit(session, cache, groups):
+    """
+    Invalidate cache generations when a transaction that wrote their
+    tables commits; groups maps a table name to a generation name,
+    e.g. {'review': 'reviews'}
+    """
+    from sqlalchemy import event
+
+    def after_flush(session, flush_context):
+        changed = session.info.setdefault('invalidate_generations', set())
+        for obj in session.new | session.deleted | session.dirty:
+            name = groups.get(getattr(obj, '__tablename__', None))
+            if name and (obj not in session.dirty or session.is_modified(obj, include_collections=False)):
+                changed.add(name)
+
+    def after_commit(session):
+        for name in session.info.pop('invalidate_generations', ()):
+            cache.invalidate(name)
+
+    def after_rollback(session):
+        session.info.pop('invalidate_generations', None)
+
+    event.listen(session, 'after_flush', after_flush)
+    event.listen(session, 'after_commit', after_commit)
+    event.listen(session, 'after_rollback', after_rollback)
+
+
+def cache_from_url(url):
+    """
+    Cache backend for a URL, e.g. memory://?max_entries=5000&ttl=60,
+    sqlite:///instance/cache.db?max_entries=20000, redis://localhost:6379/0
+    """
+    parsed = urlparse(url)
+    options = {name: values[-1] for name, values in parse_qs(parsed.query).items()}
+    ttl = float(options['ttl']) if 'ttl' in options else None
+    if parsed.scheme == 'memory':
+        return MemoryCache(max_entries=int(options.get('max_entries', 2000)),
+                           max_bytes=int(options.get('max_bytes', 64 * 1024 * 1024)),
+                           default_ttl=ttl)
+    if parsed.scheme == 'sqlite':
+        # sqlite:///relative/path or sqlite:////absolute/path, like SQLAlchemy
+        return SQLiteCache(parsed.path[1:], max_entries=int(options.get('max_entries', 10000)),
+                           default_ttl=ttl)
+    if parsed.scheme == 'redis':
+        return RedisCache(host=parsed.hostname or 'localhost', port=parsed.port or 6379,
+                          db=int(parsed.path[1:] or 0), password=parsed.password,
+                          prefix=options.get('prefix', 'taskbuddy:'), default_ttl=ttl)
+    raise ValueError(f"Unsupported cache URL: {url}")
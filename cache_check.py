@@ -0,0 +1,105 @@
+"""
+Conformance check for the cache backends
+Runs the same get/set/TTL/eviction/delete/clear sequence against the
+memory, SQLite and Redis backends, and checks that a second SQLite or
+Redis client (another worker) sees the first one's writes. The Redis
+backend runs against fake_redis.py unless --redis-url is given
+
+Usage: python cache_check.py [--redis-url redis://host:port/0]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from cache_backend import MemoryCache, SQLiteCache, cache_from_url
+
+
+def check_backend(cache, peer=None, evicts=True):
+    """
+    List of failed checks for one backend
+    peer: a second client of the same store; evicts: the store holds at most 20 keys
+    """
+    failures = []
+
+    def expect(label, actual, expected):
+        if actual != expected:
+            failures.append(f"{label}: got {actual!r}, expected {expected!r}")
+
+    cache.clear()
+    expect('miss', cache.get('a'), None)
+    cache.set('a', b'1')
+    expect('hit', cache.get('a'), b'1')
+    cache.set('a', b'2')
+    expect('overwrite', cache.get('a'), b'2')
+    cache.set('binary', bytes(range(256)))
+    expect('binary value', cache.get('binary'), bytes(range(256)))
+    if peer is not None:
+        expect('shared with another client', peer.get('a'), b'2')
+        peer.set('b', b'from peer')
+        expect('written by another client', cache.get('b'), b'from peer')
+    cache.set('short', b'x', ttl=0.05)
+    expect('before ttl', cache.get('short'), b'x')
+    time.sleep(0.1)
+    expect('after ttl', cache.get('short'), None)
+    cache.delete('a', 'b')
+    expect('deleted', cache.get('a'), None)
+    expect('get_or_set builds', cache.get_or_set('c', lambda: b'built'), b'built')
+    expect('get_or_set reuses', cache.get_or_set('c', lambda: b'rebuilt'), b'built')
+
+    if evicts:
+        for i in range(50):
+            cache.set(f'fill{i}', b'v')
+        if isinstance(cache, SQLiteCache):
+            cache.purge()
+        expect('oldest evicted', cache.get('fill0'), None)
+        expect('newest kept', cache.get('fill49'), b'v')
+        if cache.name != 'redis' and cache.metrics.snapshot()['evictions'] == 0:
+            failures.append('evictions were not counted')
+    cache.clear()
+    expect('cleared', cache.get('fill49'), None)
+
+    metrics = cache.metrics.snapshot()
+    if not (metrics['hits'] and metrics['misses'] and metrics['sets']):
+        failures.append(f'metrics not counted: {metrics}')
+    if metrics['errors']:
+        failures.append(f"{metrics['errors']} backend errors")
+    return failures
+
+
+def check_caches(redis_url=None):
+    """Returns True if every backend passes"""
+    from fake_redis import FakeRedisServer
+
+    print("\nChecking cache backends...")
+    results = {}
+    results['memory'] = check_backend(MemoryCache(max_entries=20))
+
+    path = os.path.join(tempfile.mkdtemp(), 'cache.db')
+    results['sqlite'] = check_backend(SQLiteCache(path, max_entries=20), peer=SQLiteCache(path))
+
+    if redis_url:
+        results['redis'] = check_backend(cache_from_url(redis_url), peer=cache_from_url(redis_url),
+                                         evicts=False)
+    else:
+        with FakeRedisServer(max_keys=20) as server:
+            results['redis (fake server)'] = check_backend(cache_from_url(server.url),
+                                                           peer=cache_from_url(server.url))
+
+    ok = True
+    for name, failures in results.items():
+        if failures:
+            ok = False
+            for failure in failures:
+                print(f"❌ {name}: {failure}")
+        else:
+            print(f"✓ {name}")
+    if ok:
+        print("✅ All cache backends behave the same")
+    return ok
+
+
+if __name__ == '__main__':
+    redis_url = sys.argv[sys.argv.index('--redis-url') + 1] if '--redis-url' in sys.argv else None
+    sys.exit(0 if check_caches(redis_url) else 1)
@@ -0,0 +1,68 @@
+"""
+Per-user data versions
+Every flush that inserts, changes or deletes a user's tasks bumps that
+user's version in the same transaction, so a request handler can tell
+with one primary-key read whether anything derived from the tasks
+(a response, an ETag, a cached ranking) is still current, and results
+computed from them can be cached per version
+"""
+
+from sqlalchemy import event, inspect, select
+
+from upsert import increment_upsert
+
+# Tables whose rows belong to a user through user_id
+VERSIONED_TABLES = ('task',)
+
+
+def touched_users(session):
+    """Ids of the users whose versioned rows the flushed objects write"""
+    users = set()
+    for obj in session.new | session.deleted:
+        if getattr(obj, '__tablename__', None) in VERSIONED_TABLES:
+            users.add(obj.user_id)
+    for obj in session.dirty:
+        if getattr(obj, '__tablename__', None) not in VERSIONED_TABLES:
+            continue
+        if not session.is_modified(obj, include_collections=False):
+            continue
+        users.add(obj.user_id)
+        # A task moved to another user changes both lists
+        users.update(inspect(obj).attrs.user_id.history.deleted)
+    users.discard(None)
+    return users
+
+
+class DataVersions:
+    """
+    Version counter per user, stored in version_model (user_id, version)
+    A user without a row is at version 0
+    """
+
+    def __init__(self, db, version_model):
+        self.db = db
+        self.UserDataVersion = version_model
+
+    def install(self):
+        """Bump the touched users' versions on every flush of the app's session"""
+        event.listen(self.db.session, 'after_flush', self._after_flush)
+
+    def get(self, user_id):
+        """Current version of a user's data (one primary-key read)"""
+        return self.db.session.execute(
+            select(self.UserDataVersion.version).where(self.UserDataVersion.user_id == user_id)
+        ).scalar() or 0
+
+    def bump(self, user_ids, connection=None):
+        """Increment the versions of user_ids in the current transaction"""
+        if not user_ids:
+            return
+        connection = connection or self.db.session.connection()
+        connection.execute(self._upsert(), [{'user_id': user_id, 'version': 1} for user_id in sorted(user_ids)])
+
+    def _after_flush(self, session, flush_context):
+        self.bump(touched_users(session), session.connection())
+
+    def _upsert(self):
+        # Rows are inserted at version 1, so a conflict adds one
+        return increment_upsert(self.db.engine, self.UserDataVersion.__table__, ['user_id'], ['version'])
@@ -0,0 +1,78 @@
+"""
+Streaming export helpers for admin data
+Serialize database rows to NDJSON or CSV one row at a time and
+optionally gzip them on the fly, so an export of any size is sent
+with constant memory
+"""
+
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+# Rows are written to the response in chunks of about this many bytes
+CHUNK_SIZE = 64 * 1024
+
+
+def _json_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def ndjson_lines(rows, fields):
+    """One JSON object per row"""
+    for row in rows:
+        yield json.dumps({f: _json_value(v) for f, v in zip(fields, row)}) + '\n'
+
+
+def csv_lines(rows, fields):
+    """Header line, then one CSV line per row"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    for row in rows:
+        writer.writerow([_json_value(v) for v in row])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def chunked(lines, chunk_size=CHUNK_SIZE):
+    """Join text lines into UTF-8 chunks of roughly chunk_size bytes"""
+    parts = []
+    size = 0
+    for line in lines:
+        parts.append(line)
+        size += len(line)
+        if size >= chunk_size:
+            yield ''.join(parts).encode('utf-8')
+            parts = []
+            size = 0
+    if parts:
+        yield ''.join(parts).encode('utf-8')
+
+
+def gzipped(chunks, level=6):
+    """Compress a stream of byte chunks into a single gzip member"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31: gzip header
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_stream(rows, fields, fmt='ndjson', gzip=False):
+    """
+    Byte chunks of rows exported as fmt ('ndjson' or 'csv')
+    rows: iterable of tuples in fields order
+    """
+    lines = csv_lines(rows, fields) if fmt == 'csv' else ndjson_lines(rows, fields)
+    chunks = chunked(lines)
+    return gzipped(chunks) if gzip else chunks
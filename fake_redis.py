@@ -0,0 +1,167 @@
+"""
+In-process stand-in for a Redis server
+Speaks the subset of the Redis protocol RedisCache uses (PING, AUTH,
+SELECT, GET, SET with EX/PX, DEL, SCAN, DBSIZE, FLUSHDB) on a local
+port, so the Redis backend can be checked and benchmarked without a
+real server. max_keys makes it evict the oldest key like an LRU policy
+
+Usage: python fake_redis.py [port]   (default 6379)
+"""
+
+import fnmatch
+import socketserver
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from cache_backend import read_reply
+
+
+def encode_reply(value):
+    if value is None:
+        return b'$-1\r\n'
+    if isinstance(value, int):
+        return b':%d\r\n' % value
+    if isinstance(value, list):
+        return b'*%d\r\n' % len(value) + b''.join(encode_reply(v) for v in value)
+    if isinstance(value, Exception):
+        return b'-ERR %s\r\n' % str(value).encode('utf-8')
+    if isinstance(value, str):
+        return b'+%s\r\n' % value.encode('utf-8')
+    return b'$%d\r\n%s\r\n' % (len(value), value)
+
+
+class FakeRedis:
+    """Key space with expiry and optional LRU eviction"""
+
+    def __init__(self, max_keys=None):
+        self.max_keys = max_keys
+        self.evicted = 0
+        self._data = OrderedDict()  # key -> (value, expires or None)
+        self._lock = threading.Lock()
+
+    def execute(self, args):
+        name = args[0].decode().upper()
+        handler = getattr(self, 'cmd_' + name.lower(), None)
+        if handler is None:
+            return ValueError(f"unknown command '{name}'")
+        with self._lock:
+            try:
+                return handler(*args[1:])
+            except (TypeError, ValueError) as e:
+                return ValueError(str(e))
+
+    def _live(self, key):
+        entry = self._data.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= time.monotonic():
+            del self._data[key]
+            return None
+        return entry
+
+    def cmd_ping(self, *args):
+        return 'PONG'
+
+    def cmd_auth(self, *args):
+        return 'OK'
+
+    def cmd_select(self, db):
+        return 'OK'
+
+    def cmd_get(self, key):
+        entry = self._live(key)
+        if entry is None:
+            return None
+        self._data.move_to_end(key)
+        return entry[0]
+
+    def cmd_set(self, key, value, *options):
+        expires = None
+        options = [o.decode().upper() if i % 2 == 0 else o for i, o in enumerate(options)]
+        for option, amount in zip(options[::2], options[1::2]):
+            if option == 'EX':
+                expires = time.monotonic() + int(amount)
+            elif option == 'PX':
+                expires = time.monotonic() + int(amount) / 1000
+            else:
+                raise ValueError('syntax error')
+        self._data.pop(key, None)
+        self._data[key] = (value, expires)
+        while self.max_keys is not None and len(self._data) > self.max_keys:
+            self._data.popitem(last=False)
+            self.evicted += 1
+        return 'OK'
+
+    def cmd_del(self, *keys):
+        return sum(1 for key in keys if self._data.pop(key, None) is not None)
+
+    def cmd_dbsize(self):
+        return len(self._data)
+
+    def cmd_flushdb(self, *args):
+        self._data.clear()
+        return 'OK'
+
+    def cmd_scan(self, cursor, *options):
+        pattern = '*'
+        count = 10
+        for option, value in zip(options[::2], options[1::2]):
+            if option.upper() == b'MATCH':
+                pattern = value.decode()
+            elif option.upper() == b'COUNT':
+                count = int(value)
+        keys = [k for k in list(self._data) if self._live(k) is not None]
+        start = int(cursor)
+        batch = keys[start:start + count]
+        end = start + count
+        matched = [k for k in batch if fnmatch.fnmatchcase(k.decode('utf-8', 'replace'), pattern)]
+        return [b'0' if end >= len(keys) else str(end).encode(), matched]
+
+
+class FakeRedisServer(socketserver.ThreadingTCPServer):
+    """
+    TCP server for a FakeRedis; port 0 picks a free port
+    Use as a context manager to serve from a background thread
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host='127.0.0.1', port=0, max_keys=None):
+        self.store = FakeRedis(max_keys)
+        super().__init__((host, port), _Handler)
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f'redis://{host}:{port}/0'
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.serve_forever, name='fake-redis', daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+
+
+class _Handler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        while True:
+            try:
+                args = read_reply(self.rfile)
+            except (ConnectionError, OSError):
+                return
+            if not isinstance(args, list) or not args:
+                return
+            self.wfile.write(encode_reply(self.server.store.execute(args)))
+
+
+if __name__ == '__main__':
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 6379
+    server = FakeRedisServer(port=port)
+    print(f"✅ Fake Redis listening on {server.url}")
+    server.serve_forever()
@@ -0,0 +1,109 @@
+"""
+Compression and conditional GET for the JSON API
+JSON bodies above a size threshold are gzipped for clients that accept
+it, and GET responses carry a weak ETag. Handlers whose data has a
+version (see data_version.py) check If-None-Match before doing any work;
+every other JSON response gets an ETag from a hash of its body.
+Cached bodies are stored with their gzipped bytes (see cache_value), so
+a cache hit is sent without compressing it again
+"""
+
+import gzip
+import hashlib
+import os
+
+# Smaller bodies are sent as they are
+GZIP_MIN_SIZE = int(os.environ.get('JSON_GZIP_MIN_SIZE', 1024))
+GZIP_LEVEL = 6
+
+# Responses may be stored but must be revalidated before every use
+REVALIDATE = 'private, no-cache'
+
+
+def version_etag(*parts):
+    """ETag value for data identified by a version, e.g. ('tasks', user_id, version, query)"""
+    return hashlib.sha1('|'.join(map(str, parts)).encode('utf-8')).hexdigest()[:20]
+
+
+def not_modified(etag):
+    """A 304 response if the request's If-None-Match has etag, else None"""
+    from flask import Response, request
+
+    if request.method != 'GET' or not request.if_none_match.contains_weak(etag):
+        return None
+    response = Response(status=304)
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = REVALIDATE
+    return response
+
+
+def with_etag(response, etag):
+    """Attach a weak ETag to a GET response built from versioned data"""
+    from flask import request
+
+    if request.method == 'GET' and response.status_code == 200:
+        response.set_etag(etag, weak=True)
+        response.headers['Cache-Control'] = REVALIDATE
+    return response
+
+
+def finish_json(response):
+    """
+    after_request hook: body-hash ETag (with 304) for JSON GET responses
+    that have none, then gzip when the client accepts it
+    """
+    from flask import request
+
+    if (response.mimetype != 'application/json' or response.direct_passthrough
+            or response.is_streamed or response.status_code != 200
+            or 'Content-Encoding' in response.headers):
+        return response
+    data = response.get_data()
+    if request.method == 'GET' and 'ETag' not in response.headers:
+        response.set_etag(hashlib.sha1(data).hexdigest()[:20], weak=True)
+        response.headers.setdefault('Cache-Control', REVALIDATE)
+        if request.if_none_match.contains_weak(response.get_etag()[0]):
+            response.status_code = 304
+            response.set_data(b'')
+            return response
+    if len(data) >= GZIP_MIN_SIZE:
+        response.vary.add('Accept-Encoding')
+        if request.accept_encodings['gzip']:
+            response.set_data(getattr(response, 'gzipped', None) or compress_json(data))
+            response.headers['Content-Encoding'] = 'gzip'
+    return response
+
+
+def compress_json(data):
+    """gzip a JSON body (mtime 0, so equal bodies compress to equal bytes)"""
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def cache_value(body):
+    """
+    Cache entry for a JSON body: its length, the body, then the gzipped
+    body when it is large enough to be sent compressed
+    """
+    gzipped = compress_json(body) if len(body) >= GZIP_MIN_SIZE else b''
+    return b'%d\n' % len(body) + body + gzipped
+
+
+def from_cache_value(value):
+    """(body, gzipped body or None) of a cache_value entry"""
+    length, rest = value.split(b'\n', 1)
+    length = int(length)
+    return rest[:length], rest[length:] or None
+
+
+def cached_response(value):
+    """JSON response for a cache_value entry; finish_json sends its stored gzip bytes"""
+    from flask import Response
+
+    body, gzipped = from_cache_value(value)
+    response = Response(body, mimetype='application/json')
+    response.gzipped = gzipped
+    return response
+
+
+def install(app):
+    app.after_request(finish_json)
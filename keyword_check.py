@@ -0,0 +1,98 @@
+"""
+Score check for the keyword matcher
+Scores typical task texts (the generated benchmark texts plus common
+phrasings such as plurals and -ing forms) with the compiled matcher and
+with the original per-keyword substring checks, and fails if any task's
+score or reasons differ
+
+Usage: python keyword_check.py [num_texts]
+"""
+
+import os
+import random
+import sys
+from datetime import timedelta
+from types import SimpleNamespace
+
+# Texts whose keywords appear inside longer words
+TYPICAL_TEXTS = [
+    'Calls with the landlord', 'Schedule meetings for next week', 'Track deadlines for Q3',
+    'Calling the bank about the card', 'Team meeting notes', 'Prepare presentations',
+    'Answer emails now', 'Know your numbers', 'Buy a new keyboard', 'Keynote slides',
+    'Urgently fix the login bug', 'Recall the order', 'Todays shopping list',
+    'Must-read articles', 'Think about moving', 'Eventually clean the attic',
+    'Maybe learn piano someday', 'Critical bug fix ASAP', 'Important client appointment',
+]
+
+
+def legacy_analyze_keywords(text):
+    """The pre-matcher implementation (lists rebuilt per call, substring match)"""
+    text_lower = text.lower()
+    boost = 0
+    reasons = []
+    urgent_keywords = ['urgent', 'asap', 'critical', 'emergency', 'now', 'immediately', 'crisis']
+    for keyword in urgent_keywords:
+        if keyword in text_lower:
+            boost += 25
+            reasons.append(f"🚨 Contains '{keyword}'")
+            break
+    important_keywords = ['important', 'crucial', 'essential', 'vital', 'key', 'priority', 'must']
+    for keyword in important_keywords:
+        if keyword in text_lower:
+            boost += 15
+            reasons.append(f"❗ Contains '{keyword}'")
+            break
+    time_keywords = ['today', 'tonight', 'deadline', 'meeting', 'call', 'appointment', 'presentation']
+    for keyword in time_keywords:
+        if keyword in text_lower:
+            boost += 10
+            break
+    negative_keywords = ['maybe', 'someday', 'eventually', 'consider', 'think about']
+    for keyword in negative_keywords:
+        if keyword in text_lower:
+            boost -= 15
+            reasons.append(f"💭 Seems optional ('{keyword}')")
+            break
+    return boost, reasons
+
+
+def typical_texts(n, seed=42):
+    """TYPICAL_TEXTS plus n texts made like benchmarks/generate_data.py makes them"""
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks'))
+    from generate_data import VERBS, task_text
+
+    rng = random.Random(seed)
+    return TYPICAL_TEXTS + [task_text(rng, rng.choice(list(VERBS))) for _ in range(n)]
+
+
+def check_keyword_scores(n=5000):
+    """Returns True if every typical text scores as it did with the substring checks"""
+    import priority_algorithm
+
+    now = priority_algorithm.local_now()
+    tasks = [SimpleNamespace(id=i, text=text, priority='medium', category='work', due_date=now + timedelta(days=2),
+                             estimated_time=30, importance=3, created_at=now - timedelta(days=3))
+             for i, text in enumerate(typical_texts(n))]
+
+    current = [priority_algorithm.calculate_master_priority(task, now) for task in tasks]
+    compiled = priority_algorithm.analyze_keywords
+    priority_algorithm.analyze_keywords = legacy_analyze_keywords
+    try:
+        legacy = [priority_algorithm.calculate_master_priority(task, now) for task in tasks]
+    finally:
+        priority_algorithm.analyze_keywords = compiled
+
+    print("\nChecking keyword scores against the substring checks...")
+    changed = [(task.text, old, new) for task, old, new in zip(tasks, legacy, current) if old != new]
+    for text, old, new in changed[:20]:
+        print(f"❌ {text!r}: {old[0]} {old[1]} -> {new[0]} {new[1]}")
+    if changed:
+        print(f"❌ {len(changed)} of {len(tasks)} task scores changed")
+        return False
+    print(f"✓ {len(tasks)} task texts, {len(TYPICAL_TEXTS)} of them hand-picked")
+    print("✅ Keyword scores are unchanged")
+    return True
+
+
+if __name__ == '__main__':
+    sys.exit(0 if check_keyword_scores(int(sys.argv[1]) if len(sys.argv) > 1 else 5000) else 1)
@@ -0,0 +1,108 @@
+"""
+Compiled keyword matcher for task text
+Keyword lists are prepared once per locale instead of on every call,
+results are memoized per text, and whole-word matching runs every
+keyword category in a single regex scan
+"""
+
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+# One scoring category: keywords are checked in list order and only the
+# first one present counts. reason is a format string using {keyword},
+# or None for categories that only adjust the score.
+KeywordCategory = namedtuple('KeywordCategory', ['name', 'keywords', 'boost', 'reason'])
+
+
+class KeywordMatcher:
+    """
+    Multi-pattern matcher built once from a list of KeywordCategory
+
+    By default a keyword matches anywhere in the text, like the original
+    substring checks ("calls" and "meetings" hit "call" and "meeting", but
+    "know" also hits "now"). word_boundary=True only matches whole words;
+    it changes the scores of existing tasks, so it is opt-in per locale.
+    """
+
+    def __init__(self, categories, word_boundary=False, cache_size=4096):
+        self.categories = [
+            KeywordCategory(c.name, tuple(k.lower() for k in c.keywords), c.boost, c.reason)
+            for c in categories
+        ]
+        self.word_boundary = word_boundary
+        # Task texts repeat across requests, so results are memoized
+        self._match_cached = lru_cache(maxsize=cache_size)(self._match)
+
+        # keyword -> (category index, position within the category, boost, reason)
+        self._rank = {}
+        for index, category in enumerate(self.categories):
+            for position, keyword in enumerate(category.keywords):
+                reason = category.reason.format(keyword=keyword) if category.reason else None
+                self._rank.setdefault(keyword, (index, position, category.boost, reason))
+
+        if word_boundary:
+            # Longest first so a keyword is never shadowed by a shorter prefix
+            alternation = '|'.join(re.escape(k) for k in sorted(self._rank, key=lambda k: (-len(k), k)))
+            self._pattern = re.compile(rf'\b({alternation})\b')
+        else:
+            # `in` checks per category beat one overlapping-match regex scan
+            # (a lookahead at every position) on short task texts
+            self._pattern = None
+            self._checks = [
+                (category.keywords, {
+                    keyword: (category.boost, category.reason.format(keyword=keyword) if category.reason else None)
+                    for keyword in category.keywords
+                })
+                for category in self.categories
+            ]
+
+    def find(self, text):
+        """Set of keywords present in text"""
+        text = text.lower()
+        if self._pattern is None:
+            return {keyword for keyword in self._rank if keyword in text}
+        return set(self._pattern.findall(text))
+
+    def match(self, text):
+        """Returns: (score boost, reasons list)"""
+        boost, reasons = self._match_cached(text)
+        return boost, list(reasons)
+
+    def _match(self, text):
+        if self._pattern is None:
+            return self._match_substrings(text.lower())
+        found = self._pattern.findall(text.lower())
+        if not found:
+            return 0, ()
+
+        # Only the earliest-listed keyword of each category counts
+        best = {}
+        for keyword in found:
+            rank = self._rank[keyword]
+            current = best.get(rank[0])
+            if current is None or rank[1] < current[1]:
+                best[rank[0]] = rank
+
+        boost = 0
+        reasons = []
+        for index in sorted(best):
+            rank = best[index]
+            boost += rank[2]
+            if rank[3]:
+                reasons.append(rank[3])
+        return boost, tuple(reasons)
+
+    def _match_substrings(self, text):
+        # The first keyword of each category found anywhere in the text counts
+        boost = 0
+        reasons = []
+        for keywords, hits in self._checks:
+            for keyword in keywords:
+                if keyword in text:
+                    category_boost, reason = hits[keyword]
+                    boost += category_boost
+                    if reason:
+                        reasons.append(reason)
+                    break
+        return boost, tuple(reasons)
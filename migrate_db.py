@@ -1,13 +1,40 @@
 """
 Database migration script for Task Buddy
 Adds new columns for admin dashboard and review system
+Converts task date columns to timezone-aware datetimes
+Creates the indexes declared on the models
 """
 
+import os
+import re
 import sqlite3
-from datetime import datetime
+from datetime import datetime, timezone
 
-def migrate_database():
-    conn = sqlite3.connect('tasks.db')
+from sqlalchemy import create_engine, inspect, text
+
+# Task columns stored as timezone-aware DateTime (UTC)
+TASK_DATETIME_COLUMNS = ('due_date', 'created_at', 'completed_at', 'deleted_at')
+
+# SQLAlchemy's SQLite DATETIME storage format (already-migrated values)
+SQLITE_DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S.%f'
+SQLITE_DATETIME_RE = re.compile(r'^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}')
+
+
+def get_database_url():
+    """DATABASE_URL (PostgreSQL in production) or the local SQLite database"""
+    database_url = os.environ.get('DATABASE_URL')
+    if database_url:
+        if database_url.startswith('postgres://'):
+            database_url = database_url.replace('postgres://', 'postgresql://', 1)
+        return database_url
+    
+    db_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'tasks.db')
+    if not os.path.exists(db_path):
+        db_path = 'tasks.db'
+    return f'sqlite:///{db_path}'
+
+def migrate_database(db_path='tasks.db'):
+    conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
     
     print("Starting database migration...")
@@ -92,5 +119,121 @@ def migrate_database():
     print("   python -c \"import sqlite3; c=sqlite3.connect('tasks.db'); c.execute('UPDATE user SET is_admin=1 WHERE email=\\\"YOUR_EMAIL\\\"'); c.commit()\"")
     print("2. Restart your server: python server.py")
 
+
+def to_utc_storage(value):
+    """
+    Convert a legacy ISO 8601 string to the UTC storage format
+    Naive values were written in server local time
+    Returns None for values that cannot be parsed
+    """
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.astimezone()
+    return parsed.astimezone(timezone.utc).strftime(SQLITE_DATETIME_FORMAT)
+
+
+def migrate_task_datetimes(engine):
+    """Convert Task date strings to timezone-aware DateTime values"""
+    print("\nConverting task date columns to timezone-aware datetimes...")
+    
+    with engine.begin() as conn:
+        if not inspect(conn).has_table('task'):
+            print("✓ No task table yet (created by the server)")
+            return
+        
+        if engine.dialect.name == 'postgresql':
+            # Naive strings are interpreted in the session time zone. The
+            # cast goes through a session-local function that returns NULL
+            # instead of failing, so one malformed legacy value cannot
+            # abort the whole migration. Only date-like strings are cast
+            # (not PostgreSQL's special inputs such as 'now' or 'today')
+            conn.execute(text(
+                "CREATE FUNCTION pg_temp.to_timestamptz(value text) RETURNS timestamptz AS $$ "
+                "BEGIN "
+                "IF value !~ '^\\d{4}-\\d{2}-\\d{2}' THEN RETURN NULL; END IF; "
+                "RETURN value::timestamptz; "
+                "EXCEPTION WHEN others THEN RETURN NULL; "
+                "END $$ LANGUAGE plpgsql"
+            ))
+            for column in TASK_DATETIME_COLUMNS:
+                data_type = conn.execute(text(
+                    "SELECT data_type FROM information_schema.columns "
+                    "WHERE table_name = 'task' AND column_name = :column"
+                ), {'column': column}).scalar()
+                if data_type is None:
+                    print(f"⚠️ task.{column} is missing - add it as TIMESTAMP WITH TIME ZONE")
+                    continue
+                if data_type == 'timestamp with time zone':
+                    print(f"✓ task.{column} already converted")
+                    continue
+                unparseable = conn.execute(text(
+                    f"SELECT COUNT(*) FROM task WHERE {column} <> '' "
+                    f"AND pg_temp.to_timestamptz({column}::text) IS NULL"
+                )).scalar()
+                conn.execute(text(
+                    f"ALTER TABLE task ALTER COLUMN {column} TYPE TIMESTAMP WITH TIME ZONE "
+                    f"USING pg_temp.to_timestamptz({column}::text)"
+                ))
+                print(f"✓ task.{column} converted")
+                if unparseable:
+                    print(f"⚠️ Cleared {unparseable} unparseable task.{column} values")
+            return
+        
+        # SQLite has no native datetime type: rewrite the stored strings in
+        # the format SQLAlchemy's DateTime reads back (UTC)
+        rows = conn.execute(text(
+            f"SELECT id, {', '.join(TASK_DATETIME_COLUMNS)} FROM task"
+        )).fetchall()
+        
+        converted_rows = set()
+        unparseable = 0
+        for index, column in enumerate(TASK_DATETIME_COLUMNS, 1):
+            updates = []
+            for row in rows:
+                value = row[index]
+                if value is None or SQLITE_DATETIME_RE.match(value):
+                    continue  # Empty or already migrated
+                converted = to_utc_storage(value) if value else None
+                if value and converted is None:
+                    unparseable += 1
+                updates.append({'id': row[0], 'value': converted})
+                converted_rows.add(row[0])
+            if updates:
+                conn.execute(text(f"UPDATE task SET {column} = :value WHERE id = :id"), updates)
+        
+        print(f"✓ Converted {len(converted_rows)} task rows")
+        if unparseable:
+            print(f"⚠️ Cleared {unparseable} unparseable date values")
+
+
+def create_indexes():
+    """Create any index declared on the server models that is missing"""
+    # Imported here: the server connects to the same DATABASE_URL and
+    # creates missing tables on import
+    from server import app, db
+    
+    print("\nCreating indexes...")
+    with app.app_context():
+        for table in db.metadata.sorted_tables:
+            existing = {i['name'] for i in db.inspect(db.engine).get_indexes(table.name)}
+            for index in sorted(table.indexes, key=lambda i: i.name):
+                if index.name in existing:
+                    print(f"✓ {index.name} already exists")
+                    continue
+                index.create(bind=db.engine)
+                print(f"✓ {index.name} created")
+
+
 if __name__ == '__main__':
-    migrate_database()
+    from query_plans import check_query_plans
+    
+    database_url = get_database_url()
+    # A new database gets every column from the server's models
+    if database_url.startswith('sqlite:///') and os.path.exists(database_url[len('sqlite:///'):]):
+        migrate_database(database_url[len('sqlite:///'):])
+    migrate_task_datetimes(create_engine(database_url))
+    create_indexes()
+    check_query_plans()
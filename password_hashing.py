@@ -0,0 +1,160 @@
+"""
+Password hashing off the request threads
+Hashes are computed by a small process pool per worker, at a lower CPU
+priority, so a burst of logins queues behind a fixed number of hashing
+processes instead of taking every core from the API. Admission is
+bounded: a request waits briefly for a slot and is then turned away
+(HasherBusy, answered with 503 + Retry-After), so waiting logins never
+hold more than a few of the server's request threads
+
+The hashing processes are spawned, not forked: the server process runs
+threads (activity writer, profiler, request threads) and a fork taken
+while one of them holds a lock can deadlock the child. Like any spawned
+process they import the main module first; when that imports the app
+(`python server.py`, scripts without an `if __name__ == '__main__':`
+guard), the copy inside a hashing process hashes inline
+
+The cost is a werkzeug method string (PASSWORD_HASH_METHOD, e.g.
+scrypt:16384:8:1 or pbkdf2:sha256:600000). A stored hash made with other
+parameters is replaced after the next successful login
+"""
+
+import functools
+import multiprocessing
+import multiprocessing.connection
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+DEFAULT_METHOD = 'scrypt:32768:8:1'  # werkzeug's default scrypt parameters
+
+
+class HasherBusy(Exception):
+    """No hashing slot became free within the admission deadline"""
+
+
+@functools.lru_cache(maxsize=8)
+def method_prefix(method):
+    """The parameters werkzeug stores for method, e.g. 'pbkdf2' -> 'pbkdf2:sha256:1000000'"""
+    return generate_password_hash('', method).split('$', 1)[0]
+
+
+def hash_password(password, method):
+    return generate_password_hash(password, method)
+
+
+def verify_password(pwhash, password, method):
+    """
+    (matches, new hash or None); the new hash is set when the password
+    matches but pwhash was made with other parameters than method
+    """
+    if not check_password_hash(pwhash, password):
+        return False, None
+    if pwhash.split('$', 1)[0] == method_prefix(method):
+        return True, None
+    return True, generate_password_hash(password, method)
+
+
+def bootstrapping():
+    """
+    True while a spawned process imports the main module, when it may
+    not start processes (multiprocessing's own check uses this flag)
+    """
+    return getattr(multiprocessing.current_process(), '_inheriting', False)
+
+
+def init_hashing_process(niceness):
+    if niceness:
+        os.nice(niceness)
+    # Exit with the server process, also when it is killed without cleanup
+    parent = multiprocessing.parent_process()
+    threading.Thread(target=exit_with_parent, args=(parent.sentinel,), daemon=True).start()
+
+
+def exit_with_parent(sentinel):
+    multiprocessing.connection.wait([sentinel])
+    os._exit(0)
+
+
+class PasswordHasher:
+    """
+    workers: hashing processes per worker (0 hashes in the request thread)
+    max_pending: hashes running or queued at once, kept below the request threads;
+    more wait up to `wait` seconds
+    niceness: added to the hashing processes' nice value
+    """
+
+    def __init__(self, method=DEFAULT_METHOD, workers=1, max_pending=4, wait=0.25, niceness=10):
+        self.method = method
+        self.workers = workers
+        self.wait = wait
+        self.niceness = niceness
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._pool = None
+        self._pool_pid = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """
+        Start the hashing processes now rather than on the first login
+        Called at import, before the app starts its threads
+        """
+        if self.workers and not bootstrapping():
+            executor = self._executor()
+            for _ in range(self.workers):
+                executor.submit(os.getpid)  # Processes start on submit
+
+    def hash(self, password):
+        return self._run(hash_password, password, self.method)
+
+    def verify(self, pwhash, password):
+        """(matches, new hash or None), see verify_password"""
+        return self._run(verify_password, pwhash, password, self.method)
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(timeout=self.wait):
+            raise HasherBusy()
+        try:
+            if not self.workers or bootstrapping():
+                return fn(*args)
+            try:
+                return self._executor().submit(fn, *args).result()
+            except BrokenProcessPool:
+                # A hashing process died (e.g. OOM-killed): start a new pool once
+                self._reset()
+                return self._executor().submit(fn, *args).result()
+        finally:
+            self._slots.release()
+
+    def _executor(self):
+        # A server worker forked after start() (gunicorn --preload) starts its own pool
+        with self._lock:
+            if self._pool is None or self._pool_pid != os.getpid():
+                self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'),
+                                                 initializer=init_hashing_process, initargs=(self.niceness,))
+                self._pool_pid = os.getpid()
+            return self._pool
+
+    def _reset(self):
+        with self._lock:
+            if self._pool is not None and self._pool_pid == os.getpid():
+                self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+def from_environment():
+    """
+    PasswordHasher configured by PASSWORD_HASH_METHOD, PASSWORD_HASH_WORKERS
+    (default 1), PASSWORD_HASH_QUEUE (default 4), PASSWORD_HASH_WAIT (seconds,
+    default 0.25) and PASSWORD_HASH_NICE (default 10)
+    """
+    return PasswordHasher(
+        method=os.environ.get('PASSWORD_HASH_METHOD', DEFAULT_METHOD),
+        workers=int(os.environ.get('PASSWORD_HASH_WORKERS', 1)),
+        max_pending=int(os.environ.get('PASSWORD_HASH_QUEUE', 4)),
+        wait=float(os.environ.get('PASSWORD_HASH_WAIT', 0.25)),
+        niceness=int(os.environ.get('PASSWORD_HASH_NICE', 10)),
+    )
@@ -3,8 +3,11 @@ Advanced Task Prioritization Algorithm
 Based on scientific research and modern productivity systems
 """
 
+from collections import namedtuple
 from datetime import datetime, timedelta
 
+from keyword_matcher import KeywordCategory, KeywordMatcher
+
 # Category weights based on life impact research
 CATEGORY_WEIGHTS = {
     'health': 2.0,       # Highest priority (well-being)
@@ -15,7 +18,49 @@ CATEGORY_WEIGHTS = {
     'general': 1.0
 }
 
-def calculate_master_priority(task):
+# Priority level multipliers applied to the combined score
+PRIORITY_MULTIPLIERS = {
+    'urgent': 1.3,
+    'high': 1.15,
+    'medium': 1.0,
+    'low': 0.85
+}
+
+# Keyword categories for analyze_keywords, per locale
+# Within a category keywords are checked in order and the first match wins
+DEFAULT_LOCALE = 'en'
+KEYWORD_CATEGORIES = {
+    'en': [
+        # Urgent keywords (highest weight)
+        KeywordCategory('urgent', ('urgent', 'asap', 'critical', 'emergency', 'now', 'immediately', 'crisis'),
+                        25, "🚨 Contains '{keyword}'"),
+        # Important keywords
+        KeywordCategory('important', ('important', 'crucial', 'essential', 'vital', 'key', 'priority', 'must'),
+                        15, "❗ Contains '{keyword}'"),
+        # Time-sensitive keywords
+        KeywordCategory('time', ('today', 'tonight', 'deadline', 'meeting', 'call', 'appointment', 'presentation'),
+                        10, None),
+        # Negative keywords (reduce priority)
+        KeywordCategory('negative', ('maybe', 'someday', 'eventually', 'consider', 'think about'),
+                        -15, "💭 Seems optional ('{keyword}')"),
+    ]
+}
+
+# Compiled once at import time (substring matching, as the scores always used)
+KEYWORD_MATCHERS = {
+    locale: KeywordMatcher(categories)
+    for locale, categories in KEYWORD_CATEGORIES.items()
+}
+
+def local_now():
+    """
+    Current local time as a timezone-aware datetime
+    Task dates are aware, and energy alignment uses the local hour
+    """
+    return datetime.now().astimezone()
+
+
+def calculate_master_priority(task, now=None):
     """
     Master priority algorithm combining multiple proven techniques:
     - Eisenhower Matrix (Urgent-Important)
@@ -25,152 +70,125 @@ def calculate_master_priority(task):
     - Task aging penalty
     - Keyword detection
     
+    Task dates are timezone-aware datetimes. Pass now (aware) to score
+    against a fixed clock; it defaults to local_now().
     Returns: (score 0-100, reasons list, time_recommendation)
     """
     
-    score = 0
-    reasons = []
-    
-    # === 1. URGENCY SCORE (30% weight) - Eisenhower Matrix ===
-    urgency_score = calculate_urgency_score(task)
-    score += urgency_score * 0.30
-    
-    if urgency_score >= 95:
-        reasons.append("⚠️ OVERDUE - Critical!")
-    elif urgency_score >= 85:
-        reasons.append("📅 Due today")
-    elif urgency_score >= 70:
-        reasons.append("📅 Due very soon")
-    
-    # === 2. IMPORTANCE SCORE (25% weight) ===
-    importance_score = (task.importance or 3) * 20  # 1-5 scale to 0-100
-    score += importance_score * 0.25
+    if now is None:
+        now = local_now()
     
-    if task.importance >= 4:
-        reasons.append(f"⭐ High importance ({task.importance}/5)")
+    terms = task_terms(task)
+    return combine_terms(
+        terms,
+        urgency_for_due_date(task.due_date, now),
+        energy_for_hour(now.hour, terms.category, terms.estimated_mins),
+        age_penalty_for_created_at(task.created_at, now)
+    )
+
+
+def finalize_score(score):
+    """Apply diminishing returns and the 120 cap, then round"""
+    # === DIMINISHING RETURNS FOR VERY HIGH SCORES ===
+    # Prevent one factor from dominating
+    if score > 100:
+        score = 100 + (score - 100) * 0.3
     
-    # === 3. EFFORT OPTIMIZATION (15% weight) - WSJF ===
-    # Favors quick wins (15 min) and medium tasks (30-60 min)
-    # Penalizes very long tasks unless importance is high
-    estimated_mins = task.estimated_time or 30
+    # Cap at 120 for extreme cases
+    score = min(score, 120)
     
+    return round(score, 2)
+
+
+def calculate_effort_score(estimated_mins):
+    """
+    WSJF effort score: favors quick wins (15 min) and medium tasks (30-60 min),
+    penalizes very long tasks
+    """
     if estimated_mins <= 15:
-        effort_score = 100  # Quick win!
-        reasons.append("⚡ Quick win (15 min)")
+        return 100  # Quick win!
     elif estimated_mins <= 30:
-        effort_score = 90
+        return 90
     elif estimated_mins <= 60:
-        effort_score = 70
+        return 70
     elif estimated_mins <= 120:
-        effort_score = 50
-        if task.importance >= 4:
-            reasons.append("🐸 Big task - eat the frog")
+        return 50
     else:
-        effort_score = 30
-        if task.importance >= 4:
-            reasons.append("🐘 Major project - break it down")
-    
-    score += effort_score * 0.15
+        return 30
+
+
+def calculate_urgency_score(task, now=None):
+    """Calculate urgency based on due date"""
+    return urgency_for_due_date(task.due_date, now or local_now())
+
+
+def urgency_for_due_date(due, now):
+    """Urgency score for a due date (aware datetime or None) relative to now"""
+    if due is None:
+        return 20  # Low urgency if no deadline
     
-    # === 4. ENERGY ALIGNMENT (10% weight) ===
-    energy_score = calculate_energy_alignment(task)
-    score += energy_score * 0.10
+    remaining = due - now
+    days_until = remaining.days
+    hours_until = remaining.total_seconds() / 3600
     
-    time_recommendation = get_optimal_time_recommendation(task)
+    if days_until < 0:
+        # Overdue - exponential urgency
+        days_overdue = abs(days_until)
+        return min(100 + days_overdue * 5, 150)  # Can go above 100!
     
-    # === 5. CATEGORY WEIGHT (10% weight) ===
-    category_multiplier = CATEGORY_WEIGHTS.get(task.category, 1.0)
-    category_score = category_multiplier * 50  # Normalize to 0-100
-    score += category_score * 0.10
+    elif hours_until <= 4:
+        return 100  # Due in hours
     
-    if category_multiplier >= 1.5:
-        reasons.append(f"💎 High-impact category ({task.category})")
+    elif days_until == 0:
+        return 95  # Due today
     
-    # === 6. TASK AGING (5% weight) - Don't forget old tasks ===
-    age_score = calculate_task_age_penalty(task)
-    score += age_score * 0.05
+    elif days_until == 1:
+        return 85  # Due tomorrow
     
-    if age_score > 20:
-        reasons.append("⏰ Task aging - don't forget!")
+    elif days_until <= 3:
+        return 70  # Due this week
     
-    # === 7. KEYWORD ANALYSIS (5% weight) ===
-    keyword_boost, keyword_reasons = analyze_keywords(task.text)
-    score += keyword_boost
-    reasons.extend(keyword_reasons)
-    
-    # === PRIORITY LEVEL MULTIPLIER ===
-    priority_multipliers = {
-        'urgent': 1.3,
-        'high': 1.15,
-        'medium': 1.0,
-        'low': 0.85
-    }
-    score *= priority_multipliers.get(task.priority, 1.0)
+    elif days_until <= 7:
+        return 50
     
-    # === DIMINISHING RETURNS FOR VERY HIGH SCORES ===
-    # Prevent one factor from dominating
-    if score > 100:
-        score = 100 + (score - 100) * 0.3
+    elif days_until <= 14:
+        return 35
     
-    # Cap at 120 for extreme cases
-    score = min(score, 120)
+    elif days_until <= 30:
+        return 25
     
-    return round(score, 2), reasons, time_recommendation
+    else:
+        return 15
 
 
-def calculate_urgency_score(task):
-    """Calculate urgency based on due date"""
-    if not task.due_date:
-        return 20  # Low urgency if no deadline
+def urgency_valid_until(due, now):
+    """
+    Instant at which urgency_for_due_date(due, ...) may next change,
+    or None if it never will (no due date)
+    """
+    if due is None:
+        return None
     
-    try:
-        due = datetime.fromisoformat(task.due_date.replace('Z', '+00:00'))
-        now = datetime.now()
-        days_until = (due - now).days
-        hours_until = (due - now).total_seconds() / 3600
-        
-        if days_until < 0:
-            # Overdue - exponential urgency
-            days_overdue = abs(days_until)
-            return min(100 + days_overdue * 5, 150)  # Can go above 100!
-        
-        elif hours_until <= 4:
-            return 100  # Due in hours
-        
-        elif days_until == 0:
-            return 95  # Due today
-        
-        elif days_until == 1:
-            return 85  # Due tomorrow
-        
-        elif days_until <= 3:
-            return 70  # Due this week
-        
-        elif days_until <= 7:
-            return 50
-        
-        elif days_until <= 14:
-            return 35
-        
-        elif days_until <= 30:
-            return 25
-        
-        else:
-            return 15
+    remaining = due - now
     
-    except:
-        return 20
+    # The score depends on whole days remaining and on the 4-hour mark
+    boundaries = [due - timedelta(days=remaining.days)]
+    if remaining > timedelta(hours=4):
+        boundaries.append(due - timedelta(hours=4))
+    return min(boundaries)
 
 
-def calculate_energy_alignment(task):
+def calculate_energy_alignment(task, now=None):
     """
     Match task to optimal time based on circadian rhythm research
     Based on Daniel Pink's "When" - peak, trough, recovery
     """
-    current_hour = datetime.now().hour
-    estimated_mins = task.estimated_time or 30
-    category = task.category
-    
+    current_hour = (now or local_now()).hour
+    return energy_for_hour(current_hour, task.category, task.estimated_time or 30)
+
+
+def energy_for_hour(current_hour, category, estimated_mins):
+    """Energy alignment score for a category/duration at a given hour"""
     # PEAK HOURS (9-11 AM): Analytical, deep work
     if 9 <= current_hour <= 11:
         if category in ['work', 'learning', 'finance']:
@@ -235,9 +253,11 @@ def calculate_energy_alignment(task):
 
 def get_optimal_time_recommendation(task):
     """Recommend the best time to do this task"""
-    estimated_mins = task.estimated_time or 30
-    category = task.category
-    
+    return time_recommendation_for(task.category, task.estimated_time or 30)
+
+
+def time_recommendation_for(category, estimated_mins):
+    """Best time of day for a category/duration"""
     if category in ['work', 'learning', 'finance'] and estimated_mins >= 60:
         return "Best: 9-11 AM (peak focus time)"
     
@@ -254,94 +274,182 @@ def get_optimal_time_recommendation(task):
         return "Best: 9 AM - 1 PM (morning energy)"
 
 
-def calculate_task_age_penalty(task):
+def calculate_task_age_penalty(task, now=None):
     """Penalize old tasks to prevent indefinite postponement"""
-    if not task.created_at:
+    return age_penalty_for_created_at(task.created_at, now or local_now())
+
+
+def age_penalty_for_created_at(created, now):
+    """Aging penalty for a creation time (aware datetime or None) relative to now"""
+    if created is None:
         return 0
     
-    try:
-        created = datetime.fromisoformat(task.created_at)
-        age_days = (datetime.now() - created).days
-        
-        if age_days >= 60:
-            return 50  # Severe penalty
-        elif age_days >= 30:
-            return 35
-        elif age_days >= 14:
-            return 20
-        elif age_days >= 7:
-            return 10
-        else:
-            return 0
-    except:
+    age_days = (now - created).days
+    
+    if age_days >= 60:
+        return 50  # Severe penalty
+    elif age_days >= 30:
+        return 35
+    elif age_days >= 14:
+        return 20
+    elif age_days >= 7:
+        return 10
+    else:
         return 0
 
 
-def analyze_keywords(text):
+def age_penalty_valid_until(created, now):
+    """
+    Instant at which age_penalty_for_created_at(created, ...) may next
+    change, or None once the last aging threshold has passed
+    """
+    if created is None:
+        return None
+    
+    age_days = (now - created).days
+    
+    for threshold in (7, 14, 30, 60):
+        if age_days < threshold:
+            return created + timedelta(days=threshold)
+    return None
+
+
+def analyze_keywords(text, locale=DEFAULT_LOCALE):
     """Detect priority keywords in task text"""
-    text_lower = text.lower()
-    boost = 0
-    reasons = []
+    return get_keyword_matcher(locale).match(text)
+
+
+def get_keyword_matcher(locale=DEFAULT_LOCALE):
+    """Compiled matcher for a locale (falls back to the default locale)"""
+    return KEYWORD_MATCHERS.get(locale) or KEYWORD_MATCHERS[DEFAULT_LOCALE]
+
+
+def register_keyword_locale(locale, categories, word_boundary=False):
+    """Compile and register the keyword categories for a locale"""
+    KEYWORD_MATCHERS[locale] = KeywordMatcher(categories, word_boundary=word_boundary)
+    return KEYWORD_MATCHERS[locale]
+
+
+# Time-independent part of a task's score (see task_terms)
+StaticTerms = namedtuple('StaticTerms', [
+    'importance_score', 'effort_score', 'category_score', 'keyword_boost', 'multiplier',
+    'effort_reasons', 'category_reasons', 'keyword_reasons',
+    'category', 'estimated_mins', 'time_recommendation'
+])
+
+
+def task_terms(task):
+    """
+    Time-independent scoring terms of a task
     
-    # Urgent keywords (highest weight)
-    urgent_keywords = ['urgent', 'asap', 'critical', 'emergency', 'now', 'immediately', 'crisis']
-    for keyword in urgent_keywords:
-        if keyword in text_lower:
-            boost += 25
-            reasons.append(f"🚨 Contains '{keyword}'")
-            break  # Only count once
-    
-    # Important keywords
-    important_keywords = ['important', 'crucial', 'essential', 'vital', 'key', 'priority', 'must']
-    for keyword in important_keywords:
-        if keyword in text_lower:
-            boost += 15
-            reasons.append(f"❗ Contains '{keyword}'")
-            break
+    These only change when the task row changes, so callers may cache
+    them and recompute just urgency, energy and aging as time passes.
+    """
+    importance = task.importance
+    minutes = task.estimated_time or 30
+    category = task.category
     
-    # Time-sensitive keywords
-    time_keywords = ['today', 'tonight', 'deadline', 'meeting', 'call', 'appointment', 'presentation']
-    for keyword in time_keywords:
-        if keyword in text_lower:
-            boost += 10
-            break
+    # === IMPORTANCE SCORE (25% weight) ===
+    importance_score = (importance or 3) * 20  # 1-5 scale to 0-100
     
-    # Negative keywords (reduce priority)
-    negative_keywords = ['maybe', 'someday', 'eventually', 'consider', 'think about']
-    for keyword in negative_keywords:
-        if keyword in text_lower:
-            boost -= 15
-            reasons.append(f"💭 Seems optional ('{keyword}')")
-            break
+    # === EFFORT OPTIMIZATION (15% weight) - WSJF ===
+    # Favors quick wins (15 min) and medium tasks (30-60 min)
+    # Penalizes very long tasks unless importance is high
+    effort_score = calculate_effort_score(minutes)
+    effort_reasons = []
+    if importance >= 4:
+        effort_reasons.append(f"⭐ High importance ({importance}/5)")
+    if effort_score == 100:
+        effort_reasons.append("⚡ Quick win (15 min)")
+    elif effort_score == 50 and importance >= 4:
+        effort_reasons.append("🐸 Big task - eat the frog")
+    elif effort_score == 30 and importance >= 4:
+        effort_reasons.append("🐘 Major project - break it down")
+    
+    # === CATEGORY WEIGHT (10% weight) ===
+    category_multiplier = CATEGORY_WEIGHTS.get(category, 1.0)
+    category_reasons = (f"💎 High-impact category ({category})",) if category_multiplier >= 1.5 else ()
+    
+    # === KEYWORD ANALYSIS (5% weight) ===
+    keyword_boost, keyword_reasons = analyze_keywords(task.text)
     
-    return boost, reasons
+    return StaticTerms(
+        importance_score, effort_score, category_multiplier * 50, keyword_boost,
+        PRIORITY_MULTIPLIERS.get(task.priority, 1.0),
+        tuple(effort_reasons), category_reasons, tuple(keyword_reasons),
+        category, minutes, time_recommendation_for(category, minutes)
+    )
 
 
-def create_daily_plan(tasks, max_tasks=5):
+def combine_terms(terms, urgency_score, energy_score, age_score):
     """
-    Create optimized daily plan using decision science
-    Limits to 3-5 tasks to prevent decision fatigue
+    Combine static terms with the time-dependent scores
+    
+    The one place a score is computed: calculate_master_priority and the
+    score cache both end here, so cached and fresh scores are identical.
+    Returns: (score, reasons list, time_recommendation)
+    """
+    score = (urgency_score * 0.30 + terms.importance_score * 0.25 + terms.effort_score * 0.15
+             + energy_score * 0.10 + terms.category_score * 0.10 + age_score * 0.05
+             + terms.keyword_boost) * terms.multiplier
+    
+    reasons = []
+    if urgency_score >= 95:
+        reasons.append("⚠️ OVERDUE - Critical!")
+    elif urgency_score >= 85:
+        reasons.append("📅 Due today")
+    elif urgency_score >= 70:
+        reasons.append("📅 Due very soon")
+    reasons.extend(terms.effort_reasons)
+    reasons.extend(terms.category_reasons)
+    if age_score > 20:
+        reasons.append("⏰ Task aging - don't forget!")
+    reasons.extend(terms.keyword_reasons)
+    
+    return finalize_score(score), reasons, terms.time_recommendation
+
+
+def rank_tasks(tasks, now=None, cache=None):
     """
+    Score every task exactly once and sort by score (highest first)
     
-    # Calculate scores for all tasks
-    scored_tasks = []
-    for task in tasks:
-        score, reasons, time_rec = calculate_master_priority(task)
-        scored_tasks.append({
-            'task': task,
-            'score': score,
-            'reasons': reasons,
-            'time_recommendation': time_rec
-        })
-    
-    # Sort by score
+    The result is reusable: the ranked list, the daily plan and the
+    top suggestion in /suggest are all derived from it. Pass a
+    score_cache.ScoreCache as cache to reuse scores across calls.
+    Returns: list of {'task', 'score', 'reasons', 'time_recommendation'}
+    """
+    if now is None:
+        now = local_now()
+    if cache is not None:
+        scores = cache.score_tasks(tasks, now)
+    else:
+        scores = [calculate_master_priority(task, now) for task in tasks]
+    scored_tasks = [{
+        'task': task,
+        'score': score,
+        'reasons': reasons,
+        'time_recommendation': time_rec
+    } for task, (score, reasons, time_rec) in zip(tasks, scores)]
+    
+    # Stable sort keeps insertion order for equal scores
     scored_tasks.sort(key=lambda x: x['score'], reverse=True)
+    return scored_tasks
+
+
+def create_daily_plan(tasks, max_tasks=5, scored_tasks=None):
+    """
+    Create optimized daily plan using decision science
+    Limits to 3-5 tasks to prevent decision fatigue
+    
+    Pass the output of rank_tasks() (or any iterable of scored tasks in
+    rank order) as scored_tasks to reuse existing scores instead of
+    scoring every task again. The ranking is consumed in a single pass
+    that stops as soon as the plan and the top max_tasks are filled.
+    """
     
-    # Apply the 2-Minute Rule (David Allen's GTD)
-    two_min_tasks = [st for st in scored_tasks if st['task'].estimated_time <= 2]
-    if two_min_tasks:
-        for st in two_min_tasks[:2]:  # Do up to 2 immediately
-            st['reasons'].insert(0, "⚡ 2-MIN RULE: Do now!")
+    # Calculate scores for all tasks (unless already ranked by the caller)
+    if scored_tasks is None:
+        scored_tasks = rank_tasks(tasks)
     
     # Build optimal daily plan
     daily_plan = {
@@ -350,26 +458,42 @@ def create_daily_plan(tasks, max_tasks=5):
         'afternoon': [],      # 1-2 medium tasks
         'total_time': 0
     }
+    top_tasks = []
+    two_min_marked = 0
+    
+    for st in scored_tasks:
+        estimated_time = st['task'].estimated_time or 30  # As scored
+        
+        # Apply the 2-Minute Rule (David Allen's GTD) to the top tasks
+        # Entries are copied so the caller's ranking is left untouched
+        if len(top_tasks) < max_tasks:
+            if estimated_time <= 2 and two_min_marked < 2:  # Do up to 2 immediately
+                st = dict(st, reasons=["⚡ 2-MIN RULE: Do now!"] + st['reasons'])
+                two_min_marked += 1
+            top_tasks.append(st)
+        
+        # 1. Identify the "frog" (hardest/most important)
+        if not daily_plan['morning_focus'] and estimated_time >= 60 and st['score'] >= 70:
+            daily_plan['morning_focus'].append(st)
+        
+        # 2. Quick wins for momentum (15-30 min)
+        elif 10 <= estimated_time <= 30:
+            if len(daily_plan['quick_wins']) < 3:
+                daily_plan['quick_wins'].append(st)
+        
+        # 3. Medium tasks for afternoon
+        elif estimated_time > 30:
+            if len(daily_plan['afternoon']) < 2:
+                daily_plan['afternoon'].append(st)
+        
+        if (len(top_tasks) >= max_tasks and daily_plan['morning_focus']
+                and len(daily_plan['quick_wins']) >= 3 and len(daily_plan['afternoon']) >= 2):
+            break
+    
+    daily_plan['total_time'] = sum(
+        st['task'].estimated_time or 30
+        for bucket in ('morning_focus', 'quick_wins', 'afternoon')
+        for st in daily_plan[bucket]
+    )
     
-    # 1. Identify the "frog" (hardest/most important)
-    frogs = [st for st in scored_tasks if st['task'].estimated_time >= 60 and st['score'] >= 70]
-    if frogs:
-        daily_plan['morning_focus'].append(frogs[0])
-        daily_plan['total_time'] += frogs[0]['task'].estimated_time
-    
-    # 2. Quick wins for momentum (15-30 min)
-    quick_wins = [st for st in scored_tasks 
-                  if 10 <= st['task'].estimated_time <= 30 
-                  and st not in daily_plan['morning_focus']][:3]
-    daily_plan['quick_wins'] = quick_wins
-    daily_plan['total_time'] += sum(st['task'].estimated_time for st in quick_wins)
-    
-    # 3. Medium tasks for afternoon
-    medium_tasks = [st for st in scored_tasks 
-                    if st['task'].estimated_time > 30 
-                    and st not in daily_plan['morning_focus']
-                    and st not in daily_plan['quick_wins']][:2]
-    daily_plan['afternoon'] = medium_tasks
-    daily_plan['total_time'] += sum(st['task'].estimated_time for st in medium_tasks)
-    
-    return daily_plan, scored_tasks[:max_tasks]
+    return daily_plan, top_tasks
@@ -0,0 +1,130 @@
+"""
+Query count check for the admin endpoints
+Seeds a scratch SQLite database, calls every admin endpoint at two data
+sizes and fails if an endpoint issues more SQL statements than its
+budget or if its statement count grows with the number of rows
+
+Usage: python query_counts.py
+"""
+
+import os
+import sys
+import tempfile
+import threading
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+# Statements per request, including loading the logged-in user
+ADMIN_QUERY_BUDGET = {
+    '/admin/stats': 2,
+    '/admin/cache': 1,
+    '/admin/users': 3,
+    '/admin/all-tasks': 2,
+    '/admin/activities': 2,
+    '/admin/analytics': 7,
+    '/admin/user/{user_id}/tasks': 3,
+    '/admin/user/{user_id}/activities': 3,
+}
+
+
+@contextmanager
+def count_queries(engine):
+    """Collect the SQL statements the current thread runs on engine"""
+    thread = threading.get_ident()
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if threading.get_ident() == thread:
+            statements.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def seed(server, users, tasks_per_user, activities_per_user):
+    """
+    Bulk insert users with tasks, activities and a review each
+    The inserts bypass the ORM, so the admin statistics are rebuilt after
+    """
+    from datetime import datetime, timezone
+    from activity_log import insert_rows
+
+    db = server.db
+    now = datetime.now(timezone.utc)
+    with server.app.app_context():
+        first_id = (db.session.query(db.func.max(server.User.id)).scalar() or 0) + 1
+        user_ids = range(first_id, first_id + users)
+        insert_rows(db.engine, server.User.__table__, [
+            {'id': i, 'email': f'user{i}@example.com', 'password_hash': 'x',
+             'is_admin': False, 'created_at': now.isoformat()}
+            for i in user_ids
+        ])
+        insert_rows(db.engine, server.Task.__table__, [
+            {'text': f'task {n}', 'user_id': i, 'completed': n % 3 == 0,
+             'is_deleted': n % 5 == 0, 'created_at': now}
+            for i in user_ids for n in range(tasks_per_user)
+        ])
+        insert_rows(db.engine, server.UserActivity.__table__, [
+            {'user_id': i, 'action': 'add_task', 'device_type': 'desktop', 'browser': 'Chrome',
+             'os': 'Linux', 'timestamp': now.isoformat()}
+            for i in user_ids for _ in range(activities_per_user)
+        ])
+        insert_rows(db.engine, server.Review.__table__, [
+            {'user_id': i, 'rating': 4, 'text': 'ok', 'created_at': now.isoformat(), 'is_approved': True}
+            for i in user_ids
+        ])
+        server.dashboard_stats.rebuild()
+    return first_id
+
+
+def measure(server, client, user_id):
+    """Statement count of every admin endpoint"""
+    counts = {}
+    with server.app.app_context():
+        engine = server.db.engine
+    server.response_cache.clear()  # Measure the uncached path
+    for endpoint in ADMIN_QUERY_BUDGET:
+        url = endpoint.format(user_id=user_id)
+        with count_queries(engine) as statements:
+            response = client.get(url)
+        if response.status_code != 200:
+            raise RuntimeError(f"{url} returned {response.status_code}")
+        counts[endpoint] = len(statements)
+    return counts
+
+
+def check_query_counts():
+    """Returns True if every admin endpoint stays within its budget"""
+    import server
+
+    client = server.app.test_client()
+    client.post('/login', json={'email': 'kalanadenuz@gmail.com', 'password': '12345678'})
+    server.activity_writer.flush()
+
+    user_id = seed(server, users=5, tasks_per_user=5, activities_per_user=5)
+    small = measure(server, client, user_id)
+    seed(server, users=200, tasks_per_user=50, activities_per_user=20)
+    large = measure(server, client, user_id)
+
+    print("\nChecking admin endpoint query counts...")
+    ok = True
+    for endpoint, budget in ADMIN_QUERY_BUDGET.items():
+        line = f"{endpoint}: {small[endpoint]} -> {large[endpoint]} statements (budget {budget})"
+        if large[endpoint] > budget or large[endpoint] != small[endpoint]:
+            ok = False
+            print(f"❌ {line}")
+        else:
+            print(f"✓ {line}")
+
+    if ok:
+        print("✅ Admin endpoints use a constant number of queries")
+    return ok
+
+
+if __name__ == '__main__':
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'query_counts.db')
+    sys.exit(0 if check_query_counts() else 1)
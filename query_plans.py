@@ -0,0 +1,93 @@
+"""
+Query plan check for Task Buddy
+Runs EXPLAIN on the hot queries in server.py and fails if any of them
+falls back to a full table scan or a separate sort step
+
+Usage: python query_plans.py  (uses DATABASE_URL like the server)
+"""
+
+import sys
+
+from sqlalchemy import text
+
+
+def hot_queries():
+    """
+    The per-request queries of server.py as (name, statement) pairs,
+    built by the same helpers the endpoints use so the check cannot
+    drift from what they run. Whole-table admin queries (stats counts)
+    are not included: they read every row by design
+    """
+    from server import (admin_tasks_query, pending_tasks_query, recent_activity_query, review_list_query,
+                        task_list_query, user_activity_query, user_tasks_query)
+
+    user_id = 1
+    return [
+        ('pending tasks (/suggest)', pending_tasks_query(user_id)),
+        ('task list page (/tasks)', task_list_query(user_id, {'cursor': '1'})[0]),
+        ('filtered task list page (/tasks?completed=false)',
+         task_list_query(user_id, {'cursor': '1', 'completed': 'false'})[0]),
+        ('all tasks page (/admin/all-tasks)', admin_tasks_query({'cursor': '1'})[0]),
+        ('user tasks (/admin/user/<id>/tasks)', user_tasks_query(user_id)),
+        ('approved reviews (/reviews)', review_list_query()),
+        ('recent activity (/admin/activities)', recent_activity_query(100)),
+        ('user activity (/admin/user/<id>/activities)', user_activity_query(user_id)),
+    ]
+
+
+def explain(conn, statement):
+    """Query plan lines for a SQLAlchemy statement or query"""
+    statement = getattr(statement, 'statement', statement)
+    sql = str(statement.compile(dialect=conn.dialect, compile_kwargs={'literal_binds': True}))
+
+    if conn.dialect.name == 'sqlite':
+        rows = conn.execute(text(f"EXPLAIN QUERY PLAN {sql}")).fetchall()
+        return [row[-1] for row in rows]
+
+    # PostgreSQL prefers a sequential scan on small tables, so disable it
+    # for this transaction to see whether an index plan exists at all
+    with conn.begin_nested():
+        conn.execute(text("SET LOCAL enable_seqscan = off"))
+        rows = conn.execute(text(f"EXPLAIN {sql}")).fetchall()
+    return [row[0] for row in rows]
+
+
+def full_scans(plan):
+    """Plan lines that read a whole table or sort the result"""
+    problems = []
+    for line in plan:
+        stripped = line.strip(' ->')
+        if stripped.startswith('SCAN') and 'USING' not in stripped:
+            problems.append(stripped)  # SQLite table scan
+        elif 'USE TEMP B-TREE' in stripped:
+            problems.append(stripped)  # SQLite sort
+        elif stripped.startswith('Seq Scan') or stripped.startswith('Sort'):
+            problems.append(stripped)  # PostgreSQL
+    return problems
+
+
+def check_query_plans():
+    """Print the plan of every hot query; returns True if all use an index"""
+    from server import app, db
+
+    print("\nChecking query plans...")
+    ok = True
+    with app.app_context():
+        with db.engine.connect() as conn:
+            for name, query in hot_queries():
+                problems = full_scans(explain(conn, query))
+                if problems:
+                    ok = False
+                    print(f"❌ {name}: {'; '.join(problems)}")
+                else:
+                    print(f"✓ {name}")
+
+    if ok:
+        print("✅ All hot queries use an index")
+    else:
+        print("⚠️ Some hot queries fall back to full scans - run python migrate_db.py")
+    return ok
+
+
+if __name__ == '__main__':
+    sys.exit(0 if check_query_plans() else 1)
@@ -0,0 +1,409 @@
+"""
+Per-request instrumentation
+A WSGI middleware times every request and, through SQLAlchemy engine
+events, the SQL it runs: statements, time and rows fetched. Sections
+wrapped with time_calls (the prioritization code) are timed too, and
+the response size is counted as the body is sent, so streamed exports
+are measured as well. Everything is kept per endpoint in histograms
+rendered in the Prometheus text format for /metrics
+
+The optional SamplingProfiler samples the stacks of in-flight requests
+and writes those of requests slower than a threshold as folded stacks
+(one 'frame;frame;frame count' line per stack), the input format of
+flamegraph.pl and speedscope
+"""
+
+import functools
+import itertools
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+# Upper bounds of the histogram buckets
+SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200)
+ROWS_BUCKETS = (0, 1, 10, 100, 1000, 10000, 100000)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+UNMATCHED = '<unmatched>'
+ENDPOINT_KEY = 'request_metrics.endpoint'
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(names, values):
+    if not names:
+        return ''
+    return '{' + ','.join(f'{n}="{escape_label(v)}"' for n, v in zip(names, values)) + '}'
+
+
+def format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Prometheus histogram with fixed buckets, one series per label set"""
+
+    def __init__(self, name, help_text, labels, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = buckets
+        self._series = {}  # label values -> [bucket counts, sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, label_values, value):
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = sorted((k, [list(v[0]), v[1], v[2]]) for k, v in self._series.items())
+        for label_values, (counts, total, count) in series:
+            cumulative = 0
+            for bound, n in zip(self.buckets + ('+Inf',), counts):
+                cumulative += n
+                labels = format_labels(self.labels + ('le',), label_values + (format_value(bound),))
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = format_labels(self.labels, label_values)
+            lines.append(f'{self.name}_sum{labels} {format_value(total)}')
+            lines.append(f'{self.name}_count{labels} {count}')
+        return lines
+
+
+class CounterMetric:
+    """Prometheus counter, one series per label set"""
+
+    def __init__(self, name, help_text, labels):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self._values = Counter()
+        self._lock = threading.Lock()
+
+    def inc(self, label_values, n=1):
+        with self._lock:
+            self._values[label_values] += n
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        with self._lock:
+            values = sorted(self._values.items())
+        lines.extend(f'{self.name}{format_labels(self.labels, k)} {v}' for k, v in values)
+        return lines
+
+
+class RequestSample:
+    """What one request spent, filled in while it runs"""
+
+    __slots__ = ('start', 'sql_seconds', 'statements', 'rows', 'sections', 'section_depth', 'stacks')
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.sql_seconds = 0.0
+        self.statements = 0
+        self.rows = 0
+        self.sections = Counter()
+        self.section_depth = 0
+        self.stacks = None
+
+
+class _CountingCursor:
+    """DBAPI cursor proxy counting the rows fetched through it"""
+
+    def __init__(self, cursor, sample):
+        self._cursor = cursor
+        self._sample = sample
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        for row in self._cursor:
+            self._sample.rows += 1
+            yield row
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        if row is not None:
+            self._sample.rows += 1
+        return row
+
+    def fetchmany(self, *args):
+        rows = self._cursor.fetchmany(*args)
+        self._sample.rows += len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        self._sample.rows += len(rows)
+        return rows
+
+
+class _MeteredBody:
+    """Response iterable that counts the bytes sent and records the request when closed"""
+
+    def __init__(self, body, finish):
+        self._body = body
+        self._finish = finish
+        self.size = 0
+
+    def __iter__(self):
+        for chunk in self._body:
+            self.size += len(chunk)
+            yield chunk
+
+    def close(self):
+        try:
+            if hasattr(self._body, 'close'):
+                self._body.close()
+        finally:
+            self._finish(self.size)
+
+
+class RequestMetrics:
+    """
+    Per-endpoint request histograms for one worker process
+    install() wires it into a Flask app and its engine; render() is the
+    body of the /metrics response
+    """
+
+    def __init__(self, profiler=None):
+        self.profiler = profiler
+        self._local = threading.local()
+        labels = ('endpoint', 'method')
+        self.requests = CounterMetric('http_requests_total', 'Requests by endpoint and status', labels + ('status',))
+        self.duration = Histogram('http_request_duration_seconds', 'Wall time per request', labels, SECONDS_BUCKETS)
+        self.sql_time = Histogram('http_request_sql_seconds', 'Time spent in SQL per request', labels, SECONDS_BUCKETS)
+        self.statements = Histogram('http_request_sql_statements', 'SQL statements per request', labels, COUNT_BUCKETS)
+        self.rows = Histogram('http_request_sql_rows', 'Rows fetched per request', labels, ROWS_BUCKETS)
+        self.section_time = Histogram('http_request_section_seconds', 'Time inside timed code sections per request',
+                                      labels + ('section',), SECONDS_BUCKETS)
+        self.size = Histogram('http_response_size_bytes', 'Response body size', labels, BYTES_BUCKETS)
+        self.collectors = []
+
+    def install(self, app, engine):
+        """Measure every request of app and the statements it runs on engine"""
+        from flask import request
+        from sqlalchemy import event
+
+        app.wsgi_app = self.middleware(app.wsgi_app)
+
+        @app.before_request
+        def label_request():
+            rule = request.url_rule
+            request.environ[ENDPOINT_KEY] = rule.rule if rule is not None else UNMATCHED
+
+        event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+        if self.profiler is not None:
+            self.profiler.start()
+
+    def add_collector(self, collect):
+        """Add the lines returned by collect() to every /metrics response"""
+        self.collectors.append(collect)
+
+    def time_calls(self, owner, name, section):
+        """
+        Replace owner.name (a function or bound method) with a wrapper that adds
+        its run time to section; calls nested in another timed call count once
+        """
+        fn = getattr(owner, name)
+
+        @functools.wraps(fn)
+        def timed(*args, **kwargs):
+            sample = getattr(self._local, 'sample', None)
+            if sample is None or sample.section_depth:
+                return fn(*args, **kwargs)
+            sample.section_depth += 1
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                sample.sections[section] += time.perf_counter() - start
+                sample.section_depth -= 1
+
+        setattr(owner, name, timed)
+
+    def middleware(self, wsgi_app):
+        def metered_app(environ, start_response):
+            sample = RequestSample()
+            self._local.sample = sample
+            if self.profiler is not None:
+                self.profiler.track(sample)
+            status = []
+
+            def metered_start_response(code, headers, exc_info=None):
+                status[:] = [code.split(' ', 1)[0]]
+                return start_response(code, headers, exc_info)
+
+            def finish(size):
+                self._local.sample = None
+                self._record(environ, status[0] if status else '500', sample, size)
+
+            try:
+                body = wsgi_app(environ, metered_start_response)
+            except BaseException:
+                finish(0)
+                raise
+            return _MeteredBody(body, finish)
+
+        return metered_app
+
+    def _record(self, environ, status, sample, size):
+        elapsed = time.perf_counter() - sample.start
+        endpoint = environ.get(ENDPOINT_KEY, UNMATCHED)
+        labels = (endpoint, environ.get('REQUEST_METHOD', ''))
+        self.requests.inc(labels + (status,))
+        self.duration.observe(labels, elapsed)
+        self.sql_time.observe(labels, sample.sql_seconds)
+        self.statements.observe(labels, sample.statements)
+        self.rows.observe(labels, sample.rows)
+        for section, seconds in sample.sections.items():
+            self.section_time.observe(labels + (section,), seconds)
+        self.size.observe(labels, size)
+        if self.profiler is not None:
+            self.profiler.finish(sample, labels, elapsed)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        sample = getattr(self._local, 'sample', None)
+        if sample is not None and context is not None:
+            context._metrics_start = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        sample = getattr(self._local, 'sample', None)
+        start = getattr(context, '_metrics_start', None)
+        if sample is None or start is None:
+            return
+        sample.sql_seconds += time.perf_counter() - start
+        sample.statements += 1
+        if cursor.description is not None:
+            # The result reads its rows through context.cursor after this event
+            context.cursor = _CountingCursor(cursor, sample)
+
+    def render(self):
+        """Every metric in the Prometheus text exposition format"""
+        lines = []
+        for metric in (self.requests, self.duration, self.sql_time, self.statements,
+                       self.rows, self.section_time, self.size):
+            lines.extend(metric.render())
+        for collect in self.collectors:
+            lines.extend(collect())
+        return '\n'.join(lines) + '\n'
+
+
+def cache_collector(cache):
+    """/metrics lines for a cache_backend cache's operation counters"""
+    def collect():
+        counts = cache.metrics.snapshot()
+        lines = []
+        for name, value in counts.items():
+            if name == 'hit_ratio':
+                continue
+            metric = f'response_cache_{name}_total'
+            lines.append(f'# TYPE {metric} counter')
+            lines.append(f'{metric}{format_labels(("backend",), (cache.name,))} {value}')
+        return lines
+    return collect
+
+
+class SamplingProfiler:
+    """
+    Samples the stacks of requests in flight every `interval` seconds and
+    writes the folded stacks of requests slower than `threshold` seconds
+    to out_dir as <time>-<n>-<endpoint>-<ms>ms.folded
+    """
+
+    def __init__(self, out_dir, threshold=1.0, interval=0.005, max_stacks=5000):
+        self.out_dir = out_dir
+        self.threshold = threshold
+        self.interval = interval
+        self.max_stacks = max_stacks
+        self._active = {}  # thread id -> RequestSample
+        self._sequence = itertools.count(1)
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            os.makedirs(self.out_dir, exist_ok=True)
+            self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+            self._thread.start()
+
+    def track(self, sample):
+        """Sample the current thread's stack until finish(sample)"""
+        sample.stacks = Counter()
+        with self._lock:
+            self._active[threading.get_ident()] = sample
+
+    def finish(self, sample, labels, elapsed):
+        with self._lock:
+            for thread_id, active in list(self._active.items()):
+                if active is sample:
+                    del self._active[thread_id]
+        if elapsed >= self.threshold and sample.stacks:
+            self.write(sample.stacks, labels, elapsed)
+
+    def write(self, stacks, labels, elapsed):
+        endpoint, method = labels
+        slug = re.sub(r'[^A-Za-z0-9]+', '_', f'{method}{endpoint}').strip('_')
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{next(self._sequence)}-{slug}-{elapsed * 1000:.0f}ms.folded"
+        path = os.path.join(self.out_dir, name)
+        with open(path, 'w') as f:
+            for stack, count in stacks.most_common():
+                f.write(f'{stack} {count}\n')
+        print(f"🐢 {method} {endpoint} took {elapsed * 1000:.0f} ms, profile written to {path}")
+
+    def _run(self):
+        own = threading.get_ident()
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                active = dict(self._active)
+            if not active:
+                continue
+            frames = sys._current_frames()
+            for thread_id, sample in active.items():
+                frame = frames.get(thread_id)
+                if frame is None or thread_id == own or len(sample.stacks) >= self.max_stacks:
+                    continue
+                sample.stacks[fold(frame)] += 1
+
+
+def fold(frame):
+    """'file:function;...' from the outermost frame to frame"""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f'{os.path.basename(code.co_filename)}:{code.co_name}')
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+def from_environment():
+    """RequestMetrics configured by PROFILE_SLOW_MS (enables the profiler) and PROFILE_DIR"""
+    threshold_ms = os.environ.get('PROFILE_SLOW_MS')
+    profiler = None
+    if threshold_ms:
+        profiler = SamplingProfiler(
+            os.environ.get('PROFILE_DIR', 'profiles'),
+            threshold=float(threshold_ms) / 1000,
+            interval=float(os.environ.get('PROFILE_INTERVAL_MS', 5)) / 1000,
+        )
+    return RequestMetrics(profiler)
@@ -0,0 +1,150 @@
+"""
+Per-task priority score cache
+Keeps the time-independent scoring terms of each task and only
+recomputes urgency, energy and aging when their time bucket changes
+"""
+
+import threading
+from collections import namedtuple
+
+from priority_algorithm import (
+    local_now,
+    task_terms, combine_terms,
+    urgency_for_due_date, urgency_valid_until,
+    age_penalty_for_created_at, age_penalty_valid_until,
+    energy_for_hour
+)
+
+
+def task_version(task):
+    """Fingerprint of every task field the score depends on"""
+    return (task.text, task.priority, task.category, task.due_date,
+            task.estimated_time, task.importance, task.created_at)
+
+
+# Cached scoring state of one task. Entries are never modified in place:
+# a changed term makes a new entry, published under the cache lock
+_Entry = namedtuple('_Entry', ['version', 'terms', 'since', 'urgency', 'urgency_until',
+                               'age', 'age_until', 'hour', 'energy', 'result'])
+
+
+class ScoreCache:
+    """
+    Score cache keyed by task id and task version
+
+    An entry is reused while the task's version matches. Urgency and
+    aging are recomputed only after their next boundary (due-date day
+    buckets, the 4-hour mark, the 7/14/30/60 day aging thresholds) and
+    energy only when the hour changes. Callers invalidate entries from
+    the task write paths; the version check covers any other writer.
+    """
+
+    def __init__(self, max_entries=100000):
+        self.max_entries = max_entries
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def invalidate(self, task_id):
+        self._entries.pop(task_id, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def valid_until(self, task_id):
+        """
+        Earliest instant the task's urgency or aging term may change, or
+        None if neither will (energy changes on every hour regardless)
+        """
+        entry = self._entries.get(task_id)
+        if entry is None:
+            return None
+        boundaries = [b for b in (entry.urgency_until, entry.age_until) if b is not None]
+        return min(boundaries) if boundaries else None
+
+    def score_tasks(self, tasks, now=None):
+        """
+        Same result as calculate_master_priority(task, now) for each task,
+        served from cache where possible
+
+        Returns: list of (score, reasons, time_recommendation) in input order
+        """
+        if now is None:
+            now = local_now()
+        hour = now.hour
+
+        entries = []
+        missing = []
+        for task in tasks:
+            entry = self._entries.get(task.id)
+            if entry is None or entry.version != task_version(task):
+                entry = None
+                missing.append(task)
+            entries.append(entry)
+
+        if missing:
+            fresh = dict(zip((t.id for t in missing), self._build(missing, now)))
+            entries = [entry or fresh[task.id] for entry, task in zip(entries, tasks)]
+
+        results = []
+        changed = {}
+        for task, entry in zip(tasks, entries):
+            updated = entry
+            if now < entry.since:
+                # Older than the last recompute (clock moved backwards)
+                updated = self._refresh(entry, task, now)
+            else:
+                if entry.urgency_until is not None and now >= entry.urgency_until:
+                    updated = updated._replace(
+                        urgency=urgency_for_due_date(task.due_date, now),
+                        urgency_until=urgency_valid_until(task.due_date, now),
+                        since=now, result=None)
+                if entry.age_until is not None and now >= entry.age_until:
+                    updated = updated._replace(
+                        age=age_penalty_for_created_at(task.created_at, now),
+                        age_until=age_penalty_valid_until(task.created_at, now),
+                        since=now, result=None)
+                if entry.hour != hour:
+                    updated = updated._replace(
+                        hour=hour, energy=energy_for_hour(hour, entry.terms.category, entry.terms.estimated_mins),
+                        since=now, result=None)
+            if updated.result is None:
+                updated = updated._replace(
+                    result=combine_terms(updated.terms, updated.urgency, updated.energy, updated.age))
+            if updated is not entry:
+                changed[task.id] = updated
+            score, reasons, time_rec = updated.result
+            results.append((score, list(reasons), time_rec))
+
+        if changed:
+            with self._lock:
+                self._entries.update(changed)
+        return results
+
+    def _refresh(self, entry, task, now):
+        """entry with every time-dependent term recomputed"""
+        return entry._replace(
+            since=now,
+            urgency=urgency_for_due_date(task.due_date, now),
+            urgency_until=urgency_valid_until(task.due_date, now),
+            age=age_penalty_for_created_at(task.created_at, now),
+            age_until=age_penalty_valid_until(task.created_at, now),
+            hour=now.hour,
+            energy=energy_for_hour(now.hour, entry.terms.category, entry.terms.estimated_mins),
+            result=None,
+        )
+
+    def _build(self, tasks, now):
+        entries = []
+        for task in tasks:
+            entry = _Entry(task_version(task), task_terms(task), now, None, None, None, None, None, None, None)
+            entries.append(self._refresh(entry, task, now))
+        with self._lock:
+            for task, entry in zip(tasks, entries):
+                self._entries[task.id] = entry
+            # Evict the oldest entries once over capacity
+            while len(self._entries) > self.max_entries:
+                self._entries.pop(next(iter(self._entries)))
+        return entries
@@ -6,6 +6,8 @@ const aiResult = document.getElementById('aiResult');
 const logoutBtn = document.getElementById('logoutBtn');
 const userEmailSpan = document.getElementById('userEmail');
 const taskPlan = document.getElementById('taskPlan');
+const loadMoreBtn = document.getElementById('loadMoreTasks');
+const clearCompletedBtn = document.getElementById('clearCompletedBtn');
 
 // New input fields
 const prioritySelect = document.getElementById('prioritySelect');
@@ -15,10 +17,20 @@ const timeEstimate = document.getElementById('timeEstimate');
 const importanceSelect = document.getElementById('importanceSelect');
 
 let tasks = [];
+let nextTaskCursor = null;
+let taskCounts = null;
+const TASK_PAGE_SIZE = 100;
+const MAX_TASK_PAGE_SIZE = 500;
 let reviews = [];
 let currentReviewIndex = 0;
 let selectedRating = 0;
 
+// Task writes made within BULK_DELAY_MS are sent as one /tasks/bulk request
+const BULK_DELAY_MS = 50;
+const MAX_BULK_OPERATIONS = 500;
+let pendingOps = [];
+let bulkTimer = null;
+
 // Check authentication on load
 async function checkAuth() {
   try {
@@ -62,22 +74,88 @@ logoutBtn.onclick = async () => {
   }
 };
 
-// Load tasks from server
+// Load tasks from server (first page, or as many as are already shown)
 async function loadTasks() {
+  const limit = Math.min(Math.max(TASK_PAGE_SIZE, tasks.length), MAX_TASK_PAGE_SIZE);
   try {
-    const response = await fetch('http://127.0.0.1:5000/tasks', {
+    const response = await fetch(`http://127.0.0.1:5000/tasks?limit=${limit}`, {
       credentials: 'include'
     });
     const data = await response.json();
     tasks = data.tasks;
+    nextTaskCursor = data.next_cursor;
+    taskCounts = data.counts;
     render();
   } catch (error) {
     console.error('Error loading tasks:', error);
   }
 }
 
+// Append the next page of tasks
+async function loadMoreTasks() {
+  if (!nextTaskCursor) return;
+  try {
+    const response = await fetch(`http://127.0.0.1:5000/tasks?limit=${TASK_PAGE_SIZE}&cursor=${nextTaskCursor}`, {
+      credentials: 'include'
+    });
+    const data = await response.json();
+    tasks = tasks.concat(data.tasks);
+    nextTaskCursor = data.next_cursor;
+    render();
+  } catch (error) {
+    console.error('Error loading more tasks:', error);
+  }
+}
+
+loadMoreBtn.onclick = loadMoreTasks;
+
+// Queue a task operation; resolves with its result from /tasks/bulk
+function queueTaskOp(op) {
+  return new Promise((resolve, reject) => {
+    pendingOps.push({ op, resolve, reject });
+    if (pendingOps.length >= MAX_BULK_OPERATIONS) {
+      sendTaskOps();
+    } else if (!bulkTimer) {
+      bulkTimer = setTimeout(sendTaskOps, BULK_DELAY_MS);
+    }
+  });
+}
+
+// Send the queued operations in one request, then reload the list once
+async function sendTaskOps() {
+  clearTimeout(bulkTimer);
+  bulkTimer = null;
+  const batch = pendingOps;
+  pendingOps = [];
+  if (batch.length === 0) return;
+  
+  try {
+    const response = await fetch('http://127.0.0.1:5000/tasks/bulk', {
+      method: 'POST',
+      headers: {'Content-Type': 'application/json'},
+      credentials: 'include',
+      body: JSON.stringify({ operations: batch.map(item => item.op) })
+    });
+    const data = await response.json();
+    if (!data.success) throw new Error(data.message);
+    batch.forEach((item, i) => item.resolve(data.results[i]));
+  } catch (error) {
+    batch.forEach(item => item.reject(error));
+    return;
+  }
+  await loadTasks();
+}
+
 // Update statistics
 function updateStats() {
+  // Server totals when only some pages are loaded
+  if (nextTaskCursor && taskCounts) {
+    document.getElementById('totalTasks').textContent = taskCounts.total;
+    document.getElementById('completedTasks').textContent = taskCounts.completed;
+    document.getElementById('pendingTasks').textContent = taskCounts.pending;
+    return;
+  }
+  
   const total = tasks.length;
   const completed = tasks.filter(t => t.completed).length;
   const pending = total - completed;
@@ -92,16 +170,15 @@ addBtn.onclick = async () => {
   if(!task) return alert("Please enter a task!");
   
   // Optimistic UI update - add task immediately
-  const tempTask = {
-    id: Date.now(), // temporary ID
+  const fields = {
     text: task,
     priority: prioritySelect.value,
     category: categorySelect.value,
     due_date: dueDateInput.value || null,
     estimated_time: parseInt(timeEstimate.value),
-    importance: parseInt(importanceSelect.value),
-    completed: false
+    importance: parseInt(importanceSelect.value)
   };
+  const tempTask = { ...fields, id: Date.now(), completed: false }; // temporary ID
   
   tasks.push(tempTask);
   render();
@@ -111,29 +188,13 @@ addBtn.onclick = async () => {
   dueDateInput.value = "";
   
   try {
-    const response = await fetch('http://127.0.0.1:5000/add-task', {
-      method: 'POST',
-      headers: {'Content-Type': 'application/json'},
-      credentials: 'include',
-      body: JSON.stringify({
-        text: task,
-        priority: prioritySelect.value,
-        category: categorySelect.value,
-        due_date: dueDateInput.value || null,
-        estimated_time: parseInt(timeEstimate.value),
-        importance: parseInt(importanceSelect.value)
-      })
-    });
-    
-    const data = await response.json();
-    if (data.success) {
-      // Replace temp task with real task from server
-      await loadTasks();
-    } else {
+    // The list is reloaded with the real task once the batch is sent
+    const result = await queueTaskOp({ op: 'create', ...fields });
+    if (!result.success) {
       // Revert optimistic update on error
       tasks = tasks.filter(t => t.id !== tempTask.id);
       render();
-      alert('Error adding task: ' + data.message);
+      alert('Error adding task: ' + result.message);
     }
   } catch (error) {
     console.error('Error adding task:', error);
@@ -245,6 +306,8 @@ function render() {
     taskList.appendChild(li);
   });
   
+  loadMoreBtn.style.display = nextTaskCursor ? 'block' : 'none';
+  clearCompletedBtn.style.display = tasks.some(t => t.completed) ? 'block' : 'none';
   updateStats();
 }
 
@@ -258,15 +321,8 @@ async function toggleComplete(taskId) {
   render();
   
   try {
-    const response = await fetch(`http://127.0.0.1:5000/task/${taskId}/complete`, {
-      method: 'PUT',
-      credentials: 'include'
-    });
-    
-    if (response.ok) {
-      // Reload to ensure consistency
-      await loadTasks();
-    } else {
+    const result = await queueTaskOp({ op: 'toggle', id: taskId });
+    if (!result.success) {
       // Revert on error
       task.completed = previousState;
       render();
@@ -293,15 +349,8 @@ async function deleteTask(taskId) {
   render();
   
   try {
-    const response = await fetch(`http://127.0.0.1:5000/task/${taskId}`, {
-      method: 'DELETE',
-      credentials: 'include'
-    });
-    
-    if (response.ok) {
-      // Reload to ensure consistency
-      await loadTasks();
-    } else {
+    const result = await queueTaskOp({ op: 'delete', id: taskId });
+    if (!result.success) {
       // Revert on error
       tasks.splice(taskIndex, 0, deletedTask);
       render();
@@ -316,6 +365,30 @@ async function deleteTask(taskId) {
   }
 }
 
+// Delete every loaded completed task with one bulk request
+clearCompletedBtn.onclick = async () => {
+  const completed = tasks.filter(t => t.completed);
+  if (completed.length === 0) return;
+  if (!confirm(`Delete ${completed.length} completed task(s)?`)) return;
+  
+  // Optimistic UI update - remove immediately
+  const previousTasks = tasks;
+  tasks = tasks.filter(t => !t.completed);
+  render();
+  
+  try {
+    const results = await Promise.all(completed.map(t => queueTaskOp({ op: 'delete', id: t.id })));
+    const failed = results.filter(r => !r.success).length;
+    if (failed) alert(`${failed} task(s) could not be deleted.`);
+  } catch (error) {
+    console.error('Error clearing completed tasks:', error);
+    // Revert on error
+    tasks = previousTasks;
+    render();
+    alert('Failed to delete tasks. Please try again.');
+  }
+};
+
 suggestBtn.onclick = async () => {
   const pendingTasks = tasks.filter(t => !t.completed);
   
@@ -326,11 +399,9 @@ suggestBtn.onclick = async () => {
   taskPlan.classList.remove('show');
   
   try{
+    // GET, so the browser revalidates its copy (304 while nothing changed)
     const resp = await fetch('http://127.0.0.1:5000/suggest', {
-      method:'POST',
-      headers:{'Content-Type':'application/json'},
-      credentials: 'include',
-      body: JSON.stringify({})
+      credentials: 'include'
     });
     const data = await resp.json();
     
@@ -1,10 +1,25 @@
-from flask import Flask, request, jsonify, session, redirect, url_for
+from flask import Flask, request, jsonify, session, redirect, url_for, Response, stream_with_context
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
-from werkzeug.security import generate_password_hash, check_password_hash
 import os
+from datetime import datetime, timezone
 from dotenv import load_dotenv
+from score_cache import ScoreCache
+from task_ranking import RankingStore, snapshot_task
+from activity_log import ActivityWriter, insert_rows
+from user_agent import parse_user_agent
+from export_stream import EXPORT_FORMATS, export_stream
+from admin_stats import AdminStats
+from static_assets import StaticAssets
+from data_version import DataVersions
+from cache_backend import cache_from_url, invalidate_on_commit
+import json_response
+from json_response import cache_value, cached_response, not_modified, version_etag, with_etag
+from request_metrics import cache_collector, from_environment
+import slow_queries
+import password_hashing
+import priority_algorithm
 
 load_dotenv()
 
@@ -39,9 +54,49 @@ app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
 }
 
 db = SQLAlchemy(app)
+# Gzip and ETags for JSON responses (see json_response.py)
+json_response.install(app)
 login_manager = LoginManager(app)
 login_manager.login_view = 'login'
 
+class UTCDateTime(db.TypeDecorator):
+    """
+    Timezone-aware DateTime stored in UTC
+    SQLite drops the offset, so naive values read back are UTC
+    """
+    impl = db.DateTime(timezone=True)
+    cache_ok = True
+    
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        if value.tzinfo is None:
+            value = value.astimezone()  # Naive means server local time
+        return value.astimezone(timezone.utc)
+    
+    def process_result_value(self, value, dialect):
+        if value is not None and value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value
+
+def parse_datetime(value):
+    """Parse an ISO 8601 date/datetime from the API (naive means local time)"""
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    return parsed if parsed.tzinfo else parsed.astimezone()
+
+def isoformat(value):
+    """Serialize an optional datetime for JSON responses"""
+    return value.isoformat() if value else None
+
+# Per-worker cache of task priority scores (invalidated on task writes)
+score_cache = ScoreCache()
+
+# Password hashes are computed by a bounded, lower-priority process pool
+password_hasher = password_hashing.from_environment()
+password_hasher.start()  # Before any of the threads below
+
 # Database Models
 class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -53,34 +108,50 @@ class User(UserMixin, db.Model):
     reviews = db.relationship('Review', backref='author', lazy=True, cascade='all, delete-orphan')
     
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.hash(password)
     
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        """A hash made with other cost parameters is replaced (commit to keep it)"""
+        matches, new_hash = password_hasher.verify(self.password_hash, password)
+        if new_hash:
+            self.password_hash = new_hash
+        return matches
 
 class Task(db.Model):
+    __table_args__ = (
+        # Every user-facing task query filters by owner and state
+        db.Index('ix_task_user_deleted_completed', 'user_id', 'is_deleted', 'completed'),
+        # Keyset pages of a user's task list, in id order
+        db.Index('ix_task_user_deleted_id', 'user_id', 'is_deleted', 'id'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     text = db.Column(db.String(500), nullable=False)
     completed = db.Column(db.Boolean, default=False)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     is_deleted = db.Column(db.Boolean, default=False)  # Soft delete for admin tracking
-    deleted_at = db.Column(db.String(50), nullable=True)
+    deleted_at = db.Column(UTCDateTime, nullable=True)
     
     # Core prioritization fields
     priority = db.Column(db.String(20), default='medium')
     category = db.Column(db.String(50), default='general')
-    due_date = db.Column(db.String(50), nullable=True)
+    due_date = db.Column(UTCDateTime, nullable=True)
     estimated_time = db.Column(db.Integer, default=30)
     importance = db.Column(db.Integer, default=3)
-    created_at = db.Column(db.String(50), nullable=True)
+    created_at = db.Column(UTCDateTime, nullable=True)
     
     # Advanced fields
     energy_level = db.Column(db.String(20), default='medium')  # low, medium, high
     dependencies = db.Column(db.String(200), nullable=True)  # Comma-separated task IDs
-    completed_at = db.Column(db.String(50), nullable=True)
+    completed_at = db.Column(UTCDateTime, nullable=True)
     actual_time_spent = db.Column(db.Integer, nullable=True)
 
 class Review(db.Model):
+    __table_args__ = (
+        # Public review list: approved reviews, newest first
+        db.Index('ix_review_approved_created', 'is_approved', 'created_at'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     rating = db.Column(db.Integer, nullable=False)  # 1-5 stars
@@ -89,6 +160,12 @@ class Review(db.Model):
     is_approved = db.Column(db.Boolean, default=True)  # Admin can moderate
 
 class UserActivity(db.Model):
+    __table_args__ = (
+        # Activity feeds are read newest first, overall and per user
+        db.Index('ix_user_activity_timestamp', 'timestamp'),
+        db.Index('ix_user_activity_user_timestamp', 'user_id', 'timestamp'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     action = db.Column(db.String(100), nullable=False)  # login, add_task, delete_task, etc.
@@ -102,67 +179,271 @@ class UserActivity(db.Model):
     timestamp = db.Column(db.String(50), nullable=False)
     details = db.Column(db.String(500), nullable=True)  # Extra info as JSON string
 
+class StatCounter(db.Model):
+    """Materialized admin counters (see admin_stats.py)"""
+    name = db.Column(db.String(50), primary_key=True)
+    value = db.Column(db.BigInteger, nullable=False, default=0)
+
+class ActivityRollup(db.Model):
+    """Activity counts per day (day 'all' holds all-time totals) and dimension value"""
+    day = db.Column(db.String(10), primary_key=True)
+    dimension = db.Column(db.String(20), primary_key=True)  # device_type, browser, os, action, user_id
+    value = db.Column(db.String(100), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+class UserDataVersion(db.Model):
+    """Per-user version bumped by every task write (see data_version.py)"""
+    user_id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+
+# Counters kept in step with every task/user/review write
+dashboard_stats = AdminStats(db, StatCounter, ActivityRollup, User, Task, Review, UserActivity)
+dashboard_stats.install()
+
+# Versions of each user's task data, bumped in the writing transaction
+data_versions = DataVersions(db, UserDataVersion)
+data_versions.install()
+
+# Response cache: per worker by default, shared with a sqlite:// or redis:// CACHE_URL
+response_cache = cache_from_url(os.environ.get('CACHE_URL', 'memory://'))
+
+# Versioned entries never go stale; the TTL only bounds shared backends
+VERSIONED_CACHE_TTL = 3600
+ADMIN_STATS_CACHE_TTL = 5
+# Review writes invalidate the cached list on commit; a per-worker cache
+# only sees its own worker's writes, so it also expires. Shared entries
+# still expire before their generation token (GENERATION_TTL)
+REVIEWS_CACHE_TTL = 24 * 3600 if response_cache.shared else 30
+
+invalidate_on_commit(db.session, response_cache, {'review': 'reviews'})
+
+# Per-endpoint timings, SQL and response sizes for /metrics; PROFILE_SLOW_MS
+# also writes sampled stacks of slower requests to PROFILE_DIR
+request_metrics = from_environment()
+with app.app_context():
+    request_metrics.install(app, db.engine)
+request_metrics.time_calls(score_cache, 'score_tasks', 'priority')
+request_metrics.time_calls(priority_algorithm, 'create_daily_plan', 'priority')
+request_metrics.add_collector(cache_collector(response_cache))
+
+# Statements slower than SLOW_QUERY_MS are logged as JSON with their query plan
+slow_query_log = slow_queries.from_environment()
+with app.app_context():
+    slow_query_log.install(db.engine)
+
+def cached_json(key, ttl, build):
+    """
+    Response with the cached JSON body of key, or build()'s body stored
+    under it; concurrent misses in this worker build it once
+    """
+    from flask import make_response
+    
+    value = response_cache.get(key)
+    if value is None:
+        with response_cache.lock(key):
+            value = response_cache.get(key)
+            if value is None:
+                response = make_response(build())
+                if response.status_code != 200:
+                    return response
+                value = cache_value(response.get_data())
+                response_cache.set(key, value, ttl)
+    return cached_response(value)
+
+def versioned_response(kind, version, bucket, build):
+    """
+    JSON response computed from the current user's data
+    Answers 304 when the client has it and serves the cached body when
+    it was built already; build() is only called on a miss
+    """
+    user_id = current_user.id
+    etag = version_etag(kind, user_id, version, bucket)
+    unchanged = not_modified(etag)
+    if unchanged:
+        return unchanged
+    return with_etag(cached_json(f'{kind}:{user_id}:{version}:{bucket}', VERSIONED_CACHE_TTL, build), etag)
+
 @login_manager.user_loader
 def load_user(user_id):
     return db.session.get(User, int(user_id))
 
+def pending_tasks_query(user_id):
+    return db.select(Task).filter_by(user_id=user_id, completed=False, is_deleted=False)
+
+def load_pending_tasks(user_id):
+    return db.session.execute(pending_tasks_query(user_id)).scalars().all()
+
+def task_state_columns():
+    """(total, active, completed, deleted) task count columns"""
+    from sqlalchemy import func, case
+    
+    return (
+        func.count(Task.id),
+        func.count(case((db.and_(Task.is_deleted.is_(False), Task.completed.is_(False)), 1))),
+        func.count(case((Task.completed.is_(True), 1))),
+        func.count(case((Task.is_deleted.is_(True), 1)))
+    )
+
+def task_state_counts(*group_by):
+    """Query of (*group_by, total, active, completed, deleted) task counts"""
+    return db.session.query(*group_by, *task_state_columns())
+
+# Page size limits for the task list endpoints
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+# Admin task list status filter
+TASK_STATUS_FILTERS = {
+    'active': db.and_(Task.is_deleted.is_(False), Task.completed.is_(False)),
+    'completed': db.and_(Task.is_deleted.is_(False), Task.completed.is_(True)),
+    'deleted': Task.is_deleted.is_(True)
+}
+
+def parse_bool(value):
+    if value.lower() in ('true', '1', 'yes'):
+        return True
+    if value.lower() in ('false', '0', 'no'):
+        return False
+    raise ValueError(f"Invalid boolean: {value}")
+
+def filter_tasks(query, args):
+    """
+    Apply the task list filters from the query string:
+    completed, category, priority, due_after (inclusive) and due_before (exclusive)
+    Raises ValueError for malformed values
+    """
+    if 'completed' in args:
+        query = query.filter(Task.completed.is_(parse_bool(args['completed'])))
+    if args.get('category'):
+        query = query.filter(Task.category == args['category'])
+    if args.get('priority'):
+        query = query.filter(Task.priority == args['priority'])
+    if args.get('due_after'):
+        query = query.filter(Task.due_date >= parse_datetime(args['due_after']))
+    if args.get('due_before'):
+        query = query.filter(Task.due_date < parse_datetime(args['due_before']))
+    return query
+
+def filter_admin_tasks(query, args):
+    """filter_tasks plus the admin-only status and user_id filters"""
+    status = args.get('status', 'all')
+    if status != 'all':
+        if status not in TASK_STATUS_FILTERS:
+            raise ValueError(f"Invalid status: {status}")
+        query = query.filter(TASK_STATUS_FILTERS[status])
+    if args.get('user_id'):
+        query = query.filter(Task.user_id == int(args['user_id']))
+    return filter_tasks(query, args)
+
+def task_list_query(user_id, args):
+    """One page of the user's task list (select, limit); raises ValueError for malformed values"""
+    return page_query(filter_tasks(db.select(Task).filter_by(user_id=user_id, is_deleted=False), args), args)
+
+def admin_tasks_query(args):
+    """One page of all users' (task, owner email) rows; raises ValueError for malformed values"""
+    return page_query(filter_admin_tasks(db.select(Task, User.email).join(Task.owner), args), args)
+
+def user_tasks_query(user_id):
+    """Every task of a user, deleted ones included"""
+    return db.select(Task).filter_by(user_id=user_id)
+
+def review_list_query():
+    """The latest approved reviews with the author's email in the same query"""
+    return db.select(
+        Review.id, Review.rating, Review.text, User.email, Review.created_at
+    ).join(User, Review.user_id == User.id).filter(
+        Review.is_approved.is_(True)
+    ).order_by(Review.created_at.desc()).limit(20)
+
+def recent_activity_query(limit):
+    """The latest activity rows with the user's email (None for removed users)"""
+    return db.select(UserActivity, User.email).outerjoin(
+        User, UserActivity.user_id == User.id
+    ).order_by(UserActivity.timestamp.desc()).limit(limit)
+
+def user_activity_query(user_id):
+    return db.select(UserActivity).filter_by(user_id=user_id).order_by(UserActivity.timestamp.desc())
+
+def task_list_key(args):
+    """
+    Cache key part of a task list request: the parsed limit, cursor and
+    filters in a fixed order, so unknown, repeated or reordered query
+    parameters share one entry. Raises ValueError for malformed values
+    """
+    from urllib.parse import urlencode
+
+    fields = [
+        ('limit', min(max(int(args.get('limit', DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)),
+        ('cursor', int(args['cursor']) if args.get('cursor') else ''),
+        ('completed', int(parse_bool(args['completed'])) if 'completed' in args else ''),
+        ('category', args.get('category') or ''),
+        ('priority', args.get('priority') or ''),
+    ]
+    for name in ('due_after', 'due_before'):
+        fields.append((name, parse_datetime(args[name]).isoformat() if args.get(name) else ''))
+    return urlencode(fields)
+
+def page_query(query, args):
+    """
+    The query (or select) limited to one keyset page plus a row, in
+    ascending id (creation) order; returns (query, limit)
+    cursor is the last task id of the previous page; limit is capped at MAX_PAGE_SIZE
+    """
+    limit = min(max(int(args.get('limit', DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+    cursor = args.get('cursor')
+    if cursor:
+        query = query.filter(Task.id > int(cursor))
+    return query.order_by(Task.id).limit(limit + 1), limit
+
+def split_page(rows, limit, task_of=lambda row: row):
+    if len(rows) > limit:
+        return rows[:limit], str(task_of(rows[limit - 1]).id)
+    return rows, None
+
+# Per-worker ranking of each user's pending tasks (updated on task writes)
+task_rankings = RankingStore(score_cache, load_pending_tasks)
+
+def write_activities(rows):
+    with app.app_context():
+        insert_rows(db.engine, UserActivity.__table__, rows)
+        # The writer thread keeps the analytics rollup current
+        dashboard_stats.rollup_if_due()
+
+# Activity rows are written in batches off the request path
+activity_writer = ActivityWriter(
+    write_activities,
+    batch_size=int(os.environ.get('ACTIVITY_BATCH_SIZE', 100)),
+    flush_interval=float(os.environ.get('ACTIVITY_FLUSH_INTERVAL', 1.0)),
+    max_queue=int(os.environ.get('ACTIVITY_QUEUE_SIZE', 10000)),
+    overflow=os.environ.get('ACTIVITY_QUEUE_OVERFLOW', 'drop')  # drop or block
+)
+
 # Helper function to log user activity
 def log_activity(user_id, action, details=None):
+    log_activities(user_id, [(action, details)])
+
+def log_activities(user_id, entries):
+    """Queue one activity row per (action, details) of the current request"""
     from datetime import datetime
     
     # Get request info
     ip = request.remote_addr
-    user_agent = request.headers.get('User-Agent', '')
-    
-    # Parse user agent for device info
-    device_type = 'desktop'
-    if 'mobile' in user_agent.lower():
-        device_type = 'mobile'
-    elif 'tablet' in user_agent.lower():
-        device_type = 'tablet'
-    
-    # Parse browser
-    browser = 'Unknown'
-    if 'Chrome' in user_agent:
-        browser = 'Chrome'
-    elif 'Firefox' in user_agent:
-        browser = 'Firefox'
-    elif 'Safari' in user_agent:
-        browser = 'Safari'
-    elif 'Edge' in user_agent:
-        browser = 'Edge'
-    
-    # Parse OS
-    os_name = 'Unknown'
-    if 'Windows' in user_agent:
-        os_name = 'Windows'
-    elif 'Mac' in user_agent:
-        os_name = 'MacOS'
-    elif 'Linux' in user_agent:
-        os_name = 'Linux'
-    elif 'Android' in user_agent:
-        os_name = 'Android'
-    elif 'iOS' in user_agent or 'iPhone' in user_agent:
-        os_name = 'iOS'
-    
-    activity = UserActivity(
-        user_id=user_id,
-        action=action,
-        ip_address=ip,
-        user_agent=user_agent[:500],
-        device_type=device_type,
-        browser=browser,
-        os=os_name,
-        timestamp=datetime.now().isoformat(),
-        details=details
-    )
-    
-    try:
-        db.session.add(activity)
-        db.session.commit()
-    except Exception as e:
-        db.session.rollback()
-        print(f"Error logging activity: {e}")
+    user_agent = request.headers.get('User-Agent', '')[:500]
+    ua = parse_user_agent(user_agent)
+    timestamp = datetime.now().isoformat()
+    
+    for action, details in entries:
+        activity_writer.enqueue(dict(
+            user_id=user_id,
+            action=action,
+            ip_address=ip,
+            user_agent=user_agent,
+            device_type=ua.device_type,
+            browser=ua.browser,
+            os=ua.os,
+            timestamp=timestamp,
+            details=details
+        ))
 
 # Create tables and admin user
 with app.app_context():
@@ -172,6 +453,13 @@ with app.app_context():
     except Exception as e:
         print(f"⚠️ Error creating tables: {e}")
     
+    try:
+        if dashboard_stats.ensure_counters():
+            print("✅ Admin statistics built")
+    except Exception as e:
+        db.session.rollback()
+        print(f"⚠️ Error building admin statistics: {e}")
+    
     # Create permanent admin account
     admin_email = "kalanadenuz@gmail.com"
     
@@ -217,45 +505,45 @@ with app.app_context():
             db.session.rollback()
             print(f"❌ Failed to create admin: {retry_error}")
 
+# Pages, CSS and JS served from memory with caching headers (see static_assets.py)
+static_assets = StaticAssets(os.path.dirname(os.path.abspath(__file__)))
+
 @app.route('/')
 def home():
-    from flask import send_file
-    return send_file('login.html')
+    return static_assets.response('login.html')
 
 @app.route('/login.html')
 def login_page():
-    from flask import send_file
-    return send_file('login.html')
+    return static_assets.response('login.html')
 
 @app.route('/register.html')
 def register_page():
-    from flask import send_file
-    return send_file('register.html')
+    return static_assets.response('register.html')
 
 @app.route('/index.html')
 def index_page():
-    from flask import send_file
-    return send_file('index.html')
+    return static_assets.response('index.html')
 
 @app.route('/styles.css')
 def styles():
-    from flask import send_file
-    return send_file('styles.css', mimetype='text/css')
+    return static_assets.response('styles.css')
 
 @app.route('/auth-styles.css')
 def auth_styles():
-    from flask import send_file
-    return send_file('auth-styles.css', mimetype='text/css')
+    return static_assets.response('auth-styles.css')
 
 @app.route('/script.js')
 def script():
-    from flask import send_file
-    return send_file('script.js', mimetype='application/javascript')
+    return static_assets.response('script.js')
 
 @app.route('/learn.html')
 def learn_page():
-    from flask import send_file
-    return send_file('learn.html')
+    return static_assets.response('learn.html')
+
+@app.route('/assets/<path:filename>')
+def hashed_asset(filename):
+    # Content-hashed names from the pages, cached as immutable
+    return static_assets.hashed_response(filename)
 
 # Authentication Routes
 @app.route('/register', methods=['POST'])
@@ -290,6 +578,8 @@ def login():
     user = User.query.filter_by(email=email).first()
     
     if user and user.check_password(password):
+        if db.session.is_modified(user):
+            db.session.commit()  # Rehashed with the current PASSWORD_HASH_METHOD
         login_user(user)
         log_activity(user.id, 'login', f'User logged in: {email}')
         return jsonify({"success": True, "message": "Login successful", "email": user.email})
@@ -314,28 +604,25 @@ def check_auth():
 def add_task():
     data = request.get_json()
     text = data.get('text', '')
-    priority = data.get('priority', 'medium')
-    category = data.get('category', 'general')
-    due_date = data.get('due_date')
-    estimated_time = data.get('estimated_time', 30)
-    importance = data.get('importance', 3)
     
     if not text:
         return jsonify({"success": False, "message": "Task text required"}), 400
     
-    from datetime import datetime
+    # The same field validation as a /tasks/bulk create
+    try:
+        values = dict(TASK_DEFAULTS, **task_field_values(data))
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    
     task = Task(
-        text=text,
         user_id=current_user.id,
-        priority=priority,
-        category=category,
-        due_date=due_date,
-        estimated_time=estimated_time,
-        importance=importance,
-        created_at=datetime.now().isoformat()
+        created_at=datetime.now(timezone.utc),
+        **values
     )
     db.session.add(task)
     db.session.commit()
+    score_cache.invalidate(task.id)
+    task_rankings.task_changed(task, pending=True, version=data_versions.get(current_user.id))
     
     # Log activity
     log_activity(current_user.id, 'add_task', f'Added task: {text[:50]}')
@@ -346,7 +633,7 @@ def add_task():
         "completed": task.completed,
         "priority": task.priority,
         "category": task.category,
-        "due_date": task.due_date,
+        "due_date": isoformat(task.due_date),
         "estimated_time": task.estimated_time,
         "importance": task.importance
     }})
@@ -354,19 +641,47 @@ def add_task():
 @app.route('/tasks')
 @login_required
 def get_tasks():
-    tasks = Task.query.filter_by(user_id=current_user.id, is_deleted=False).all()
-    task_list = [{
+    try:
+        key = task_list_key(request.args)
+    except (TypeError, ValueError):
+        return task_list_response()  # Answers the 400
+    # Unchanged lists are answered from the data version alone
+    return versioned_response('tasks', data_versions.get(current_user.id), key, task_list_response)
+
+def serialize_task(t):
+    return {
         "id": t.id,
         "text": t.text,
         "completed": t.completed,
         "priority": t.priority,
         "category": t.category,
-        "due_date": t.due_date,
+        "due_date": isoformat(t.due_date),
         "estimated_time": t.estimated_time,
         "importance": t.importance,
-        "created_at": t.created_at
-    } for t in tasks]
-    return jsonify({"tasks": task_list})
+        "created_at": isoformat(t.created_at)
+    }
+
+def task_list_response():
+    try:
+        query, limit = task_list_query(current_user.id, request.args)
+    except (TypeError, ValueError) as e:
+        return jsonify({"success": False, "message": f"Invalid filter: {e}"}), 400
+    tasks, next_cursor = split_page(db.session.execute(query).scalars().all(), limit)
+    
+    # Totals for the stats bar, sent with the first page only
+    counts = None
+    if not request.args.get('cursor'):
+        counts = task_state_counts().filter(
+            Task.user_id == current_user.id, Task.is_deleted.is_(False)
+        ).one()
+    return jsonify(task_list_body(tasks, next_cursor, counts))
+
+def task_list_body(tasks, next_cursor, counts=None):
+    response = {"tasks": [serialize_task(t) for t in tasks], "next_cursor": next_cursor}
+    if counts is not None:
+        total, _, completed, _ = counts
+        response["counts"] = {"total": total, "completed": completed, "pending": total - completed}
+    return response
 
 @app.route('/task/<int:task_id>/complete', methods=['PUT'])
 @login_required
@@ -377,6 +692,9 @@ def toggle_task(task_id):
     
     task.completed = not task.completed
     db.session.commit()
+    score_cache.invalidate(task.id)
+    task_rankings.task_changed(task, pending=not task.completed and not task.is_deleted,
+                               version=data_versions.get(current_user.id))
     
     # Log activity
     action = 'complete_task' if task.completed else 'uncomplete_task'
@@ -387,7 +705,6 @@ def toggle_task(task_id):
 @app.route('/task/<int:task_id>', methods=['DELETE'])
 @login_required
 def delete_task(task_id):
-    from datetime import datetime
     task = Task.query.filter_by(id=task_id, user_id=current_user.id, is_deleted=False).first()
     if not task:
         return jsonify({"success": False, "message": "Task not found"}), 404
@@ -397,56 +714,194 @@ def delete_task(task_id):
     
     # Soft delete for admin tracking
     task.is_deleted = True
-    task.deleted_at = datetime.now().isoformat()
+    task.deleted_at = datetime.now(timezone.utc)
     db.session.commit()
+    score_cache.invalidate(task.id)
+    task_rankings.task_changed(task, pending=False, version=data_versions.get(current_user.id))
     
     # Log activity
     log_activity(current_user.id, 'delete_task', f'Deleted task: {task_name[:50]}')
     
     return jsonify({"success": True, "message": "Task deleted"})
 
-@app.route('/suggest', methods=['POST'])
+# Most operations accepted by one /tasks/bulk request
+MAX_BULK_OPERATIONS = 500
+
+def required_text(value):
+    if not isinstance(value, str) or not value:
+        raise ValueError(value)
+    return value
+
+def boolean(value):
+    if not isinstance(value, bool):
+        raise ValueError(value)
+    return value
+
+def optional_int(value):
+    # The task form sends null for an empty time estimate (scored as 30 min)
+    return None if value is None else int(value)
+
+# Task fields /add-task and a bulk create or update may set, with their parsers
+TASK_FIELDS = {
+    'text': required_text,
+    'priority': str,
+    'category': str,
+    'due_date': parse_datetime,
+    'estimated_time': optional_int,
+    'importance': int,
+    'completed': boolean,
+}
+
+# Defaults for fields a create leaves out (as in /add-task)
+TASK_DEFAULTS = {'priority': 'medium', 'category': 'general', 'estimated_time': 30, 'importance': 3}
+
+def task_field_values(data):
+    """Parsed TASK_FIELDS present in data (other keys are ignored); raises ValueError for invalid ones"""
+    values = {}
+    for name, parse in TASK_FIELDS.items():
+        if name in data:
+            try:
+                values[name] = parse(data[name])
+            except (TypeError, ValueError):
+                raise ValueError(f"Invalid {name.replace('_', ' ')}")
+    return values
+
+def apply_task_operation(op, owned, now):
+    """
+    Apply one bulk operation to the session without flushing
+    owned: the user's tasks referenced by the batch, by id
+    Returns: (task, (action, details)); raises ValueError for an invalid operation
+    """
+    if not isinstance(op, dict):
+        raise ValueError("Operation must be an object")
+    kind = op.get('op')
+    
+    if kind == 'create':
+        if not op.get('text'):
+            raise ValueError("Task text required")
+        values = dict(TASK_DEFAULTS, **task_field_values(op))
+        task = Task(user_id=current_user.id, created_at=now, **values)
+        db.session.add(task)
+        return task, ('add_task', f'Added task: {task.text[:50]}')
+    
+    if kind not in ('toggle', 'update', 'delete'):
+        raise ValueError(f"Unknown op: {kind}")
+    task = owned.get(op.get('id'))
+    # As with the single-task routes, a deleted task can still be toggled
+    if task is None or (task.is_deleted and kind != 'toggle'):
+        raise ValueError("Task not found")
+    
+    if kind == 'toggle':
+        task.completed = not task.completed
+        action = 'complete_task' if task.completed else 'uncomplete_task'
+        return task, (action, f'{action.replace("_", " ").title()}: {task.text[:50]}')
+    if kind == 'delete':
+        task.is_deleted = True
+        task.deleted_at = now
+        return task, ('delete_task', f'Deleted task: {task.text[:50]}')
+    for name, value in task_field_values(op).items():
+        setattr(task, name, value)
+    return task, ('update_task', f'Updated task: {task.text[:50]}')
+
+@app.route('/tasks/bulk', methods=['POST'])
+@login_required
+def bulk_tasks():
+    """
+    Apply a batch of task operations in one transaction:
+    {"operations": [{"op": "create", "text": ..., <fields>}, {"op": "toggle", "id": ...},
+                    {"op": "update", "id": ..., <fields>}, {"op": "delete", "id": ...}]}
+    An invalid operation fails on its own; the rest are written with one
+    flush (a multi-row INSERT and batched UPDATEs) and logged together
+    Returns: one result per operation, in order
+    """
+    data = request.get_json(silent=True) or {}
+    operations = data.get('operations')
+    if not isinstance(operations, list) or not operations:
+        return jsonify({"success": False, "message": "operations must be a non-empty list"}), 400
+    if len(operations) > MAX_BULK_OPERATIONS:
+        return jsonify({"success": False, "message": f"At most {MAX_BULK_OPERATIONS} operations per request"}), 400
+    
+    # Every existing task the batch refers to, in one query
+    ids = {op.get('id') for op in operations if isinstance(op, dict) and isinstance(op.get('id'), int)}
+    owned = {t.id: t for t in Task.query.filter(Task.user_id == current_user.id, Task.id.in_(ids))} if ids else {}
+    
+    now = datetime.now(timezone.utc)
+    results = []
+    applied = []
+    for op in operations:
+        try:
+            task, activity = apply_task_operation(op, owned, now)
+        except ValueError as e:
+            results.append({"success": False, "message": str(e)})
+            continue
+        result = {"success": True}
+        applied.append((op['op'], task, activity, result))
+        results.append(result)
+    
+    if applied:
+        # Flushed before the commit so new ids are known and nothing is reloaded after it
+        db.session.flush()
+        changes = {}
+        for kind, task, _, result in applied:
+            result["id"] = task.id
+            if kind == 'toggle':
+                result["completed"] = task.completed
+            elif kind != 'delete':
+                result["task"] = serialize_task(task)
+            changes[task.id] = (snapshot_task(task), not task.completed and not task.is_deleted)
+        db.session.commit()
+        
+        for task_id in changes:
+            score_cache.invalidate(task_id)
+        task_rankings.tasks_changed(current_user.id, list(changes.values()),
+                                    version=data_versions.get(current_user.id))
+        log_activities(current_user.id, [activity for _, _, activity, _ in applied])
+    
+    return jsonify({"success": True, "results": results})
+
+@app.route('/suggest', methods=['GET', 'POST'])
 @login_required
 def suggest():
-    from priority_algorithm import calculate_master_priority, create_daily_plan
+    from priority_algorithm import local_now
+    
+    # The user's pending tasks, kept ranked (highest first) between requests
+    # and reloaded when another worker changed them
+    now = local_now()
+    version = data_versions.get(current_user.id)
+    ranking = task_rankings.get(current_user.id, now, version)
     
-    # Get all pending tasks for the user
-    tasks = Task.query.filter_by(user_id=current_user.id, completed=False).all()
+    # The plan only changes with the tasks or at the ranking's next time boundary
+    return versioned_response('suggest', version, ranking.valid_until(now).isoformat(),
+                              lambda: jsonify(suggestion_body(ranking, now)))
+
+def suggestion_body(ranking, now):
+    from itertools import chain, islice
+    from priority_algorithm import create_daily_plan
     
-    if not tasks:
-        return jsonify({
+    if not len(ranking):
+        return {
             "suggestion": "No pending tasks! Add some tasks to get started.",
             "ordered_tasks": [],
             "daily_plan": None
-        })
+        }
 
-    # Create daily plan using advanced algorithm
-    daily_plan, top_tasks = create_daily_plan(tasks, max_tasks=10)
-    
-    # Calculate priority scores for all tasks
-    scored_tasks = []
-    for task in tasks:
-        score, reasons, time_rec = calculate_master_priority(task)
-        scored_tasks.append({
-            'task': task,
-            'score': score,
-            'reasons': reasons,
-            'time_recommendation': time_rec
-        })
+    # Only the top of the ranking is read - everything below reuses it
+    ranked = ranking.ranked(now)
+    scored_tasks = list(islice(ranked, 15))  # Top 15 tasks
     
-    # Sort by score (highest first)
-    scored_tasks.sort(key=lambda x: x['score'], reverse=True)
+    # Create daily plan using advanced algorithm
+    daily_plan, top_tasks = create_daily_plan(None, max_tasks=10, scored_tasks=chain(scored_tasks, ranked))
     
     # Build ordered task list
     ordered_tasks = []
-    for i, item in enumerate(scored_tasks[:15], 1):  # Top 15 tasks
+    for i, item in enumerate(scored_tasks, 1):
         task = item['task']
         ordered_tasks.append({
             'rank': i,
             'text': task.text,
             'priority': task.priority,
             'category': task.category,
-            'due_date': task.due_date,
+            'due_date': isoformat(task.due_date),
             'estimated_time': task.estimated_time,
             'importance': task.importance,
             'score': item['score'],
@@ -485,26 +940,32 @@ def suggest():
         } for item in daily_plan['afternoon']]
     }
     
-    return jsonify({
+    return {
         "suggestion": suggestion_text,
         "ordered_tasks": ordered_tasks,
-        "total_pending": len(tasks),
-        "total_time_needed": sum(t.estimated_time for t in tasks),
+        "total_pending": len(ranking),
+        "total_time_needed": ranking.total_time,
         "daily_plan": plan_summary,
         "top_time_recommendation": top_time_rec
-    })
+    }
 
 # Review System Routes
 @app.route('/reviews', methods=['GET'])
 def get_reviews():
-    reviews = Review.query.filter_by(is_approved=True).order_by(Review.created_at.desc()).limit(20).all()
+    # Public and on every page load: served from the cache until a review changes
+    key = f"reviews:{response_cache.generation('reviews')}"
+    return cached_json(key, REVIEWS_CACHE_TTL, review_list_response)
+
+def review_list_response():
+    # Author emails come with the same query instead of one lazy load per review
+    reviews = db.session.execute(review_list_query()).all()
     review_list = [{
-        'id': r.id,
-        'rating': r.rating,
-        'text': r.text,
-        'user_email': r.author.email.split('@')[0] + '***',  # Anonymize
-        'created_at': r.created_at
-    } for r in reviews]
+        'id': review_id,
+        'rating': rating,
+        'text': text,
+        'user_email': email.split('@')[0] + '***',  # Anonymize
+        'created_at': created_at
+    } for review_id, rating, text, email, created_at in reviews]
     return jsonify({'reviews': review_list})
 
 @app.route('/add-review', methods=['POST'])
@@ -543,8 +1004,7 @@ def add_review():
 def admin_page():
     if not current_user.is_admin:
         return "Access Denied", 403
-    from flask import send_file
-    return send_file('admin.html')
+    return static_assets.response('admin.html')
 
 @app.route('/admin/stats', methods=['GET'])
 @login_required
@@ -552,24 +1012,49 @@ def admin_stats():
     if not current_user.is_admin:
         return jsonify({"error": "Access denied"}), 403
     
-    from sqlalchemy import func
+    return cached_json('admin:stats', ADMIN_STATS_CACHE_TTL, admin_stats_response)
+
+def admin_stats_response():
+    # Materialized counters: one small read instead of full-table counts
+    return jsonify(admin_stats_body(dashboard_stats.counters()))
+
+def admin_stats_body(counters):
+    total_reviews = counters.get('reviews', 0)
+    avg_rating = counters.get('review_rating_sum', 0) / total_reviews if total_reviews else 0
+    
+    return {
+        'total_users': counters.get('users', 0),
+        'total_tasks': counters.get('tasks', 0),
+        'active_tasks': counters.get('tasks_active', 0),
+        'completed_tasks': counters.get('tasks_completed', 0),
+        'deleted_tasks': counters.get('tasks_deleted', 0),
+        'total_reviews': total_reviews,
+        'avg_rating': round(avg_rating, 2)
+    }
+
+@app.route('/admin/cache', methods=['GET'])
+@login_required
+def admin_cache():
+    if not current_user.is_admin:
+        return jsonify({"error": "Access denied"}), 403
     
-    total_users = User.query.count()
-    total_tasks = Task.query.count()
-    active_tasks = Task.query.filter_by(is_deleted=False, completed=False).count()
-    completed_tasks = Task.query.filter_by(completed=True).count()
-    deleted_tasks = Task.query.filter_by(is_deleted=True).count()
-    total_reviews = Review.query.count()
-    avg_rating = db.session.query(func.avg(Review.rating)).scalar() or 0
+    # Counters of this worker's cache operations
+    return jsonify({'backend': response_cache.name, **response_cache.metrics.snapshot()})
+
+@app.route('/admin/slow-queries', methods=['GET'])
+@login_required
+def admin_slow_queries():
+    if not current_user.is_admin:
+        return jsonify({"error": "Access denied"}), 403
     
+    # This worker's slowest statement fingerprints
+    sort = request.args.get('sort', 'total_ms')
+    if sort not in ('total_ms', 'max_ms', 'mean_ms', 'count'):
+        return jsonify({"error": "sort must be total_ms, max_ms, mean_ms or count"}), 400
+    limit = min(request.args.get('limit', 20, type=int), 100)
     return jsonify({
-        'total_users': total_users,
-        'total_tasks': total_tasks,
-        'active_tasks': active_tasks,
-        'completed_tasks': completed_tasks,
-        'deleted_tasks': deleted_tasks,
-        'total_reviews': total_reviews,
-        'avg_rating': round(avg_rating, 2)
+        "threshold_ms": slow_query_log.threshold * 1000,
+        "queries": slow_query_log.top(limit, sort)
     })
 
 @app.route('/admin/users', methods=['GET'])
@@ -578,16 +1063,21 @@ def admin_users():
     if not current_user.is_admin:
         return jsonify({"error": "Access denied"}), 403
     
+    # Per-user task counts in one grouped query instead of loading every task
+    counts = {row[0]: row[1:] for row in task_state_counts(Task.user_id).group_by(Task.user_id)}
     users = User.query.all()
-    user_list = [{
-        'id': u.id,
-        'email': u.email,
-        'is_admin': u.is_admin,
-        'created_at': u.created_at,
-        'task_count': len(u.tasks),
-        'completed_count': len([t for t in u.tasks if t.completed]),
-        'deleted_count': len([t for t in u.tasks if t.is_deleted])
-    } for u in users]
+    user_list = []
+    for u in users:
+        task_count, _, completed_count, deleted_count = counts.get(u.id, (0, 0, 0, 0))
+        user_list.append({
+            'id': u.id,
+            'email': u.email,
+            'is_admin': u.is_admin,
+            'created_at': u.created_at,
+            'task_count': task_count,
+            'completed_count': completed_count,
+            'deleted_count': deleted_count
+        })
     
     return jsonify({'users': user_list})
 
@@ -602,7 +1092,7 @@ def admin_user_tasks(user_id):
         return jsonify({"error": "User not found"}), 404
     
     # Get all tasks including deleted
-    tasks = Task.query.filter_by(user_id=user_id).all()
+    tasks = db.session.execute(user_tasks_query(user_id)).scalars().all()
     task_list = [{
         'id': t.id,
         'text': t.text,
@@ -610,9 +1100,9 @@ def admin_user_tasks(user_id):
         'is_deleted': t.is_deleted,
         'priority': t.priority,
         'category': t.category,
-        'created_at': t.created_at,
-        'completed_at': t.completed_at,
-        'deleted_at': t.deleted_at
+        'created_at': isoformat(t.created_at),
+        'completed_at': isoformat(t.completed_at),
+        'deleted_at': isoformat(t.deleted_at)
     } for t in tasks]
     
     return jsonify({
@@ -626,28 +1116,34 @@ def admin_all_tasks():
     if not current_user.is_admin:
         return jsonify({"error": "Access denied"}), 403
     
-    # Get all tasks from all users with user information
-    tasks = Task.query.all()
-    task_list = [{
+    # One page of tasks from all users with the owner's email in the same query
+    try:
+        query, limit = admin_tasks_query(request.args)
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": f"Invalid filter: {e}"}), 400
+    tasks, next_cursor = split_page(db.session.execute(query).all(), limit, task_of=lambda row: row[0])
+    
+    return jsonify({
+        'tasks': [serialize_admin_task(t, email) for t, email in tasks],
+        'next_cursor': next_cursor
+    })
+
+def serialize_admin_task(t, email):
+    return {
         'id': t.id,
         'text': t.text,
-        'user_email': t.owner.email,
+        'user_email': email,
         'user_id': t.user_id,
         'completed': t.completed,
         'is_deleted': t.is_deleted,
         'priority': t.priority,
         'category': t.category,
-        'created_at': t.created_at,
-        'completed_at': t.completed_at,
-        'deleted_at': t.deleted_at,
+        'created_at': isoformat(t.created_at),
+        'completed_at': isoformat(t.completed_at),
+        'deleted_at': isoformat(t.deleted_at),
         'estimated_time': t.estimated_time,
         'importance': t.importance
-    } for t in tasks]
-    
-    return jsonify({
-        'total_tasks': len(task_list),
-        'tasks': task_list
-    })
+    }
 
 @app.route('/admin/activities', methods=['GET'])
 @login_required
@@ -657,12 +1153,20 @@ def admin_activities():
     
     # Get recent activities
     limit = request.args.get('limit', 100, type=int)
-    activities = UserActivity.query.order_by(UserActivity.timestamp.desc()).limit(limit).all()
+    activities = db.session.execute(recent_activity_query(limit)).all()
     
-    activity_list = [{
+    activity_list = [serialize_activity(a, email) for a, email in activities]
+    
+    return jsonify({
+        'total': len(activity_list),
+        'activities': activity_list
+    })
+
+def serialize_activity(a, email):
+    return {
         'id': a.id,
         'user_id': a.user_id,
-        'user_email': db.session.get(User, a.user_id).email if db.session.get(User, a.user_id) else 'Unknown',
+        'user_email': email or 'Unknown',
         'action': a.action,
         'ip_address': a.ip_address,
         'device_type': a.device_type,
@@ -672,12 +1176,7 @@ def admin_activities():
         'location_city': a.location_city,
         'timestamp': a.timestamp,
         'details': a.details
-    } for a in activities]
-    
-    return jsonify({
-        'total': len(activity_list),
-        'activities': activity_list
-    })
+    }
 
 @app.route('/admin/user/<int:user_id>/activities', methods=['GET'])
 @login_required
@@ -689,7 +1188,7 @@ def admin_user_activities(user_id):
     if not user:
         return jsonify({"error": "User not found"}), 404
     
-    activities = UserActivity.query.filter_by(user_id=user_id).order_by(UserActivity.timestamp.desc()).all()
+    activities = db.session.execute(user_activity_query(user_id)).scalars().all()
     
     activity_list = [{
         'id': a.id,
@@ -708,59 +1207,95 @@ def admin_user_activities(user_id):
         'activities': activity_list
     })
 
+def export_response(statement, fields, name):
+    """
+    Stream the rows of a select() as an NDJSON or CSV download
+    Query args: format=ndjson|csv, gzip=1 to compress on the fly
+    Rows are fetched through a server-side cursor in batches (yield_per)
+    """
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"error": f"Invalid format: {fmt}"}), 400
+    compress = request.args.get('gzip', '').lower() in ('1', 'true', 'yes')
+    
+    rows = db.session.execute(statement.execution_options(yield_per=1000))
+    response = Response(
+        stream_with_context(export_stream(rows, fields, fmt, gzip=compress)),
+        mimetype='application/gzip' if compress else EXPORT_FORMATS[fmt]
+    )
+    filename = f"{name}.{fmt}.gz" if compress else f"{name}.{fmt}"
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+@app.route('/admin/export/tasks', methods=['GET'])
+@login_required
+def admin_export_tasks():
+    if not current_user.is_admin:
+        return jsonify({"error": "Access denied"}), 403
+    
+    columns = [Task.id, Task.text, User.email.label('user_email'), Task.user_id, Task.completed,
+               Task.is_deleted, Task.priority, Task.category, Task.due_date, Task.estimated_time,
+               Task.importance, Task.created_at, Task.completed_at, Task.deleted_at]
+    statement = db.select(*columns).join(User, Task.user_id == User.id)
+    try:
+        statement = filter_admin_tasks(statement, request.args)
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": f"Invalid filter: {e}"}), 400
+    
+    return export_response(statement.order_by(Task.id), [c.key for c in columns], 'tasks')
+
+@app.route('/admin/export/activities', methods=['GET'])
+@login_required
+def admin_export_activities():
+    if not current_user.is_admin:
+        return jsonify({"error": "Access denied"}), 403
+    
+    columns = [UserActivity.id, UserActivity.user_id, User.email.label('user_email'),
+               UserActivity.action, UserActivity.ip_address, UserActivity.user_agent,
+               UserActivity.device_type, UserActivity.browser, UserActivity.os,
+               UserActivity.location_country, UserActivity.location_city,
+               UserActivity.timestamp, UserActivity.details]
+    statement = db.select(*columns).outerjoin(User, UserActivity.user_id == User.id)
+    user_id = request.args.get('user_id')
+    if user_id:
+        if not user_id.isdigit():
+            return jsonify({"error": f"Invalid user_id: {user_id}"}), 400
+        statement = statement.filter(UserActivity.user_id == int(user_id))
+    
+    return export_response(statement.order_by(UserActivity.timestamp), [c.key for c in columns], 'activities')
+
 @app.route('/admin/analytics', methods=['GET'])
 @login_required
 def admin_analytics():
     if not current_user.is_admin:
         return jsonify({"error": "Access denied"}), 403
     
-    from sqlalchemy import func
-    
-    # Device analytics
-    device_stats = db.session.query(
-        UserActivity.device_type,
-        func.count(UserActivity.id)
-    ).group_by(UserActivity.device_type).all()
-    
-    # Browser analytics
-    browser_stats = db.session.query(
-        UserActivity.browser,
-        func.count(UserActivity.id)
-    ).group_by(UserActivity.browser).all()
-    
-    # OS analytics
-    os_stats = db.session.query(
-        UserActivity.os,
-        func.count(UserActivity.id)
-    ).group_by(UserActivity.os).all()
-    
-    # Action analytics
-    action_stats = db.session.query(
-        UserActivity.action,
-        func.count(UserActivity.id)
-    ).group_by(UserActivity.action).all()
-    
-    # Most active users
-    active_users = db.session.query(
-        UserActivity.user_id,
-        func.count(UserActivity.id).label('activity_count')
-    ).group_by(UserActivity.user_id).order_by(func.count(UserActivity.id).desc()).limit(10).all()
+    # The rollup (advanced by the activity writer) plus the raw rows it
+    # has not reached yet; compacted days only exist in the rollup
+    totals, most_active = dashboard_stats.analytics(10)
     
     active_users_list = [{
-        'user_id': u[0],
-        'user_email': db.session.get(User, u[0]).email if db.session.get(User, u[0]) else 'Unknown',
-        'activity_count': u[1]
-    } for u in active_users]
+        'user_id': user_id,
+        'user_email': email or 'Unknown',
+        'activity_count': count
+    } for user_id, email, count in most_active]
     
     return jsonify({
-        'devices': {d[0] or 'unknown': d[1] for d in device_stats},
-        'browsers': {b[0] or 'unknown': b[1] for b in browser_stats},
-        'operating_systems': {o[0] or 'unknown': o[1] for o in os_stats},
-        'actions': {a[0]: a[1] for a in action_stats},
+        'devices': {k or 'unknown': v for k, v in totals['device_type'].items()},
+        'browsers': {k or 'unknown': v for k, v in totals['browser'].items()},
+        'operating_systems': {k or 'unknown': v for k, v in totals['os'].items()},
+        'actions': totals['action'],
         'most_active_users': active_users_list
     })
 
 # Error handlers for database consistency
+@app.errorhandler(password_hashing.HasherBusy)
+def hasher_busy(e):
+    # Login storm: the hashing queue stayed full, so the client retries later
+    response = jsonify({"success": False, "message": "Too many sign-ins right now, please try again"})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
 @app.errorhandler(Exception)
 def handle_exception(e):
     # Rollback any pending database transactions on error
@@ -773,6 +1308,18 @@ def shutdown_session(exception=None):
     # Ensure database sessions are cleaned up properly
     db.session.remove()
 
+@app.route('/metrics')
+def metrics():
+    # Scrapers authenticate with METRICS_TOKEN; without one only admins may read
+    import hmac
+    token = os.environ.get('METRICS_TOKEN')
+    if token:
+        if not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            return jsonify({"error": "Access denied"}), 401
+    elif not (current_user.is_authenticated and current_user.is_admin):
+        return jsonify({"error": "Access denied"}), 403
+    return Response(request_metrics.render(), mimetype='text/plain; version=0.0.4')
+
 # Health check endpoint
 @app.route('/health')
 def health_check():
@@ -0,0 +1,267 @@
+"""
+Slow query log
+Engine events time every statement. Statements slower than the threshold
+are written as one JSON object per line with their normalized SQL, the
+shape of the bound parameters (types, never values), the endpoint that
+ran them and their query plan, captured right away on the same
+connection (EXPLAIN QUERY PLAN on SQLite, EXPLAIN or opt-in EXPLAIN
+ANALYZE on PostgreSQL). Each worker also aggregates them by fingerprint
+for the admin top-N report
+
+Usage: python slow_queries.py <log file> [limit]   (top fingerprints of a JSON log written by every worker)
+"""
+
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+# Statements slower than this are logged
+DEFAULT_THRESHOLD_MS = 200
+
+# A fingerprint's plan is captured again at most this often
+EXPLAIN_INTERVAL = 60.0
+
+# Fingerprints kept per worker; the least recently seen is dropped
+MAX_FINGERPRINTS = 500
+
+# Statements EXPLAIN accepts
+EXPLAINABLE = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH')
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'(?<![\w.])-?\d+(?:\.\d+)?\b')
+_PARAMETER = re.compile(r'%\(\w+\)s|%s|(?<![:\w]):\w+|\?')
+_TUPLE = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_TUPLES = re.compile(r'\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+')
+_SPACE = re.compile(r'\s+')
+
+
+def normalize_sql(statement):
+    """SQL with literals and placeholders as ?, placeholder lists as (...) and one space between tokens"""
+    sql = _STRING.sub('?', statement)
+    sql = _NUMBER.sub('?', sql)
+    sql = _PARAMETER.sub('?', sql)
+    sql = _TUPLE.sub('(...)', sql)
+    sql = _TUPLES.sub('(...)', sql)
+    return _SPACE.sub(' ', sql).strip()
+
+
+def fingerprint(normalized):
+    return hashlib.sha1(normalized.encode('utf-8')).hexdigest()[:12]
+
+
+def value_type(value):
+    return 'null' if value is None else type(value).__name__
+
+
+def parameter_shape(parameters, executemany=False):
+    """Types of the bound parameters: {name: type}, [type, ...] or, for executemany, {'rows': n, 'row': ...}"""
+    if executemany:
+        rows = list(parameters or ())
+        return {'rows': len(rows), 'row': parameter_shape(rows[0]) if rows else None}
+    if isinstance(parameters, dict):
+        return {name: value_type(value) for name, value in parameters.items()}
+    return [value_type(value) for value in parameters or ()]
+
+
+def flask_endpoint():
+    """'METHOD /rule' of the current Flask request, or None outside a request"""
+    from flask import has_request_context, request
+
+    if not has_request_context():
+        return None
+    rule = request.url_rule
+    return f"{request.method} {rule.rule if rule is not None else request.path}"
+
+
+def explain(connection, dialect, statement, parameters, analyze=False):
+    """
+    Plan lines of a statement that just ran, from a new cursor on its DBAPI connection
+    Returns None if the statement cannot be explained
+    """
+    keyword = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ''
+    if keyword not in EXPLAINABLE:
+        return None
+    if dialect == 'sqlite':
+        explain_cursor = connection.cursor()
+        try:
+            explain_cursor.execute(f'EXPLAIN QUERY PLAN {statement}', parameters or ())
+            return [row[-1] for row in explain_cursor.fetchall()]
+        finally:
+            explain_cursor.close()
+    if dialect != 'postgresql':
+        return None
+
+    # ANALYZE runs the statement again, so it is only used for reads; a failed
+    # EXPLAIN must not abort the request's transaction
+    prefix = 'EXPLAIN ANALYZE' if analyze and keyword == 'SELECT' else 'EXPLAIN'
+    explain_cursor = connection.cursor()
+    try:
+        explain_cursor.execute('SAVEPOINT slow_query_explain')
+        try:
+            explain_cursor.execute(f'{prefix} {statement}', parameters)
+            plan = [row[0] for row in explain_cursor.fetchall()]
+        except Exception:
+            explain_cursor.execute('ROLLBACK TO SAVEPOINT slow_query_explain')
+            raise
+        finally:
+            explain_cursor.execute('RELEASE SAVEPOINT slow_query_explain')
+        return plan
+    finally:
+        explain_cursor.close()
+
+
+def aggregate(records, stats=None):
+    """Fold slow query records into {fingerprint: stats} (see SlowQueryLog.top)"""
+    stats = {} if stats is None else stats
+    for record in records:
+        entry = stats.get(record['fingerprint'])
+        if entry is None:
+            entry = stats[record['fingerprint']] = {
+                'fingerprint': record['fingerprint'], 'sql': record['sql'], 'count': 0,
+                'total_ms': 0.0, 'max_ms': 0.0, 'endpoints': {}, 'plan': None, 'last_seen': None,
+            }
+        entry['count'] += 1
+        entry['total_ms'] += record['duration_ms']
+        entry['max_ms'] = max(entry['max_ms'], record['duration_ms'])
+        endpoint = record.get('endpoint') or 'background'
+        entry['endpoints'][endpoint] = entry['endpoints'].get(endpoint, 0) + 1
+        entry['plan'] = record.get('plan') or entry['plan']
+        entry['last_seen'] = record['time']
+    return stats
+
+
+def top(stats, limit=20, sort='total_ms'):
+    """The `limit` worst fingerprints by total_ms, max_ms, mean_ms or count"""
+    entries = [dict(entry, total_ms=round(entry['total_ms'], 2),
+                    mean_ms=round(entry['total_ms'] / entry['count'], 2))
+               for entry in stats.values()]
+    return sorted(entries, key=lambda entry: entry[sort], reverse=True)[:limit]
+
+
+class SlowQueryLog:
+    """
+    Times every statement of an engine and records the slow ones
+    out: file-like object the JSON lines go to (default stdout)
+    """
+
+    def __init__(self, threshold_ms=DEFAULT_THRESHOLD_MS, capture_plans=True, analyze=False,
+                 out=None, context=flask_endpoint):
+        self.threshold = threshold_ms / 1000
+        self.capture_plans = capture_plans
+        self.analyze = analyze
+        self.out = out
+        self.context = context
+        self.dialect = None
+        self.stats = {}
+        self._explained = {}  # fingerprint -> when its plan was last captured
+        self._lock = threading.Lock()
+
+    def install(self, engine):
+        from sqlalchemy import event
+
+        self.dialect = engine.dialect.name
+        event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._slow_query_start = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        start = getattr(context, '_slow_query_start', None)
+        if start is None:
+            return
+        elapsed = time.perf_counter() - start
+        if elapsed >= self.threshold:
+            # The DBAPI connection, also for async drivers' adapted cursors
+            self.record(conn.connection.dbapi_connection, statement, parameters, executemany, elapsed)
+
+    def record(self, connection, statement, parameters, executemany, elapsed):
+        sql = normalize_sql(statement)
+        key = fingerprint(sql)
+        record = {
+            'event': 'slow_query',
+            'time': datetime.now(timezone.utc).isoformat(),
+            'duration_ms': round(elapsed * 1000, 2),
+            'fingerprint': key,
+            'sql': sql,
+            'params': parameter_shape(parameters, executemany),
+            'endpoint': self.context() if self.context else None,
+            'plan': None,
+        }
+        if self.capture_plans and self._should_explain(key):
+            try:
+                first = parameters[0] if executemany and parameters else parameters
+                record['plan'] = explain(connection, self.dialect, statement, first, self.analyze)
+            except Exception as e:
+                record['plan_error'] = str(e)
+        with self._lock:
+            aggregate([record], self.stats)
+            if len(self.stats) > MAX_FINGERPRINTS:
+                oldest = min(self.stats.values(), key=lambda entry: entry['last_seen'])
+                del self.stats[oldest['fingerprint']]
+        self.write(record)
+
+    def write(self, record):
+        line = json.dumps(record, separators=(',', ':'), default=str)
+        if self.out is None:
+            print(line, flush=True)
+        else:
+            with self._lock:
+                self.out.write(line + '\n')
+                self.out.flush()
+
+    def top(self, limit=20, sort='total_ms'):
+        with self._lock:
+            stats = {key: dict(entry, endpoints=dict(entry['endpoints'])) for key, entry in self.stats.items()}
+        return top(stats, limit, sort)
+
+    def _should_explain(self, key):
+        now = time.monotonic()
+        with self._lock:
+            if now - self._explained.get(key, -EXPLAIN_INTERVAL) < EXPLAIN_INTERVAL:
+                return False
+            self._explained[key] = now
+            if len(self._explained) > MAX_FINGERPRINTS:
+                self._explained.pop(next(iter(self._explained)))
+        return True
+
+
+def from_environment():
+    """
+    SlowQueryLog configured by SLOW_QUERY_MS, SLOW_QUERY_EXPLAIN (1/0),
+    SLOW_QUERY_ANALYZE (1/0, PostgreSQL) and SLOW_QUERY_LOG (file, default stdout)
+    """
+    path = os.environ.get('SLOW_QUERY_LOG')
+    return SlowQueryLog(
+        threshold_ms=float(os.environ.get('SLOW_QUERY_MS', DEFAULT_THRESHOLD_MS)),
+        capture_plans=os.environ.get('SLOW_QUERY_EXPLAIN', '1') == '1',
+        analyze=os.environ.get('SLOW_QUERY_ANALYZE', '0') == '1',
+        out=open(path, 'a', encoding='utf-8') if path else None,
+    )
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print(__doc__.strip().splitlines()[-1])
+        sys.exit(2)
+    limit = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    records = []
+    with open(sys.argv[1], encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith('{') and '"slow_query"' in line:
+                records.append(json.loads(line))
+    print(f"{len(records)} slow statements")
+    for entry in top(aggregate(records), limit):
+        print(f"\n{entry['total_ms']:>10.1f} ms total  {entry['count']:>6}x  mean {entry['mean_ms']:.1f} ms  "
+              f"max {entry['max_ms']:.1f} ms  [{entry['fingerprint']}]")
+        print(f"  {entry['sql'][:300]}")
+        print(f"  endpoints: {', '.join(f'{e} ({n})' for e, n in entry['endpoints'].items())}")
+        for line in entry['plan'] or ():
+            print(f"  | {line}")
@@ -0,0 +1,228 @@
+"""
+Static asset pipeline
+The build step copies the CSS/JS files under content-hashed names,
+rewrites the HTML pages to reference them and stores gzip and brotli
+variants of every file next to a manifest. The server keeps the built
+files in memory and answers with Cache-Control, ETag/304 and the
+smallest encoding the client accepts, so a worker never reads a static
+file from disk and browsers never re-download an unchanged asset
+
+Usage: python static_assets.py [build dir]   (run on deploy, default dist/)
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import re
+import sys
+
+try:
+    import brotli
+except ImportError:  # Brotli variants are skipped, gzip still works
+    brotli = None
+
+# Assets served under content-hashed names
+ASSETS = ('styles.css', 'auth-styles.css', 'script.js')
+
+# Pages served at their own URLs; they reference the hashed assets
+PAGES = ('login.html', 'register.html', 'index.html', 'learn.html', 'admin.html')
+
+BUILD_DIR = 'dist'
+ASSET_URL = '/assets/'
+MANIFEST = 'manifest.json'
+
+# Hashed names change with their content, so they can be cached forever;
+# pages and unhashed names are revalidated with their ETag on every use
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REVALIDATE = 'no-cache'
+
+# Smaller files are not worth a compressed variant
+MIN_COMPRESS_SIZE = 256
+
+MIMETYPES = {
+    '.css': 'text/css; charset=utf-8',
+    '.js': 'application/javascript; charset=utf-8',
+    '.html': 'text/html; charset=utf-8',
+}
+
+# Encodings in order of preference, with their file suffix
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()[:12]
+
+
+def hashed_name(name, data):
+    """styles.css -> styles.<hash>.css"""
+    stem, ext = os.path.splitext(name)
+    return f'{stem}.{content_hash(data)}{ext}'
+
+
+def rewrite_references(html, urls):
+    """Point href/src attributes naming an asset at its hashed URL"""
+    pattern = re.compile(r'''((?:href|src)=["'])(%s)(["'])''' % '|'.join(map(re.escape, urls)))
+    return pattern.sub(lambda m: m.group(1) + urls[m.group(2)] + m.group(3), html)
+
+
+def compress(data):
+    """Precompressed variants of data as {encoding: bytes}, keeping only those that are smaller"""
+    if len(data) < MIN_COMPRESS_SIZE:
+        return {}
+    variants = {'gzip': gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['br'] = brotli.compress(data, quality=11)
+    return {encoding: body for encoding, body in variants.items() if len(body) < len(data)}
+
+
+class StaticFile:
+    """One servable file: its bytes, precompressed variants and validators"""
+
+    def __init__(self, name, data, variants, immutable):
+        self.name = name
+        self.data = data
+        self.variants = variants
+        self.immutable = immutable
+        self.mimetype = MIMETYPES.get(os.path.splitext(name)[1], 'application/octet-stream')
+        self.etag = content_hash(data)
+
+    def select(self, accept_encodings):
+        """(encoding or None, body, etag) for an Accept-Encoding header"""
+        for encoding, _ in ENCODINGS:
+            if encoding in self.variants and accept_encodings[encoding]:
+                return encoding, self.variants[encoding], f'{self.etag}-{encoding}'
+        return None, self.data, self.etag
+
+
+def build_assets(root):
+    """
+    Build every static file from the sources in root
+    Returns: ({served name: StaticFile}, {source name: hashed name})
+    """
+    files = {}
+    urls = {}
+    hashed = {}
+    for name in ASSETS:
+        with open(os.path.join(root, name), 'rb') as f:
+            data = f.read()
+        hashed[name] = hashed_name(name, data)
+        urls[name] = ASSET_URL + hashed[name]
+        variants = compress(data)
+        files[hashed[name]] = StaticFile(hashed[name], data, variants, immutable=True)
+        files[name] = StaticFile(name, data, variants, immutable=False)
+    for name in PAGES:
+        with open(os.path.join(root, name), encoding='utf-8') as f:
+            data = rewrite_references(f.read(), urls).encode('utf-8')
+        files[name] = StaticFile(name, data, compress(data), immutable=False)
+    return files, hashed
+
+
+def source_hashes(root):
+    hashes = {}
+    for name in ASSETS + PAGES:
+        with open(os.path.join(root, name), 'rb') as f:
+            hashes[name] = content_hash(f.read())
+    return hashes
+
+
+def write_build(root, out_dir):
+    """Write the built files, their compressed variants and the manifest to out_dir"""
+    files, hashed = build_assets(root)
+    os.makedirs(out_dir, exist_ok=True)
+    for static_file in files.values():
+        path = os.path.join(out_dir, static_file.name)
+        with open(path, 'wb') as f:
+            f.write(static_file.data)
+        for encoding, suffix in ENCODINGS:
+            if encoding in static_file.variants:
+                with open(path + suffix, 'wb') as f:
+                    f.write(static_file.variants[encoding])
+    manifest = {
+        'sources': source_hashes(root),
+        'assets': hashed,
+        'files': {name: static_file.immutable for name, static_file in files.items()},
+    }
+    with open(os.path.join(out_dir, MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return files
+
+
+def load_build(root, out_dir):
+    """
+    Built files from out_dir, or None if there is no build or its
+    sources changed since (then the caller builds in memory)
+    """
+    try:
+        with open(os.path.join(out_dir, MANIFEST)) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get('sources') != source_hashes(root):
+        return None
+    files = {}
+    for name, immutable in manifest['files'].items():
+        path = os.path.join(out_dir, name)
+        with open(path, 'rb') as f:
+            data = f.read()
+        variants = {}
+        for encoding, suffix in ENCODINGS:
+            if os.path.exists(path + suffix):
+                with open(path + suffix, 'rb') as f:
+                    variants[encoding] = f.read()
+        files[name] = StaticFile(name, data, variants, immutable)
+    return files
+
+
+class StaticAssets:
+    """
+    In-memory static files for the Flask routes
+    Loads the build from build_dir when it matches the sources, otherwise
+    builds in memory (local development without a build step)
+    """
+
+    def __init__(self, root, build_dir=BUILD_DIR):
+        self.root = root
+        self.build_dir = os.path.join(root, build_dir)
+        self.files = load_build(root, self.build_dir)
+        if self.files is None:
+            self.files, _ = build_assets(root)
+            print("⚠️ No up-to-date static build found, built assets in memory")
+
+    def hashed_response(self, name):
+        """
+        Response for a content-hashed asset name only; pages and unhashed
+        names are 404 so /assets/ cannot bypass the routes that guard them
+        """
+        static_file = self.files.get(name)
+        return self.response(name if static_file is not None and static_file.immutable else None)
+
+    def response(self, name):
+        """Response for a static file honoring Accept-Encoding and If-None-Match"""
+        from flask import Response, request
+
+        static_file = self.files.get(name)
+        if static_file is None:
+            return Response('Not Found', status=404, mimetype='text/plain')
+        encoding, body, etag = static_file.select(request.accept_encodings)
+        response = Response(body, mimetype=static_file.mimetype)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = IMMUTABLE if static_file.immutable else REVALIDATE
+        if static_file.variants:
+            response.vary.add('Accept-Encoding')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        return response.make_conditional(request)
+
+
+if __name__ == '__main__':
+    root = os.path.dirname(os.path.abspath(__file__))
+    out_dir = os.path.join(root, sys.argv[1] if len(sys.argv) > 1 else BUILD_DIR)
+    files = write_build(root, out_dir)
+    for name in sorted(files):
+        static_file = files[name]
+        sizes = ', '.join(f'{encoding} {len(body)}' for encoding, body in sorted(static_file.variants.items()))
+        print(f"✓ {name}: {len(static_file.data)} bytes" + (f" ({sizes})" if sizes else ""))
+    if brotli is None:
+        print("⚠️ brotli is not installed, only gzip variants were written")
+    print(f"✅ Static assets built in {out_dir}")
@@ -0,0 +1,242 @@
+"""
+Incremental per-user task ranking for /suggest
+Keeps each user's pending tasks sorted by priority score so a
+suggestion only reads the top of the ranking instead of loading,
+scoring and sorting every task on every request
+"""
+
+import heapq
+import threading
+from bisect import bisect_left, insort
+from collections import OrderedDict, namedtuple
+from datetime import timedelta
+
+from priority_algorithm import local_now
+
+# Detached copy of the Task fields the ranking and /suggest need
+TaskSnapshot = namedtuple('TaskSnapshot', [
+    'id', 'text', 'priority', 'category', 'due_date',
+    'estimated_time', 'importance', 'created_at'
+])
+
+
+def snapshot_task(task):
+    return TaskSnapshot(task.id, task.text, task.priority, task.category, task.due_date,
+                        task.estimated_time, task.importance, task.created_at)
+
+
+class TaskRanking:
+    """
+    One user's pending tasks in rank order (highest score first)
+
+    The order is a sorted list of (-score, task id) keys maintained with
+    bisect, so ties keep ascending id order like the full sort did.
+    Scores come from a ScoreCache. Tasks whose urgency or aging bucket
+    has expired are re-scored and re-positioned individually; the hourly
+    energy change re-scores everything from the cached static terms.
+    """
+
+    def __init__(self, score_cache, tasks, now, version=None):
+        self.score_cache = score_cache
+        self.version = version  # Owner's data version the tasks were loaded at
+        self._lock = threading.Lock()
+        self._snapshots = {}
+        self._rebuild([snapshot_task(t) for t in tasks], now)
+
+    def __len__(self):
+        return len(self._snapshots)
+
+    @property
+    def total_time(self):
+        return self._total_time
+
+    def upsert(self, task, now=None):
+        """Insert or re-score one task"""
+        now = now or local_now()
+        with self._lock:
+            self._refresh(now)
+            self._insert(snapshot_task(task), now)
+
+    def remove(self, task_id):
+        with self._lock:
+            self._discard(task_id)
+
+    def ranked(self, now=None):
+        """
+        Yield scored tasks in rank order as
+        {'task', 'score', 'reasons', 'time_recommendation'}
+        """
+        now = now or local_now()
+        with self._lock:
+            self._refresh(now)
+            # Only the order is copied here; entries are looked up as the
+            # caller iterates, so reading the top stays cheap. A rebuild
+            # swaps in new dicts and leaves these ones untouched
+            order = list(self._order)
+            snapshots = self._snapshots
+            results = self._results
+        for _, task_id in order:
+            snap = snapshots.get(task_id)
+            result = results.get(task_id)
+            if snap is None or result is None:
+                continue  # Removed by a concurrent write
+            score, reasons, time_rec = result
+            yield {
+                'task': snap,
+                'score': score,
+                'reasons': list(reasons),
+                'time_recommendation': time_rec
+            }
+
+    def valid_until(self, now=None):
+        """
+        Earliest instant the ranking may change without a task write:
+        the next hour (energy) or urgency/aging boundary
+        """
+        now = now or local_now()
+        with self._lock:
+            self._refresh(now)
+            self._drop_stale_expiry()
+            until = self._hour_start + timedelta(hours=1)
+            if self._expiry:
+                until = min(until, self._expiry[0][0])
+        return until
+
+    def top(self, k, now=None):
+        ranked = self.ranked(now)
+        return [st for _, st in zip(range(k), ranked)]
+
+    def _rebuild(self, snapshots, now):
+        self._snapshots = {s.id: s for s in snapshots}
+        self._results = {}
+        self._keys = {}
+        self._until = {}
+        self._expiry = []
+        self._total_time = sum(s.estimated_time or 30 for s in snapshots)
+        self._hour_start = now.replace(minute=0, second=0, microsecond=0)
+        self._score(snapshots, now)
+        self._order = sorted(self._keys.values())
+
+    def _insert(self, snap, now):
+        self._discard(snap.id)
+        self._snapshots[snap.id] = snap
+        self._total_time += snap.estimated_time or 30
+        self._score([snap], now)
+        insort(self._order, self._keys[snap.id])
+
+    def _score(self, snapshots, now):
+        results = self.score_cache.score_tasks(snapshots, now)
+        for snap, result in zip(snapshots, results):
+            self._results[snap.id] = result
+            self._keys[snap.id] = (-result[0], snap.id)
+            until = self.score_cache.valid_until(snap.id)
+            if until is not None:
+                self._until[snap.id] = until
+                heapq.heappush(self._expiry, (until, snap.id))
+        if len(self._expiry) > 2 * len(self._until) + 64:
+            # Mostly entries of removed or re-scored tasks: start over
+            self._expiry = [(until, task_id) for task_id, until in self._until.items()]
+            heapq.heapify(self._expiry)
+
+    def _discard(self, task_id):
+        snap = self._snapshots.pop(task_id, None)
+        if snap is None:
+            return
+        self._total_time -= snap.estimated_time or 30
+        key = self._keys.pop(task_id)
+        del self._order[bisect_left(self._order, key)]
+        del self._results[task_id]
+        self._until.pop(task_id, None)
+
+    def _drop_stale_expiry(self):
+        """Pop heap entries that no longer match their task's current boundary"""
+        while self._expiry:
+            until, task_id = self._expiry[0]
+            if self._until.get(task_id) == until:
+                return
+            heapq.heappop(self._expiry)
+
+    def _refresh(self, now):
+        if not (self._hour_start <= now < self._hour_start + timedelta(hours=1)):
+            # Energy alignment changed for every task
+            self._rebuild(list(self._snapshots.values()), now)
+            return
+
+        # Re-position only the tasks whose urgency/aging bucket expired
+        expired = {}
+        while self._expiry and self._expiry[0][0] <= now:
+            until, task_id = heapq.heappop(self._expiry)
+            if self._until.get(task_id) == until:
+                expired[task_id] = self._snapshots[task_id]
+        for snap in expired.values():
+            self._insert(snap, now)
+
+
+class RankingStore:
+    """
+    Per-user TaskRanking instances, built lazily with load(user_id)
+    (the user's pending tasks) and kept for the most recent max_users
+
+    When callers pass the owner's data version, a ranking loaded at
+    another version is reloaded, so writes handled by other workers
+    are picked up; writes applied here move it to the new version
+    """
+
+    def __init__(self, score_cache, load, max_users=1000):
+        self.score_cache = score_cache
+        self.load = load
+        self.max_users = max_users
+        self._rankings = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id, now=None, version=None):
+        ranking = self.cached(user_id, version)
+        if ranking is None:
+            ranking = self.put(user_id, self.load(user_id), now, version)
+        return ranking
+
+    def cached(self, user_id, version=None):
+        """The user's loaded ranking, or None if there is none at this version"""
+        with self._lock:
+            ranking = self._rankings.get(user_id)
+            if ranking is not None and (version is None or ranking.version == version):
+                self._rankings.move_to_end(user_id)
+                return ranking
+        return None
+
+    def put(self, user_id, tasks, now=None, version=None):
+        """Rank the user's pending tasks, loaded by the caller, and keep the ranking"""
+        ranking = TaskRanking(self.score_cache, tasks, now or local_now(), version)
+        with self._lock:
+            self._rankings[user_id] = ranking
+            while len(self._rankings) > self.max_users:
+                self._rankings.popitem(last=False)
+        return ranking
+
+    def task_changed(self, task, pending, version=None):
+        """Apply a task write to its owner's ranking if one is loaded"""
+        self.tasks_changed(task.user_id, [(task, pending)], version)
+
+    def tasks_changed(self, user_id, changes, version=None):
+        """
+        Apply the (task, pending) writes of one transaction to the user's
+        ranking if one is loaded. version is the owner's data version
+        after the transaction; a ranking that missed a write in between
+        is dropped instead
+        """
+        ranking = self._rankings.get(user_id)
+        if ranking is None:
+            return
+        if version is not None and ranking.version is not None and ranking.version + 1 != version:
+            self.drop(user_id)
+            return
+        for task, pending in changes:
+            if pending:
+                ranking.upsert(task)
+            else:
+                ranking.remove(task.id)
+        ranking.version = version
+
+    def drop(self, user_id):
+        with self._lock:
+            self._rankings.pop(user_id, None)
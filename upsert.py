@@ -0,0 +1,21 @@
+"""
+Counter upserts for the dialects the app runs on
+PostgreSQL and SQLite share the INSERT ... ON CONFLICT DO UPDATE form,
+but SQLAlchemy builds it from each dialect's own insert()
+"""
+
+
+def increment_upsert(engine, table, keys, columns):
+    """
+    INSERT into table that, when a row with the same keys exists, adds
+    the inserted values of columns to the stored ones instead
+    """
+    if engine.dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    statement = insert(table)
+    return statement.on_conflict_do_update(
+        index_elements=[table.c[key] for key in keys],
+        set_={column: table.c[column] + statement.excluded[column] for column in columns}
+    )
@@ -0,0 +1,70 @@
+"""
+User-Agent classification for activity logging
+Maps a raw User-Agent header to device type, browser and OS. Results
+are cached per distinct header, since a handful of UA strings account
+for almost every request
+"""
+
+from collections import namedtuple
+from functools import lru_cache
+
+UserAgentInfo = namedtuple('UserAgentInfo', ['device_type', 'browser', 'os'])
+
+UNKNOWN = UserAgentInfo('desktop', 'Unknown', 'Unknown')
+
+# Checked in order: every Chromium-based browser also sends "Chrome/"
+# and "Safari/", and Chrome sends "Safari/" too
+BROWSER_TOKENS = [
+    ('Edge', ('Edg/', 'Edge/', 'EdgA/', 'EdgiOS/')),
+    ('Opera', ('OPR/', 'OPT/', 'Opera')),
+    ('Firefox', ('Firefox/', 'FxiOS/')),
+    ('Chrome', ('Chrome/', 'CriOS/', 'Chromium/')),
+    ('Safari', ('Safari/',)),
+]
+
+# iOS UAs contain "like Mac OS X", Android UAs contain "Linux" and
+# Windows Phone UAs contain "Android"
+OS_TOKENS = [
+    ('iOS', ('iPhone', 'iPad', 'iPod')),
+    ('Windows', ('Windows',)),
+    ('Android', ('Android',)),
+    ('MacOS', ('Macintosh', 'Mac OS X')),
+    ('ChromeOS', ('CrOS',)),
+    ('Linux', ('Linux', 'X11')),
+]
+
+
+def _first_match(user_agent, table):
+    for name, tokens in table:
+        for token in tokens:
+            if token in user_agent:
+                return name
+    return 'Unknown'
+
+
+def _device_type(user_agent, os_name):
+    lowered = user_agent.lower()
+    # iPads and Android tablets either say "tablet" or omit "Mobile"
+    if 'ipad' in lowered or 'tablet' in lowered:
+        return 'tablet'
+    if os_name == 'Android':
+        return 'mobile' if 'mobile' in lowered else 'tablet'
+    if 'mobi' in lowered or 'iphone' in lowered or 'ipod' in lowered:
+        return 'mobile'
+    return 'desktop'
+
+
+@lru_cache(maxsize=1024)
+def parse_user_agent(user_agent):
+    """
+    Classify a User-Agent header
+    Returns: UserAgentInfo(device_type, browser, os)
+    """
+    if not user_agent:
+        return UNKNOWN
+    os_name = _first_match(user_agent, OS_TOKENS)
+    return UserAgentInfo(
+        _device_type(user_agent, os_name),
+        _first_match(user_agent, BROWSER_TOKENS),
+        os_name
+    )